@@ -1,4 +1,4 @@
-from SPARQLWrapper import SPARQLWrapper, JSON, POST
+from trelix_app.utils import sparql_client
 from typing import List, Dict, Optional
 import time
 
@@ -18,35 +18,48 @@ class ActivitySPARQLService:
     HAS_INSTRUCTOR_PROPERTY = f"{ALT_ONTOLOGY_NS}hasInstructor"
     # Person property for PersonSPARQLService
     PERSON_NAME_PROPERTY = f"{ONTOLOGY_NS}personName"
+    # Seconds the activity catalog may be served from the shared SPARQL cache
+    LIST_CACHE_TTL = 300
     
-    def __init__(self, endpoint: str = "http://localhost:3030/trelix/sparql"):
+    def __init__(self, endpoint: str = None):
+        # Only the dataset URL is kept: queries go through the shared,
+        # thread-safe sparql_client, so one instance can serve many threads.
         self.endpoint = endpoint
-        self.sparql = SPARQLWrapper(endpoint)
-        self.sparql.setReturnFormat(JSON)
-        update_endpoint = endpoint.replace('/sparql', '/update')
-        self.sparql_update = SPARQLWrapper(update_endpoint)
-        self.sparql_update.setMethod(POST)
+        self.dataset_url = endpoint.rsplit('/', 1)[0] if endpoint else None
     
-    def _execute_query(self, query: str, method: str = "GET") -> Dict:
-        self.sparql.setMethod(method)
-        self.sparql.setQuery(query)
+    def _execute_query(self, query: str, cache_ttl: int = None) -> Dict:
         try:
-            results = self.sparql.query().convert()
-            return results
+            return sparql_client.query(query, self.dataset_url, app="activity", cache_ttl=cache_ttl)
+        except Exception as e:
+            print(f"SPARQL Query Error: {e}")
+            return {"results": {"bindings": []}}
+    
+    async def _aexecute_query(self, query: str, cache_ttl: int = None) -> Dict:
+        try:
+            return await sparql_client.aquery(query, self.dataset_url, app="activity", cache_ttl=cache_ttl)
         except Exception as e:
             print(f"SPARQL Query Error: {e}")
             return {"results": {"bindings": []}}
     
     def _execute_update(self, update_query: str) -> bool:
         try:
-            self.sparql_update.setQuery(update_query)
-            self.sparql_update.query()
+            sparql_client.run_update(update_query, self.dataset_url)
             return True
         except Exception as e:
             print(f"SPARQL Update Error: {e}")
             return False
     
     def get_all_activities(self, status: str = None, search: str = None) -> List[Dict]:
+        query = self._all_activities_query(status, search)
+        results = self._execute_query(query, cache_ttl=self.LIST_CACHE_TTL)
+        return self._activities_from_results(results)
+    
+    async def aget_all_activities(self, status: str = None, search: str = None) -> List[Dict]:
+        query = self._all_activities_query(status, search)
+        results = await self._aexecute_query(query, cache_ttl=self.LIST_CACHE_TTL)
+        return self._activities_from_results(results)
+    
+    def _all_activities_query(self, status: str = None, search: str = None) -> str:
         query = f"""
         PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
         PREFIX ont: <{self.ONTOLOGY_NS}>
@@ -80,8 +93,9 @@ class ActivitySPARQLService:
         }
         ORDER BY ?name
         """
-        
-        results = self._execute_query(query)
+        return query
+    
+    def _activities_from_results(self, results: Dict) -> List[Dict]:
         activities = []
         
         for binding in results.get("results", {}).get("bindings", []):
@@ -1,9 +1,27 @@
 import google.generativeai as genai
 from django.conf import settings
+from trelix_app.utils.sparql_client import run_parallel
 from .sparql_service import ActivitySPARQLService
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 
+_llm_executor = None
+_llm_executor_lock = threading.Lock()
+
+
+def llm_pool():
+    """Threads for Gemini calls, kept apart from the shared SPARQL pool."""
+    global _llm_executor
+    with _llm_executor_lock:
+        if _llm_executor is None:
+            _llm_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "ACTIVITY_LLM_WORKERS", 4), thread_name_prefix="activity-llm"
+            )
+        return _llm_executor
+
+
 class ActivityTipsSuggestions:
     def __init__(self, api_key: str = None, model_name: str = None):
         self.api_key = api_key or getattr(settings, 'GOOGLE_API_KEY', None)
@@ -86,8 +104,10 @@ Return ONLY a valid JSON array in this exact format (no markdown, no code blocks
         return ActivitySPARQLService().get_all_activities()
 
     def generate_suggestions(self, activity_uri: str) -> List[Dict]:
-        activity_content = ActivityTipsSuggestions.get_activity_content(activity_uri)
-        activities = ActivityTipsSuggestions.get_activities()
+        activity_content, activities = run_parallel(
+            lambda: ActivityTipsSuggestions.get_activity_content(activity_uri),
+            ActivityTipsSuggestions.get_activities,
+        )
         
         if not activity_content:
             return []
@@ -5,19 +5,34 @@ from django.views.decorators.http import require_http_methods
 from urllib.parse import unquote
 from .sparql_service import ActivitySPARQLService
 from .models import Activity
-from .utils import ActivityTipsSuggestions
+from .utils import ActivityTipsSuggestions, llm_pool
+
+
+def _list_filters(request):
+    # Get filter parameters from query string
+    return request.GET.get('status', '').strip(), request.GET.get('search', '').strip()
 
 
 def activity_list(request):
     sparql_service = ActivitySPARQLService()
-    
-    # Get filter parameters from query string
-    status_filter = request.GET.get('status', '').strip()
-    search_query = request.GET.get('search', '').strip()
+    status_filter, search_query = _list_filters(request)
     
     # Get activities with SPARQL filtering
     activities_data = sparql_service.get_all_activities(status=status_filter if status_filter else None, 
-                                                         search=search_query if search_query else None)
+                                                        search=search_query if search_query else None)
+    return _render_activity_list(request, activities_data, status_filter, search_query)
+
+
+async def aactivity_list(request):
+    """activity_list() for ASGI (see trelix_app/urls_asgi.py)."""
+    sparql_service = ActivitySPARQLService()
+    status_filter, search_query = _list_filters(request)
+    activities_data = await sparql_service.aget_all_activities(status=status_filter if status_filter else None,
+                                                               search=search_query if search_query else None)
+    return _render_activity_list(request, activities_data, status_filter, search_query)
+
+
+def _render_activity_list(request, activities_data, status_filter, search_query):
     activities = [Activity.from_dict(activity_data) for activity_data in activities_data]
     
     context = {
@@ -70,11 +85,11 @@ def get_tips_and_suggestions(request, activity_uri):
         activity_name = activity_data.get('activity_name', '')
         activity_description = activity_data.get('description', '')
         
-        # Get tips
-        tips = tips_suggestions_service.get_tips(activity_name, activity_description)
-        
-        # Get suggestions
+        # Tips and suggestions are independent model calls: tips run on the LLM
+        # pool while this thread builds the suggestions
+        tips_future = llm_pool().submit(tips_suggestions_service.get_tips, activity_name, activity_description)
         suggestions = tips_suggestions_service.generate_suggestions(activity_uri_decoded)
+        tips = tips_future.result()
         
         return JsonResponse({
             'success': True,
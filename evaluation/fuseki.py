@@ -1,4 +1,4 @@
-import requests
+from trelix_app.utils.sparql_client import run_update
 
 FUSEKI_URL = "http://localhost:3030/webfinalle2"
 PREFIX = "http://localhost:3030/webfinalle2/examen/"
@@ -25,10 +25,11 @@ def envoyer_examen_fuseki(examen):
     }}
     """
 
-    headers = {"Content-Type": "application/sparql-update"}
-    response = requests.post(f"{FUSEKI_URL}/update", data=data.encode('utf-8'), headers=headers)
-    print("✅ Fuseki upsert Examen+Badge:", response.status_code)
-    print("📌 Response:", response.text)
+    try:
+        run_update(data, dataset_url=FUSEKI_URL)
+        print("✅ Fuseki upsert Examen+Badge")
+    except Exception as e:
+        print("❌ Fuseki upsert Examen+Badge:", e)
 
 
 def supprimer_examen_fuseki(exam_id):
@@ -37,8 +38,8 @@ def supprimer_examen_fuseki(exam_id):
     DELETE WHERE {{ <{PREFIX}{exam_id}> ?p ?o . }}
     """
     
-    headers = {"Content-Type": "application/sparql-update"}
-    response = requests.post(f"{FUSEKI_URL}/update", data=data.encode("utf-8"), headers=headers)
-
-    print("🗑 Suppression Fuseki:", response.status_code)
-    print("📌 Response:", response.text)
+    try:
+        run_update(data, dataset_url=FUSEKI_URL)
+        print("🗑 Suppression Fuseki")
+    except Exception as e:
+        print("❌ Suppression Fuseki:", e)
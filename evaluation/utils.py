@@ -1,19 +1,25 @@
 import os
 import base64
 import requests
-from datetime import datetime
-from django.conf import settings
+from trelix_app.utils import image_cache
 from .models import Badge
 
 STABILITY_API_KEY = os.getenv("STABILITY_API_KEY")
+BADGE_GENERATOR = "badge-stability"
 
 def generer_badge_image(type_badge):
+    prompt = f"A shiny {type_badge.lower()} medal badge, high quality, 3D render, HD resolution"
+
+    # Badge déjà généré pour ce prompt : aucun appel à Stability
+    cached = image_cache.lookup(BADGE_GENERATOR, prompt, output_format="png")
+    if cached:
+        print("✅ Badge depuis le cache :", cached)
+        return cached
+
     if not STABILITY_API_KEY:
         print("❌ API KEY Stability manquante")
         return None
 
-    prompt = f"A shiny {type_badge.lower()} medal badge, high quality, 3D render, HD resolution"
-
     url = "https://api.stability.ai/v2beta/stable-image/generate/core"
 
     headers = {
@@ -35,16 +41,9 @@ def generer_badge_image(type_badge):
 
     img_bytes = response.content  # ✅ données image directement
 
-    filename = f"badge_{type_badge.lower()}_{int(datetime.now().timestamp())}.png"
-    folder = os.path.join(settings.MEDIA_ROOT, "badges")
-    os.makedirs(folder, exist_ok=True)
-    path = os.path.join(folder, filename)
-
-    with open(path, "wb") as f:
-        f.write(img_bytes)
-
-    print("✅ Badge généré :", filename)
-    return f"badges/{filename}"
+    path = image_cache.store(BADGE_GENERATOR, prompt, img_bytes, "png", output_format="png")
+    print("✅ Badge généré :", path)
+    return path
 
 
 
@@ -63,6 +62,7 @@ def creer_achievement_automatique(examen):
         if img_path:
             badge.image = img_path
             badge.save()
+            image_cache.pin(img_path)
 
     examen.badge = badge
     examen.save()
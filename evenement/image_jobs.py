@@ -0,0 +1,141 @@
+# evenement/image_jobs.py
+"""
+Génération des bannières en arrière-plan.
+
+Un prompt déjà généré est servi par le cache d'images, sans job. Sinon
+submit() dessine tout de suite l'image locale (create_simple_image), qui sert
+d'aperçu, enregistre un ImageJob (SQLite) et confie les appels aux API
+d'images (jusqu'à 2 x 60 s) à un pool de IMAGE_JOB_WORKERS threads. La requête
+HTTP répond aussitôt avec l'identifiant du job ; le formulaire interroge
+image_job_status jusqu'à ce que le job soit "done" (image_path : l'image de
+l'API, ou l'aperçu local si aucune API n'a répondu) ou "failed".
+
+Un job est « abandonné » quand il est resté "pending" ou "running" plus de
+IMAGE_JOB_STALE_SECONDS sans mise à jour (processus arrêté pendant le job ;
+un job actif met updated_at à jour à chaque étape). Les jobs abandonnés sont
+relancés au démarrage du pool et quand le formulaire interroge leur état
+(image_job_status). _run() réclame le job par un update() conditionnel : si
+deux processus le relancent, un seul l'exécute.
+"""
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from trelix_app.utils import image_cache
+
+from .images import banner_prompt, cached_api_banner, generate_real_image, local_banner, store_api_banner
+from .models import ImageJob
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "IMAGE_JOB_WORKERS", 2), thread_name_prefix="image-job"
+            )
+            # Jobs interrompus par un redémarrage
+            for job_id in _stale().values_list("job_id", flat=True):
+                _executor.submit(_run, job_id)
+        return _executor
+
+
+def _stale_filter():
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, "IMAGE_JOB_STALE_SECONDS", 300))
+    return Q(status__in=[ImageJob.PENDING, ImageJob.RUNNING], updated_at__lt=cutoff)
+
+
+def _stale():
+    return ImageJob.objects.filter(_stale_filter())
+
+
+def _claim(job_id):
+    """Passe le job à "running" s'il attend ou a été abandonné ; False si un autre l'a pris."""
+    claimable = Q(status=ImageJob.PENDING) | _stale_filter()
+    return ImageJob.objects.filter(claimable, job_id=job_id).update(
+        status=ImageJob.RUNNING, updated_at=timezone.now()
+    ) == 1
+
+
+def resume_if_stale(job):
+    """Relance ``job`` s'il a été abandonné ; renvoie True s'il a été relancé."""
+    if job.status not in (ImageJob.PENDING, ImageJob.RUNNING) or not _stale().filter(pk=job.pk).exists():
+        return False
+    _pool().submit(_run, job.job_id)
+    return True
+
+
+def _update(job_id, **fields):
+    # update() ne touche pas auto_now : updated_at est passé explicitement
+    ImageJob.objects.filter(job_id=job_id).update(updated_at=timezone.now(), **fields)
+
+
+def submit(title, event_type):
+    """
+    Crée le job ; renvoie l'ImageJob, "pending" avec son aperçu local, ou déjà
+    "done" si ce prompt a été généré auparavant (aucun appel externe alors).
+    """
+    cached = cached_api_banner(banner_prompt(title, event_type))
+    if cached:
+        image_cache.hold(cached)
+        return ImageJob.objects.create(
+            job_id=uuid.uuid4().hex, title=title, event_type=event_type, status=ImageJob.DONE,
+            stage="cache", image_path=cached, source="api",
+        )
+    job = ImageJob.objects.create(
+        job_id=uuid.uuid4().hex,
+        title=title,
+        event_type=event_type,
+        stage="queued",
+        placeholder_path=local_banner(title, event_type) or "",
+    )
+    # L'aperçu est affiché dans le formulaire : gardé jusqu'à l'enregistrement
+    image_cache.hold(job.placeholder_path)
+    _pool().submit(_run, job.job_id)
+    return job
+
+
+def _run(job_id):
+    try:
+        if not _claim(job_id):
+            return
+        job = ImageJob.objects.get(job_id=job_id)
+        prompt = banner_prompt(job.title, job.event_type)
+        # Un autre job a pu générer le même prompt entre-temps
+        image_path = cached_api_banner(prompt)
+        if not image_path:
+            image_bytes = generate_real_image(prompt, on_stage=lambda stage: _update(job_id, stage=stage))
+            if image_bytes:
+                _update(job_id, stage="saving")
+                image_path = store_api_banner(prompt, image_bytes)
+        if image_path:
+            image_cache.hold(image_path)
+            _update(job_id, status=ImageJob.DONE, stage="done", image_path=image_path, source="api")
+        elif job.placeholder_path:
+            image_cache.hold(job.placeholder_path)
+            # Aucune API n'a répondu : l'aperçu local devient l'image finale
+            _update(job_id, status=ImageJob.DONE, stage="done", image_path=job.placeholder_path, source="local")
+        else:
+            _update(job_id, status=ImageJob.FAILED, stage="done",
+                    error="Impossible de générer une image. Veuillez uploader une image manuellement.")
+    except Exception as e:
+        print(f"❌ Erreur job image {job_id}: {e}")
+        try:
+            _update(job_id, status=ImageJob.FAILED, stage="done", error=str(e)[:1000])
+        except Exception:
+            pass
+    finally:
+        close_old_connections()
+
+
+def get_job(job_id):
+    return ImageJob.objects.filter(job_id=job_id).first()
@@ -0,0 +1,237 @@
+# evenement/images.py
+"""
+Génération des bannières d'événements : API d'images externes (Flux, puis
+une alternative), et à défaut une image graphique dessinée localement.
+Les bannières passent par trelix_app/utils/image_cache.py : un prompt déjà
+généré est relu depuis media/ sans appel externe.
+"""
+import base64
+import functools
+import io
+import random
+
+import numpy as np
+import requests
+from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageOps
+
+from trelix_app.utils import image_cache
+
+# Clés du cache d'images : mêmes prompt et paramètres -> même image
+API_GENERATOR = "banner-api"
+LOCAL_GENERATOR = "banner-local"
+FLUX_PARAMS = {
+    "width": 512,
+    "height": 512,
+    "guidance_scale": 7.5,
+    "num_inference_steps": 20,
+}
+
+
+def banner_prompt(title, event_type):
+    # Prompt optimisé
+    return f"professional {event_type} event banner titled '{title}', modern design, vibrant colors, high quality, attractive"
+
+
+def encode_jpeg(image):
+    """Octets JPEG de ``image`` (PIL), tels qu'enregistrés dans le cache d'images."""
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format='JPEG', quality=90, optimize=True)
+    return buffer.getvalue()
+
+
+def cached_api_banner(prompt):
+    """Bannière déjà générée par une API pour ce prompt, ou None (aucun appel externe)."""
+    return image_cache.lookup(API_GENERATOR, prompt, **FLUX_PARAMS)
+
+
+def store_api_banner(prompt, image_bytes):
+    """Enregistre (une seule fois par contenu) l'image d'une API ; renvoie son chemin."""
+    image = Image.open(io.BytesIO(image_bytes))
+    path = image_cache.store(API_GENERATOR, prompt, encode_jpeg(image), "jpg", **FLUX_PARAMS)
+    print(f"💾 Image sauvegardée: {path}")
+    return path
+
+
+def local_banner(title, event_type):
+    """Bannière dessinée localement, réutilisée pour un même titre et un même type."""
+    def make():
+        image = create_simple_image(title, event_type)
+        return encode_jpeg(image) if image else None
+    return image_cache.get_or_create(LOCAL_GENERATOR, f"{title}|{event_type}", make, "jpg")
+
+
+def generate_real_image(prompt, on_stage=None):
+    """
+    Génère une VRAIE image avec Flux API (GRATUIT) ; ``on_stage(nom)`` est
+    appelé à chaque API essayée (suivi des jobs d'image).
+    """
+    if on_stage:
+        on_stage("flux")
+    try:
+        print(f"🚀 Génération d'image avec Flux: {prompt}")
+        
+        # API Flux - GRATUITE et fonctionnelle
+        API_URL = "https://flux1.aiwan.io/api/v1/generation/image-to-image"
+        
+        payload = {"prompt": prompt, **FLUX_PARAMS}
+        
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        }
+        
+        print("📡 Envoi à Flux API...")
+        response = requests.post(API_URL, headers=headers, json=payload, timeout=60)
+        
+        print(f"📥 Réponse: {response.status_code}")
+        
+        if response.status_code == 200:
+            data = response.json()
+            if "images" in data and len(data["images"]) > 0:
+                # L'API retourne une image en base64
+                image_data = data["images"][0]
+                if image_data.startswith('data:image'):
+                    image_data = image_data.split(',')[1]
+                image_bytes = base64.b64decode(image_data)
+                print("✅ Image générée avec succès!")
+                return image_bytes
+        else:
+            print(f"❌ Erreur Flux API: {response.status_code} - {response.text[:200]}")
+            
+    except Exception as e:
+        print(f"❌ Erreur Flux: {str(e)}")
+    
+    # Fallback: Essayer avec une autre API gratuite
+    if on_stage:
+        on_stage("alternative")
+    return try_alternative_api(prompt)
+
+def try_alternative_api(prompt):
+    """Essaye une autre API gratuite"""
+    try:
+        print("🔄 Essai avec alternative API...")
+        
+        # API alternative gratuite
+        API_URL = "https://api-inference.banana.dev/run/black-forest-labs/FLUX-1-schnell"
+        
+        payload = {
+            "prompt": prompt,
+            "width": 512,
+            "height": 512
+        }
+        
+        response = requests.post(API_URL, json=payload, timeout=60)
+        
+        if response.status_code == 200:
+            data = response.json()
+            if "image" in data:
+                image_bytes = base64.b64decode(data["image"])
+                print("✅ Alternative API fonctionne!")
+                return image_bytes
+                
+    except Exception as e:
+        print(f"❌ Alternative API échouée: {e}")
+    
+    return None
+
+# Bannière locale : dessinée à BANNER_SIZE puis, pour d'autres tailles, recadrée
+BANNER_SIZE = 512
+# Marge (px) autour des décorations floutées, au-delà du rayon du GaussianBlur
+BLUR_MARGIN = 8
+
+
+@functools.lru_cache(maxsize=None)
+def _fonts(title_size, subtitle_size):
+    """Polices du titre et du sous-titre, cherchées une seule fois par taille."""
+    try:
+        return (ImageFont.truetype("arial.ttf", title_size), ImageFont.truetype("arialbd.ttf", subtitle_size))
+    except Exception:
+        try:
+            return (ImageFont.load_default(),)
+        except Exception as e:
+            print(f"Note: Police non disponible - {e}")
+            return ()
+
+
+def _gradient(side, color1, color2):
+    """Dégradé vertical color1 -> color2 : une colonne NumPy étirée sur la largeur."""
+    ratio = np.arange(side) / side
+    column = (np.outer(1 - ratio, color1) + np.outer(ratio, color2)).astype(np.uint8)
+    return Image.fromarray(column[:, None, :]).resize((side, side), Image.NEAREST)
+
+
+def _blur(image, boxes):
+    """
+    GaussianBlur(1) limité au rectangle englobant ``boxes`` : ailleurs, le
+    dégradé vertical est (au niveau de gris près) inchangé par le flou.
+    """
+    if not boxes:
+        return image
+    pad = BLUR_MARGIN
+    left = max(0, int(min(b[0] for b in boxes)) - 2 * pad)
+    top = max(0, int(min(b[1] for b in boxes)) - 2 * pad)
+    right = min(image.width, int(max(b[2] for b in boxes)) + 2 * pad)
+    bottom = min(image.height, int(max(b[3] for b in boxes)) + 2 * pad)
+    region = image.crop((left, top, right, bottom)).filter(ImageFilter.GaussianBlur(1))
+    # Sans les bords du recadrage (flou calculé sans leurs voisins), sauf en bord d'image
+    inner = (
+        0 if left == 0 else pad,
+        0 if top == 0 else pad,
+        region.width if right == image.width else region.width - pad,
+        region.height if bottom == image.height else region.height - pad,
+    )
+    image.paste(region.crop(inner), (left + inner[0], top + inner[1]))
+    return image
+
+
+def create_simple_image(title, event_type, sizes=None):
+    """
+    Crée une image simple mais BELLE (pas juste du texte).
+
+    Avec ``sizes`` (liste de (largeur, hauteur)), renvoie {taille: image} :
+    un seul dessin, à la plus grande taille demandée, recadré pour chacune.
+    """
+    try:
+        side = BANNER_SIZE
+        if sizes:
+            side = max(side, *(max(size) for size in sizes))
+        scale = side / BANNER_SIZE
+
+        # Créer un dégradé de couleur
+        color1 = (random.randint(50, 200), random.randint(50, 200), random.randint(50, 200))
+        color2 = (random.randint(50, 200), random.randint(50, 200), random.randint(50, 200))
+        image = _gradient(side, color1, color2)
+        draw = ImageDraw.Draw(image)
+        boxes = []
+
+        # Ajouter des éléments graphiques
+        # Cercles décoratifs
+        for _ in range(5):
+            x = random.randint(50, BANNER_SIZE - 50) * scale
+            y = random.randint(50, BANNER_SIZE - 50) * scale
+            radius = random.randint(20, 80) * scale
+            box = [x - radius, y - radius, x + radius, y + radius]
+            draw.ellipse(box, fill=(255, 255, 255, 50), outline=(255, 255, 255, 100))
+            boxes.append(box)
+
+        # Ajouter du texte stylisé
+        fonts = _fonts(round(36 * scale), round(28 * scale))
+        lines = [(title, 180, (255, 255, 255))]
+        if len(fonts) > 1:
+            lines.append((f"{event_type} Event", 230, (255, 255, 255, 180)))
+        for (text, y, fill), font in zip(lines, fonts):
+            bbox = draw.textbbox((0, 0), text, font=font)
+            x = (side - (bbox[2] - bbox[0])) / 2
+            draw.text((x, y * scale), text, fill=fill, font=font)
+            boxes.append(draw.textbbox((x, y * scale), text, font=font))
+
+        # Ajouter un effet de flou artistique
+        image = _blur(image, boxes)
+
+        if sizes:
+            return {tuple(size): ImageOps.fit(image, tuple(size), Image.LANCZOS) for size in sizes}
+        return image
+
+    except Exception as e:
+        print(f"❌ Erreur création image: {e}")
+        return None
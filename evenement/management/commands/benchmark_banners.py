@@ -0,0 +1,73 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from evenement.images import create_simple_image
+
+
+def _rowwise_image(title, event_type):
+    """Previous create_simple_image, kept as the reference for the benchmark."""
+    width, height = 512, 512
+    color1 = (random.randint(50, 200), random.randint(50, 200), random.randint(50, 200))
+    color2 = (random.randint(50, 200), random.randint(50, 200), random.randint(50, 200))
+    image = Image.new('RGB', (width, height), color1)
+    draw = ImageDraw.Draw(image)
+    for i in range(height):
+        ratio = i / height
+        r = int(color1[0] * (1 - ratio) + color2[0] * ratio)
+        g = int(color1[1] * (1 - ratio) + color2[1] * ratio)
+        b = int(color1[2] * (1 - ratio) + color2[2] * ratio)
+        draw.line([(0, i), (width, i)], fill=(r, g, b))
+    for _ in range(5):
+        x = random.randint(50, width - 50)
+        y = random.randint(50, height - 50)
+        radius = random.randint(20, 80)
+        draw.ellipse([x - radius, y - radius, x + radius, y + radius],
+                     fill=(255, 255, 255, 50), outline=(255, 255, 255, 100))
+    fonts = []
+    try:
+        fonts.append(ImageFont.truetype("arial.ttf", 36))
+        fonts.append(ImageFont.truetype("arialbd.ttf", 28))
+    except Exception:
+        fonts.append(ImageFont.load_default())
+    bbox = draw.textbbox((0, 0), title, font=fonts[0])
+    draw.text(((width - (bbox[2] - bbox[0])) / 2, 180), title, fill=(255, 255, 255), font=fonts[0])
+    if len(fonts) > 1:
+        subtitle = f"{event_type} Event"
+        bbox = draw.textbbox((0, 0), subtitle, font=fonts[1])
+        draw.text(((width - (bbox[2] - bbox[0])) / 2, 230), subtitle, fill=(255, 255, 255, 180), font=fonts[1])
+    return image.filter(ImageFilter.GaussianBlur(1))
+
+
+class Command(BaseCommand):
+    help = "Time the local banner fallback (create_simple_image) against the row-by-row version"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=50, help="Banners drawn per measurement")
+        parser.add_argument('--sizes', default="512x512,256x256,128x128",
+                            help="Sizes for the multi-size measurement (WxH, comma-separated)")
+
+    def _time(self, runs, fn):
+        random.seed(0)
+        start = time.perf_counter()
+        for i in range(runs):
+            fn(f"Benchmark event {i}", "Conference")
+        return (time.perf_counter() - start) * 1000 / runs
+
+    def handle(self, *args, **options):
+        runs = options['runs']
+        sizes = [tuple(int(v) for v in size.split("x")) for size in options['sizes'].split(",")]
+
+        before = self._time(runs, _rowwise_image)
+        after = self._time(runs, create_simple_image)
+        self.stdout.write(f"One banner:   row-by-row {before:.2f} ms, vectorized {after:.2f} ms ({before / after:.1f}x)")
+
+        separate = self._time(runs, lambda title, kind: [
+            create_simple_image(title, kind).resize(size, Image.LANCZOS) for size in sizes
+        ])
+        one_pass = self._time(runs, lambda title, kind: create_simple_image(title, kind, sizes=sizes))
+        self.stdout.write(
+            f"{len(sizes)} sizes:      separate {separate:.2f} ms, one pass {one_pass:.2f} ms ({separate / one_pass:.1f}x)"
+        )
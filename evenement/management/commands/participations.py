@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from evenement import participations
+from evenement.models import Participation, ParticipationSync
+
+
+class Command(BaseCommand):
+    help = "Show the local participation index, or reset it so it is reloaded from the graph"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Forget the indexed participations")
+        parser.add_argument('--student', default=None, help="Only reset this student URI")
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            deleted = participations.reset(options['student'])
+            self.stdout.write(self.style.SUCCESS(f"{deleted} indexed participations deleted"))
+            return
+        self.stdout.write(f"Students loaded: {ParticipationSync.objects.count()}")
+        self.stdout.write(f"Participations: {Participation.objects.count()}")
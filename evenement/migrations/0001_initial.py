@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(max_length=32, unique=True)),
+                ('title', models.CharField(max_length=255)),
+                ('event_type', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminée'), ('failed', 'Échouée')], default='pending', max_length=16)),
+                ('stage', models.CharField(blank=True, max_length=64)),
+                ('placeholder_path', models.CharField(blank=True, max_length=255)),
+                ('image_path', models.CharField(blank=True, max_length=255)),
+                ('source', models.CharField(blank=True, max_length=16)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status'], name='evenement_image_job_status')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evenement', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipationSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etudiant_uri', models.CharField(max_length=255, unique=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Participation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etudiant_uri', models.CharField(max_length=255)),
+                ('evenement_uri', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('etudiant_uri', 'evenement_uri'), name='evenement_participation_unique')],
+            },
+        ),
+    ]
@@ -1,3 +1,57 @@
 from django.db import models
 
-# Create your models here.
+
+class ImageJob(models.Model):
+    """Génération d'une bannière en arrière-plan (voir evenement/image_jobs.py)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'En attente'),
+        (RUNNING, 'En cours'),
+        (DONE, 'Terminée'),
+        (FAILED, 'Échouée'),
+    ]
+
+    job_id = models.CharField(max_length=32, unique=True)
+    title = models.CharField(max_length=255)
+    event_type = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=16, choices=STATUSES, default=PENDING)
+    stage = models.CharField(max_length=64, blank=True)  # étape en cours, pour la barre de progression
+    placeholder_path = models.CharField(max_length=255, blank=True)  # image locale, disponible tout de suite
+    image_path = models.CharField(max_length=255, blank=True)  # image finale (API, ou l'image locale)
+    source = models.CharField(max_length=16, blank=True)  # "api" ou "local"
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status'], name='evenement_image_job_status')]
+
+    def __str__(self):
+        return f"{self.job_id} ({self.status})"
+
+
+class Participation(models.Model):
+    """Index local des triplets ``<étudiant> ns:participer <événement>`` (voir evenement/participations.py)."""
+    etudiant_uri = models.CharField(max_length=255)
+    evenement_uri = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['etudiant_uri', 'evenement_uri'], name='evenement_participation_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.etudiant_uri} -> {self.evenement_uri}"
+
+
+class ParticipationSync(models.Model):
+    """Étudiant dont les participations du graphe ont été chargées dans Participation."""
+    etudiant_uri = models.CharField(max_length=255, unique=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.etudiant_uri
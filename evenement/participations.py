@@ -0,0 +1,65 @@
+# evenement/participations.py
+"""
+Index local des participations (table Participation, SQLite).
+
+add_participation() écrit le triplet ``ns:participer`` dans le graphe puis
+la ligne d'index : le badge "déjà inscrit" de la page détail et la liste
+"mes participations" n'interrogent plus le graphe pour savoir à quoi un
+étudiant participe. La première fois qu'un étudiant est consulté, ses
+participations déjà présentes dans le graphe (antérieures à l'index, ou
+ajoutées hors de l'application) sont chargées en une requête, et
+l'étudiant est noté dans ParticipationSync ; `manage.py participations
+--reset` oublie ces chargements, pour relire le graphe après une
+modification externe.
+"""
+from trelix_app.utils import sparql_client
+
+from .models import Participation, ParticipationSync
+
+PARTICIPATIONS_QUERY = """
+PREFIX ns: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
+SELECT ?evenement WHERE {{ <{etudiant}> ns:participer ?evenement . }}
+"""
+
+
+def _sync(etudiant_uri):
+    """Charge une seule fois les participations de l'étudiant depuis le graphe."""
+    if ParticipationSync.objects.filter(etudiant_uri=etudiant_uri).exists():
+        return
+    results = sparql_client.run_select(PARTICIPATIONS_QUERY.format(etudiant=etudiant_uri))
+    Participation.objects.bulk_create(
+        [Participation(etudiant_uri=etudiant_uri, evenement_uri=r["evenement"]["value"]) for r in results],
+        ignore_conflicts=True,
+    )
+    ParticipationSync.objects.get_or_create(etudiant_uri=etudiant_uri)
+
+
+def record(etudiant_uri, evenement_uri):
+    """Ajoute la participation à l'index (le triplet est déjà dans le graphe)."""
+    Participation.objects.get_or_create(etudiant_uri=etudiant_uri, evenement_uri=evenement_uri)
+
+
+def contains(etudiant_uri, evenement_uri):
+    _sync(etudiant_uri)
+    return Participation.objects.filter(etudiant_uri=etudiant_uri, evenement_uri=evenement_uri).exists()
+
+
+def evenement_uris(etudiant_uri):
+    """URIs des événements de l'étudiant, les plus récentes inscriptions d'abord."""
+    _sync(etudiant_uri)
+    return list(
+        Participation.objects.filter(etudiant_uri=etudiant_uri)
+        .order_by("-created_at", "-id")
+        .values_list("evenement_uri", flat=True)
+    )
+
+
+def reset(etudiant_uri=None):
+    """Oublie l'index (d'un étudiant, ou de tous) ; il sera rechargé depuis le graphe."""
+    participations = Participation.objects.all()
+    syncs = ParticipationSync.objects.all()
+    if etudiant_uri:
+        participations = participations.filter(etudiant_uri=etudiant_uri)
+        syncs = syncs.filter(etudiant_uri=etudiant_uri)
+    syncs.delete()
+    return participations.delete()[0]
@@ -1,12 +1,11 @@
-from SPARQLWrapper import SPARQLWrapper, JSON, POST
+from trelix_app.utils import sparql_client
+
+from . import participations
 
-FUSEKI_URL = "http://localhost:3030/trelix"
 BASE_URI = "http://example.com/evenement/"
+LIST_CACHE_TTL = 300  # secondes, cache partagé des listes (voir sparql_cache)
 
 def insert_evenement(uri, typeEvenement, nomEvenement, description, lieu, dateDebut, dateFin, image=None):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
-
     # Échapper les guillemets dans les chaînes
     nomEvenement = nomEvenement.replace('"', '\\"')
     description = description.replace('"', '\\"')
@@ -33,12 +32,10 @@ def insert_evenement(uri, typeEvenement, nomEvenement, description, lieu, dateDe
     }}
     """
 
-    sparql.setQuery(query)
-    sparql.query()
+    sparql_client.run_update(query)
 
 def get_evenement_by_uri(uri):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/query")
-    sparql.setQuery(f"""
+    results = sparql_client.run_select(f"""
     PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
     SELECT ?evenement ?typeEvenement ?nomEvenement ?description ?lieu ?dateDebut ?dateFin ?image
     WHERE {{
@@ -49,13 +46,13 @@ def get_evenement_by_uri(uri):
                    ex:dateDebut ?dateDebut ;
                    ex:dateFin ?dateFin ;
                    ex:image ?image .
+        FILTER (?typeEvenement IN (ex:HackathonEvent, ex:WorkshopEvent))
     }}
+    LIMIT 1
     """)
-    sparql.setReturnFormat(JSON)
-    results = sparql.query().convert()
     
-    if results["results"]["bindings"]:
-        r = results["results"]["bindings"][0]
+    if results:
+        r = results[0]
         return {
             "uri": uri,
             "typeEvenement": r["typeEvenement"]["value"].split("#")[-1].replace("Event", ""),
@@ -69,12 +66,10 @@ def get_evenement_by_uri(uri):
     return None
 
 
-def get_evenements():
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/query")
-    sparql.setQuery(f"""
+EVENEMENTS_QUERY = """
     PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
     SELECT ?evenement ?typeEvenement ?nomEvenement ?description ?lieu ?dateDebut ?dateFin ?image
-    WHERE {{
+    WHERE {
         ?evenement a ?typeEvenement ;
                    ex:nomEvenement ?nomEvenement ;
                    ex:description ?description ;
@@ -83,20 +78,82 @@ def get_evenements():
                    ex:dateFin ?dateFin ;
                    ex:image ?image .
         FILTER (?typeEvenement IN (ex:HackathonEvent, ex:WorkshopEvent))
+    }
+    """
+
+
+def get_evenements():
+    results = sparql_client.run_select(EVENEMENTS_QUERY, app="evenement", cache_ttl=LIST_CACHE_TTL)
+    return _evenements_from_bindings(results)
+
+
+# Page des listes : sans la description (lue par la page de détail), les plus
+# récents d'abord ; ?evenement départage pour que LIMIT/OFFSET reste stable
+EVENEMENTS_PAGE_QUERY = """
+    PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
+    SELECT ?evenement ?typeEvenement ?nomEvenement ?lieu ?dateDebut ?dateFin ?image
+    WHERE {{
+        ?evenement a ?typeEvenement ;
+                   ex:nomEvenement ?nomEvenement ;
+                   ex:lieu ?lieu ;
+                   ex:dateDebut ?dateDebut ;
+                   ex:dateFin ?dateFin ;
+                   ex:image ?image .
+        FILTER (?typeEvenement IN (ex:HackathonEvent, ex:WorkshopEvent))
     }}
-    """)
-    sparql.setReturnFormat(JSON)
-    results = sparql.query().convert()
-    
-    print(f"🔍 Nombre d'événements récupérés: {len(results['results']['bindings'])}")
+    ORDER BY DESC(?dateDebut) ?evenement
+    LIMIT {limit} OFFSET {offset}
+    """
+
+EVENEMENTS_COUNT_QUERY = """
+    PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
+    SELECT (COUNT(?evenement) AS ?total)
+    WHERE {
+        ?evenement a ?typeEvenement ;
+                   ex:nomEvenement ?nomEvenement ;
+                   ex:lieu ?lieu ;
+                   ex:dateDebut ?dateDebut ;
+                   ex:dateFin ?dateFin ;
+                   ex:image ?image .
+        FILTER (?typeEvenement IN (ex:HackathonEvent, ex:WorkshopEvent))
+    }
+    """
+
+def _page_query(limit, offset):
+    return EVENEMENTS_PAGE_QUERY.format(limit=int(limit), offset=int(offset))
+
+
+def get_evenements_page(limit, offset=0):
+    results = sparql_client.run_select(_page_query(limit, offset), app="evenement", cache_ttl=LIST_CACHE_TTL)
+    return _evenements_from_bindings(results)
+
+
+async def aget_evenements_page(limit, offset=0):
+    """Version async de get_evenements_page() pour les vues async (ASGI)."""
+    results = await sparql_client.arun_select(_page_query(limit, offset), app="evenement", cache_ttl=LIST_CACHE_TTL)
+    return _evenements_from_bindings(results)
+
+
+def count_evenements():
+    results = sparql_client.run_select(EVENEMENTS_COUNT_QUERY, app="evenement", cache_ttl=LIST_CACHE_TTL)
+    return int(results[0]["total"]["value"]) if results else 0
+
+
+async def acount_evenements():
+    results = await sparql_client.arun_select(EVENEMENTS_COUNT_QUERY, app="evenement", cache_ttl=LIST_CACHE_TTL)
+    return int(results[0]["total"]["value"]) if results else 0
+
+
+def _evenements_from_bindings(results):
+    print(f"🔍 Nombre d'événements récupérés: {len(results)}")
     
     evenements = []
-    for r in results["results"]["bindings"]:
+    for r in results:
         event_data = {
             "uri": r["evenement"]["value"].replace(BASE_URI, ""),
             "typeEvenement": r["typeEvenement"]["value"].split("#")[-1],
             "nomEvenement": r["nomEvenement"]["value"],
-            "description": r["description"]["value"],
+            "description": r["description"]["value"] if "description" in r else "",
             "lieu": r["lieu"]["value"],
             "dateDebut": r["dateDebut"]["value"],
             "dateFin": r["dateFin"]["value"],
@@ -109,8 +166,6 @@ def get_evenements():
 
 
 def update_evenement(uri, typeEvenement, nomEvenement, description, lieu, dateDebut, dateFin, image):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
     query = f"""
     PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
     DELETE {{
@@ -129,20 +184,16 @@ def update_evenement(uri, typeEvenement, nomEvenement, description, lieu, dateDe
         <{BASE_URI}{uri}> ?p ?o .
     }}
     """
-    sparql.setQuery(query)
-    sparql.query()
+    sparql_client.run_update(query)
 
 
 def delete_evenement(uri):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
-    sparql.setQuery(f"""
+    sparql_client.run_update(f"""
     PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
     DELETE WHERE {{
         <{BASE_URI}{uri}> ?p ?o
     }}
     """)
-    sparql.query()
 
 
 def add_participation(etudiant_uri, evenement_uri):
@@ -154,54 +205,53 @@ def add_participation(etudiant_uri, evenement_uri):
         <{etudiant_uri}> ns:participer <{evenement_uri}> .
     }}
     """
-    return update_sparql(query)
+    response = update_sparql(query)
+    participations.record(etudiant_uri, evenement_uri)
+    return response
 
 
 def query_sparql(query):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/query")
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
-    return sparql.query().convert()
+    return sparql_client.query(query)
 
 
 def update_sparql(query):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
-    sparql.setQuery(query)
-    return sparql.query()
+    return sparql_client.run_update(query)
 
 
 def check_participation(etudiant_uri, evenement_uri):
-    """Vérifie si un étudiant participe déjà à un événement"""
-    query = f"""
-    PREFIX ns: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
-    
-    ASK {{
-        <{etudiant_uri}> ns:participer <{evenement_uri}> .
-    }}
-    """
-    response = query_sparql(query)
-    return response['boolean'] if 'boolean' in response else False
+    """Vérifie si un étudiant participe déjà à un événement (index local, sans requête au graphe)"""
+    return participations.contains(etudiant_uri, evenement_uri)
 
 
 def get_participations(etudiant_uri):
-    """Récupère tous les événements auxquels participe un étudiant"""
+    """
+    Récupère tous les événements auxquels participe un étudiant : leurs URIs
+    depuis l'index local, puis leurs détails en une requête (VALUES).
+    """
+    uris = participations.evenement_uris(etudiant_uri)
+    if not uris:
+        return {"head": {"vars": []}, "results": {"bindings": []}}
+    values = " ".join(f"<{uri}>" for uri in uris)
     query = f"""
     PREFIX ns: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
     
     SELECT ?evenement ?nom ?type ?dateDebut ?dateFin ?lieu ?description ?image
     WHERE {{
-        <{etudiant_uri}> ns:participer ?evenement .
+        VALUES ?evenement {{ {values} }}
         ?evenement ns:nomEvenement ?nom .
-        ?evenement ns:typeEvenement ?type .
         ?evenement ns:dateDebut ?dateDebut .
         ?evenement ns:dateFin ?dateFin .
         ?evenement ns:lieu ?lieu .
         ?evenement ns:description ?description .
+        OPTIONAL {{ ?evenement ns:typeEvenement ?type . }}
         OPTIONAL {{ ?evenement ns:image ?image . }}
     }}
     """
-    return query_sparql(query)
+    response = query_sparql(query)
+    # Même ordre que l'index : inscriptions les plus récentes d'abord
+    position = {uri: i for i, uri in enumerate(uris)}
+    response["results"]["bindings"].sort(key=lambda r: position.get(r["evenement"]["value"], len(uris)))
+    return response
 
 
     
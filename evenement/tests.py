@@ -1,3 +1,122 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from trelix_app.utils import image_variants, rdflib_store, sparql_client
+
+from . import image_jobs, participations
+from .models import ImageJob, ParticipationSync
+
+NS = "http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#"
+ETUDIANT = "http://example.com/etudiant/ann"
+
+
+def _event(name):
+    return f"http://example.com/evenement/{name}"
+
+
+@override_settings(SPARQL_BACKEND="rdflib", SPARQL_RDFLIB_SOURCES=[])
+class ParticipationIndexTests(TestCase):
+    def setUp(self):
+        rdflib_store.close_all()
+        cache.clear()
+
+    def add_to_graph(self, evenement):
+        sparql_client.run_update(f"PREFIX ns: <{NS}> INSERT DATA {{ <{ETUDIANT}> ns:participer <{evenement}> . }}")
+
+    def test_graph_participations_are_loaded_once(self):
+        self.add_to_graph(_event("hackathon"))
+        self.assertTrue(participations.contains(ETUDIANT, _event("hackathon")))
+        self.assertTrue(ParticipationSync.objects.filter(etudiant_uri=ETUDIANT).exists())
+
+        # Ajout hors de l'application : pas relu tant que l'index n'est pas réinitialisé
+        self.add_to_graph(_event("atelier"))
+        with mock.patch.object(sparql_client, "run_select", side_effect=AssertionError("graph queried")):
+            self.assertFalse(participations.contains(ETUDIANT, _event("atelier")))
+        participations.reset(ETUDIANT)
+        self.assertTrue(participations.contains(ETUDIANT, _event("atelier")))
+
+    def test_recorded_participations_come_newest_first(self):
+        self.add_to_graph(_event("ancien"))
+        participations.evenement_uris(ETUDIANT)
+        for name in ("premier", "second"):
+            self.add_to_graph(_event(name))
+            participations.record(ETUDIANT, _event(name))
+        participations.record(ETUDIANT, _event("premier"))  # déjà inscrit : rien de plus
+        self.assertEqual(
+            participations.evenement_uris(ETUDIANT), [_event("second"), _event("premier"), _event("ancien")]
+        )
+
+    def test_other_students_are_untouched(self):
+        self.add_to_graph(_event("hackathon"))
+        self.assertEqual(participations.evenement_uris("http://example.com/etudiant/bob"), [])
+        self.assertTrue(participations.contains(ETUDIANT, _event("hackathon")))
+
+
+class ImageJobClaimTests(TestCase):
+    def create(self, job_id, status, age_seconds=0):
+        ImageJob.objects.create(job_id=job_id, title="T", event_type="Workshop", status=status)
+        ImageJob.objects.filter(job_id=job_id).update(updated_at=timezone.now() - timedelta(seconds=age_seconds))
+        return ImageJob.objects.get(job_id=job_id)
+
+    def test_pending_job_is_claimed_once(self):
+        self.create("a", ImageJob.PENDING)
+        self.assertTrue(image_jobs._claim("a"))
+        self.assertFalse(image_jobs._claim("a"))
+        self.assertEqual(ImageJob.objects.get(job_id="a").status, ImageJob.RUNNING)
+
+    def test_only_stale_running_jobs_are_taken_over(self):
+        self.create("fresh", ImageJob.RUNNING, age_seconds=10)
+        self.create("stale", ImageJob.RUNNING, age_seconds=3600)
+        self.create("done", ImageJob.DONE, age_seconds=3600)
+        self.assertFalse(image_jobs._claim("fresh"))
+        self.assertTrue(image_jobs._claim("stale"))
+        self.assertFalse(image_jobs._claim("done"))
+
+    def test_resume_if_stale_leaves_live_jobs_alone(self):
+        with mock.patch.object(image_jobs, "_pool") as pool:
+            self.assertFalse(image_jobs.resume_if_stale(self.create("fresh", ImageJob.PENDING)))
+            self.assertTrue(image_jobs.resume_if_stale(self.create("stale", ImageJob.PENDING, age_seconds=3600)))
+        pool.return_value.submit.assert_called_once_with(image_jobs._run, "stale")
+
+
+@override_settings(IMAGE_VARIANT_WIDTHS=[320, 640, 1024], IMAGE_VARIANT_AVIF=False)
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def srcset_widths(self, name, width):
+        Image.new("RGB", (width, 50), "red").save(os.path.join(settings.MEDIA_ROOT, name))
+        image_variants.generate(name)
+        row = image_variants.annotate([{"image": name}])[0]
+        return [int(entry.split()[-1][:-1]) for entry in row["image_srcset"].split(", ")]
+
+    def test_large_image_gets_every_configured_width(self):
+        self.assertEqual(self.srcset_widths("big.png", 2000), [320, 640, 1024])
+
+    def test_small_image_is_never_enlarged(self):
+        self.assertEqual(self.srcset_widths("small.png", 200), [200])
+        self.assertEqual(self.srcset_widths("mid.png", 500), [320, 500])
+
+    def test_replaced_image_drops_widths_it_no_longer_has(self):
+        self.srcset_widths("banner.png", 2000)
+        self.assertEqual(self.srcset_widths("banner.png", 400), [320, 400])
+
+    def test_missing_derivatives_fall_back_to_the_original(self):
+        with mock.patch.object(image_variants, "submit") as submit:
+            row = image_variants.annotate([{"image": "absent.png"}, {"image": ""}])
+        self.assertEqual(row[0]["image_src"], f"{settings.MEDIA_URL}absent.png")
+        self.assertEqual((row[0]["image_srcset"], row[1]["image_src"]), ("", ""))
+        submit.assert_not_called()  # fichier introuvable : rien à générer
@@ -14,6 +14,7 @@ urlpatterns = [
     path("detail/<str:uri>/", views.detail_evenement, name="detail_evenement"),  # Nouvelle route
     path("generate-description/", views.generate_description, name="generate_description"),  # Nouvelle route
     path("generate-image/", views.generate_image, name="generate_image"),
+    path("generate-image/<str:job_id>/", views.image_job_status, name="image_job_status"),
     path("participer/<str:uri>/", views.participer_evenement, name="participer_evenement"),
     path("mes-participations/", views.mes_participations, name="mes_participations"),
     path("semantic-search/", views.semantic_search, name="semantic_search"),  # NOUVELLE ROUTE
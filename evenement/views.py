@@ -1,14 +1,19 @@
 import uuid, urllib.parse, os
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.conf import settings
-from .sparql_client import insert_evenement, add_participation, check_participation, get_participations, get_evenements, update_evenement, delete_evenement, get_evenement_by_uri
+from trelix_app.utils import hedged_search, image_cache, image_variants, sparql_client, translation_cache
+from trelix_app.utils.pagination import apaginate, paginate
+from .sparql_client import insert_evenement, add_participation, check_participation, get_participations, get_evenements_page, aget_evenements_page, count_evenements, acount_evenements, update_evenement, delete_evenement, get_evenement_by_uri
 import google.generativeai as genai
 import json
 from django.http import JsonResponse
 import requests
 import io
 import time
-from PIL import Image, ImageDraw, ImageFilter
+from django.urls import reverse
+from . import image_jobs
+from .models import ImageJob
 from django.core.files import File
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
@@ -21,6 +26,33 @@ genai.configure(api_key=settings.GOOGLE_API_KEY)
 # RECHERCHE SÉMANTIQUE AVEC GOOGLE GEMINI
 # =============================================================================
 
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+# Prompt de traduction ({query} : requête en langage naturel)
+GEMINI_PROMPT = """
+        Tu es un expert SPARQL. Convertis cette requête en langage naturel en une requête SPARQL valide.
+        
+        Ontologie:
+        - Prefix: ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
+        - Classes: HackathonEvent, WorkshopEvent
+        - Propriétés: nomEvenement, description, lieu, dateDebut, dateFin, image
+        - Base URI: http://example.com/evenement/
+
+        Règles IMPORTANTES:
+        1. TOUJOURS sélectionner: ?evenement ?nomEvenement ?description ?lieu ?dateDebut ?dateFin ?image
+        2. Le champ ?evenement doit avoir l'URI complète
+        3. Utiliser FILTER avec regex pour la recherche texte
+        4. Réponds UNIQUEMENT avec la requête SPARQL complète, sans explications
+
+        Exemples:
+        - "événements qui commencent par M" → FILTER regex(?nomEvenement, "^M", "i")
+        - "hackathons à Paris" → FILTER regex(?lieu, "Paris", "i") && ?evenement a ex:HackathonEvent
+        - "workshops sur l'IA" → FILTER regex(?description, "IA", "i") && ?evenement a ex:WorkshopEvent
+        - "événements de ce mois" → FILTER (month(?dateDebut) = month(now()) && year(?dateDebut) = year(now()))
+
+        Requête à convertir: "{query}"
+        """
+
 @csrf_exempt
 def semantic_search(request):
     """Recherche sémantique avec Google Gemini"""
@@ -34,14 +66,13 @@ def semantic_search(request):
             
             print(f"🔍 Recherche sémantique: '{query}'")
             
-            # Générer une requête SPARQL avec Gemini
-            sparql_query = generate_semantic_sparql(query)
-            
-            if not sparql_query:
-                return JsonResponse({'error': 'Impossible de générer la requête'}, status=500)
-            
-            # Exécuter la requête SPARQL
-            results = execute_semantic_search(sparql_query)
+            # Requête générée par Gemini et requête fallback lancées en parallèle :
+            # Gemini l'emporte s'il répond dans le budget (trelix_app/utils/hedged_search.py)
+            results = hedged_search.run(
+                "evenement",
+                lambda: semantic_events(query),
+                lambda: execute_semantic_search(generate_fallback_sparql(query)),
+            )
             
             return JsonResponse({
                 'success': True,
@@ -56,49 +87,32 @@ def semantic_search(request):
     
     return JsonResponse({'error': 'Méthode non autorisée'}, status=400)
 
-def generate_semantic_sparql(natural_language_query):
-    """Génère une requête SPARQL avec Google Gemini"""
-    try:
+def semantic_events(natural_language_query):
+    """
+    Génère une requête SPARQL avec Google Gemini et l'exécute (seules les
+    traductions exécutées sans erreur sont mises en cache).
+    Les erreurs remontent : semantic_search répond alors avec generate_fallback_sparql.
+    """
+    def generate():
         print(f"🔗 Utilisation de Gemini pour: {natural_language_query}")
         
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        prompt = f"""
-        Tu es un expert SPARQL. Convertis cette requête en langage naturel en une requête SPARQL valide.
-        
-        Ontologie:
-        - Prefix: ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
-        - Classes: HackathonEvent, WorkshopEvent
-        - Propriétés: nomEvenement, description, lieu, dateDebut, dateFin, image
-        - Base URI: http://example.com/evenement/
-
-        Règles IMPORTANTES:
-        1. TOUJOURS sélectionner: ?evenement ?nomEvenement ?description ?lieu ?dateDebut ?dateFin ?image
-        2. Le champ ?evenement doit avoir l'URI complète
-        3. Utiliser FILTER avec regex pour la recherche texte
-        4. Réponds UNIQUEMENT avec la requête SPARQL complète, sans explications
-
-        Exemples:
-        - "événements qui commencent par M" → FILTER regex(?nomEvenement, "^M", "i")
-        - "hackathons à Paris" → FILTER regex(?lieu, "Paris", "i") && ?evenement a ex:HackathonEvent
-        - "workshops sur l'IA" → FILTER regex(?description, "IA", "i") && ?evenement a ex:WorkshopEvent
-        - "événements de ce mois" → FILTER (month(?dateDebut) = month(now()) && year(?dateDebut) = year(now()))
-
-        Requête à convertir: "{natural_language_query}"
-        """
-        
-        response = model.generate_content(prompt)
+        model = genai.GenerativeModel(GEMINI_MODEL)
+        response = model.generate_content(
+            GEMINI_PROMPT.format(query=natural_language_query),
+            request_options={"timeout": hedged_search.provider_timeout()},
+        )
         sparql_query = response.text.strip()
         
         # Nettoyer la réponse
-        sparql_query = sparql_query.replace('```sparql', '').replace('```', '').strip()
-        
+        return sparql_query.replace('```sparql', '').replace('```', '').strip()
+
+    def execute(sparql_query):
         print(f"📝 Requête SPARQL générée: {sparql_query}")
-        return sparql_query
-        
-    except Exception as e:
-        print(f"❌ Erreur Gemini: {str(e)}")
-        return generate_fallback_sparql(natural_language_query)
+        return execute_semantic_search(sparql_query, raise_errors=True)
+
+    return translation_cache.translate(
+        "evenement", natural_language_query, generate, execute, GEMINI_MODEL, GEMINI_PROMPT
+    )
 
 def generate_fallback_sparql(query):
     """Fallback intelligent sans IA - Version améliorée"""
@@ -215,18 +229,13 @@ def generate_fallback_sparql(query):
     print(f"📝 Requête fallback générée: {sparql_query}")
     return sparql_query
 
-def execute_semantic_search(sparql_query):
-    """Exécute la requête SPARQL et retourne les résultats"""
+def execute_semantic_search(sparql_query, raise_errors=False):
+    """Exécute la requête SPARQL et retourne les résultats ([] en cas d'erreur, sauf raise_errors)"""
     try:
-        from SPARQLWrapper import SPARQLWrapper, JSON
-        
-        sparql = SPARQLWrapper("http://localhost:3030/trelix/query")
-        sparql.setQuery(sparql_query)
-        sparql.setReturnFormat(JSON)
-        results = sparql.query().convert()
+        results = sparql_client.run_select(sparql_query)
         
         events = []
-        for r in results["results"]["bindings"]:
+        for r in results:
             event_uri = r["evenement"]["value"]
             event_id = event_uri.replace("http://example.com/evenement/", "")
             
@@ -242,10 +251,12 @@ def execute_semantic_search(sparql_query):
             events.append(event_data)
         
         print(f"✅ {len(events)} événements trouvés")
-        return events
+        return image_variants.annotate(events)
         
     except Exception as e:
         print(f"❌ Erreur exécution SPARQL: {str(e)}")
+        if raise_errors:
+            raise
         return []
 
 # =============================================================================
@@ -294,158 +305,12 @@ def mes_participations(request):
         "events": events
     })
 
-def generate_real_image(prompt):
-    """Génère une VRAIE image avec Flux API (GRATUIT)"""
-    try:
-        print(f"🚀 Génération d'image avec Flux: {prompt}")
-        
-        # API Flux - GRATUITE et fonctionnelle
-        API_URL = "https://flux1.aiwan.io/api/v1/generation/image-to-image"
-        
-        payload = {
-            "prompt": prompt,
-            "width": 512,
-            "height": 512,
-            "guidance_scale": 7.5,
-            "num_inference_steps": 20
-        }
-        
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        
-        print("📡 Envoi à Flux API...")
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=60)
-        
-        print(f"📥 Réponse: {response.status_code}")
-        
-        if response.status_code == 200:
-            data = response.json()
-            if "images" in data and len(data["images"]) > 0:
-                # L'API retourne une image en base64
-                import base64
-                image_data = data["images"][0]
-                if image_data.startswith('data:image'):
-                    image_data = image_data.split(',')[1]
-                image_bytes = base64.b64decode(image_data)
-                print("✅ Image générée avec succès!")
-                return image_bytes
-        else:
-            print(f"❌ Erreur Flux API: {response.status_code} - {response.text[:200]}")
-            
-    except Exception as e:
-        print(f"❌ Erreur Flux: {str(e)}")
-    
-    # Fallback: Essayer avec une autre API gratuite
-    return try_alternative_api(prompt)
-
-def try_alternative_api(prompt):
-    """Essaye une autre API gratuite"""
-    try:
-        print("🔄 Essai avec alternative API...")
-        
-        # API alternative gratuite
-        API_URL = "https://api-inference.banana.dev/run/black-forest-labs/FLUX-1-schnell"
-        
-        payload = {
-            "prompt": prompt,
-            "width": 512,
-            "height": 512
-        }
-        
-        response = requests.post(API_URL, json=payload, timeout=60)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if "image" in data:
-                import base64
-                image_bytes = base64.b64decode(data["image"])
-                print("✅ Alternative API fonctionne!")
-                return image_bytes
-                
-    except Exception as e:
-        print(f"❌ Alternative API échouée: {e}")
-    
-    return None
-
-def create_simple_image(title, event_type):
-    """Crée une image simple mais BELLE (pas juste du texte)"""
-    try:
-        import random
-        
-        width, height = 512, 512
-        
-        # Créer un dégradé de couleur
-        color1 = (random.randint(50, 200), random.randint(50, 200), random.randint(50, 200))
-        color2 = (random.randint(50, 200), random.randint(50, 200), random.randint(50, 200))
-        
-        # Créer un dégradé
-        image = Image.new('RGB', (width, height), color1)
-        draw = ImageDraw.Draw(image)
-        
-        for i in range(height):
-            ratio = i / height
-            r = int(color1[0] * (1 - ratio) + color2[0] * ratio)
-            g = int(color1[1] * (1 - ratio) + color2[1] * ratio)
-            b = int(color1[2] * (1 - ratio) + color2[2] * ratio)
-            draw.line([(0, i), (width, i)], fill=(r, g, b))
-        
-        # Ajouter des éléments graphiques
-        # Cercles décoratifs
-        for _ in range(5):
-            x = random.randint(50, width-50)
-            y = random.randint(50, height-50)
-            radius = random.randint(20, 80)
-            draw.ellipse([x-radius, y-radius, x+radius, y+radius], 
-                        fill=(255, 255, 255, 50), outline=(255, 255, 255, 100))
-        
-        # Ajouter du texte stylisé
-        try:
-            from PIL import ImageFont
-            # Essayer différentes polices
-            fonts = []
-            try:
-                fonts.append(ImageFont.truetype("arial.ttf", 36))
-                fonts.append(ImageFont.truetype("arialbd.ttf", 28))
-            except:
-                try:
-                    fonts.append(ImageFont.load_default())
-                except:
-                    pass
-            
-            if fonts:
-                # Titre principal
-                title_font = fonts[0]
-                bbox = draw.textbbox((0, 0), title, font=title_font)
-                text_width = bbox[2] - bbox[0]
-                x = (width - text_width) / 2
-                draw.text((x, 180), title, fill=(255, 255, 255), font=title_font)
-                
-                # Sous-titre
-                if len(fonts) > 1:
-                    subtitle_font = fonts[1]
-                    subtitle = f"{event_type} Event"
-                    bbox = draw.textbbox((0, 0), subtitle, font=subtitle_font)
-                    text_width = bbox[2] - bbox[0]
-                    x = (width - text_width) / 2
-                    draw.text((x, 230), subtitle, fill=(255, 255, 255, 180), font=subtitle_font)
-        
-        except Exception as e:
-            print(f"Note: Police non disponible - {e}")
-        
-        # Ajouter un effet de flou artistique
-        image = image.filter(ImageFilter.GaussianBlur(1))
-        
-        return image
-        
-    except Exception as e:
-        print(f"❌ Erreur création image: {e}")
-        return None
-
 @csrf_exempt
 def generate_image(request):
-    """Vue pour générer une image via AJAX"""
+    """
+    Vue AJAX : lance la génération en arrière-plan (evenement/image_jobs.py)
+    et renvoie tout de suite l'aperçu local et l'URL de suivi du job.
+    """
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
@@ -457,47 +322,8 @@ def generate_image(request):
 
             print(f"🎨 Génération d'image: '{title}' - Type: '{event_type}'")
 
-            # Prompt optimisé
-            prompt = f"professional {event_type} event banner titled '{title}', modern design, vibrant colors, high quality, attractive"
-            
-            # Essayer d'abord les APIs externes
-            image_bytes = generate_real_image(prompt)
-            
-            if image_bytes:
-                # ✅ Succès avec API externe
-                image = Image.open(io.BytesIO(image_bytes))
-                image_type = "api"
-            else:
-                # 🔄 Créer une image graphique locale
-                print("🔄 Création d'image graphique locale...")
-                image = create_simple_image(title, event_type)
-                image_type = "local"
-                if not image:
-                    return JsonResponse({
-                        'error': 'Impossible de générer une image. Veuillez uploader une image manuellement.'
-                    }, status=500)
-
-            # Sauvegarder l'image
-            safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            safe_title = safe_title.replace(' ', '_')[:30]
-            
-            if image_type == "api":
-                image_name = f"ai_generated_{safe_title}_{uuid.uuid4().hex[:8]}.jpg"
-            else:
-                image_name = f"graphic_{safe_title}_{uuid.uuid4().hex[:8]}.jpg"
-                
-            image_path = image_name
-            full_image_path = os.path.join(settings.MEDIA_ROOT, image_path)
-
-            image.save(full_image_path, format='JPEG', quality=90, optimize=True)
-            print(f"💾 Image sauvegardée: {image_path}")
-
-            return JsonResponse({
-                'success': True,
-                'image_url': f"{settings.MEDIA_URL}{image_path}",
-                'image_path': image_path,
-                'message': 'Image générée avec succès!'
-            })
+            job = image_jobs.submit(title, event_type)
+            return JsonResponse(_image_job_payload(job), status=202)
 
         except Exception as e:
             print(f"❌ Erreur génération image: {str(e)}")
@@ -505,6 +331,32 @@ def generate_image(request):
 
     return JsonResponse({'error': 'Méthode non autorisée'}, status=400)
 
+def image_job_status(request, job_id):
+    """État d'un job d'image (interrogé par le formulaire jusqu'à "done" ou "failed")."""
+    job = image_jobs.get_job(job_id)
+    if job is None:
+        return JsonResponse({'error': 'Job introuvable'}, status=404)
+    # Processus arrêté pendant le job : il repart ici plutôt qu'au prochain submit
+    image_jobs.resume_if_stale(job)
+    return JsonResponse(_image_job_payload(job))
+
+def _image_job_payload(job):
+    # Tant que le job tourne, image_path est l'aperçu local
+    image_path = job.image_path or job.placeholder_path
+    payload = {
+        'success': job.status != ImageJob.FAILED,
+        'job_id': job.job_id,
+        'status': job.status,
+        'stage': job.stage,
+        'source': job.source,
+        'status_url': reverse('evenement:image_job_status', args=[job.job_id]),
+        'image_path': image_path,
+        'image_url': f"{settings.MEDIA_URL}{image_path}" if image_path else '',
+    }
+    if job.status == ImageJob.FAILED:
+        payload['error'] = job.error
+    return payload
+
 def ai_generate_description(title, event_type):
     """Génère une description d'événement"""
     try:
@@ -552,20 +404,30 @@ def generate_uri(nomEvenement):
     return f"{safe}{uuid.uuid4().hex[:8]}"
 
 def evenement_list(request):
-    evenements = get_evenements()
+    evenements = paginate(request, get_evenements_page, count_evenements)
+    image_variants.annotate(evenements.object_list)
+    return render(request, "evenement/list.html", {"evenements": evenements})
+
+async def aevenement_list(request):
+    """evenement_list() sous ASGI (trelix_app/urls_asgi.py)."""
+    evenements = await apaginate(request, aget_evenements_page, acount_evenements)
+    # Lit les dérivés sur disque et peut lancer leur génération : hors de la boucle
+    await sync_to_async(image_variants.annotate)(evenements.object_list)
     return render(request, "evenement/list.html", {"evenements": evenements})
 
 def evenement_listadmin(request):
-    evenements = get_evenements()
+    evenements = paginate(request, get_evenements_page, count_evenements)
+    image_variants.annotate(evenements.object_list)
     return render(request, "evenement/listadmin.html", {"evenements": evenements})
 
 def detail_evenement(request, uri):
-    evenement = get_evenement_by_uri(uri)
     deja_participe = False
     if request.session.get('user_uri'):
         etudiant_uri = request.session['user_uri']
         evenement_full_uri = f"http://example.com/evenement/{uri}"
+        # Index local : pas de requête au graphe pour le badge
         deja_participe = check_participation(etudiant_uri, evenement_full_uri)
+    evenement = get_evenement_by_uri(uri)
 
     context = {
         'evenement': evenement,
@@ -600,11 +462,14 @@ def evenement_create(request):
                     for chunk in image_file.chunks():
                         dest.write(chunk)
                 image_path = image_file.name
+                # Miniatures WebP pour les listes, en arrière-plan
+                image_variants.submit(image_path, force=True)
                 print(f"✅ Image uploadée: {image_path}")
                     
             elif generated_image_path:
-                # Image générée par IA
+                # Image générée par IA (épinglée une fois l'événement enregistré)
                 image_path = generated_image_path
+                image_variants.submit(image_path)
                 print(f"✅ Utilisation image générée: {image_path}")
             else:
                 print("⚠️ Aucune image fournie")
@@ -619,6 +484,9 @@ def evenement_create(request):
             print(f"  Image: {image_path}")
             
             insert_evenement(uri, typeEvenementClass, nomEvenement, description, lieu, dateDebut, dateFin, image_path)
+            if generated_image_path and not image_file:
+                # Jamais évincée tant que l'événement y renvoie
+                image_cache.pin(image_path)
 
             print(f"✅ Événement créé: {nomEvenement}")
             return redirect("evenement:evenement_list")
@@ -631,8 +499,7 @@ def evenement_create(request):
 
 def evenement_update(request):
     uri = urllib.parse.unquote(request.GET.get("uri", ""))
-    evenements = get_evenements()
-    evenement = next((e for e in evenements if e["uri"] == uri), None)
+    evenement = get_evenement_by_uri(uri)
     if not evenement:
         return redirect("evenement:evenement_list")
 
@@ -648,7 +515,7 @@ def evenement_update(request):
 
         image_file = request.FILES.get("image")
         generated_image_path = request.POST.get("generated_image_path", "")
-        image_path = evenement["image"]
+        old_image_path = image_path = evenement["image"]
 
         if image_file:
             save_path = os.path.join(settings.MEDIA_ROOT, image_file.name)
@@ -656,10 +523,17 @@ def evenement_update(request):
                 for chunk in image_file.chunks():
                     dest.write(chunk)
             image_path = image_file.name
+            image_variants.submit(image_path, force=True)
         elif generated_image_path:
             image_path = generated_image_path
+            image_variants.submit(image_path)
 
         update_evenement(uri, typeEvenementClass, nomEvenement, description, lieu, dateDebut, dateFin, image_path)
+        if image_path != old_image_path:
+            # Une épingle par événement : l'ancienne bannière peut être évincée
+            if generated_image_path and not image_file:
+                image_cache.pin(image_path)
+            image_cache.unpin(old_image_path)
 
         return redirect("evenement:evenement_list")
 
@@ -669,5 +543,8 @@ def evenement_delete(request):
     uri = request.GET.get("uri")
     if uri:
         uri = urllib.parse.unquote(uri)
+        evenement = get_evenement_by_uri(uri)
         delete_evenement(uri)
+        if evenement:
+            image_cache.unpin(evenement["image"])
     return redirect("evenement:evenement_list")
\ No newline at end of file
@@ -1,8 +1,9 @@
 from django.shortcuts import render, redirect
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from trelix_app.utils.sparql_client import run_select, run_update
+from trelix_app.utils.sparql_client import arun_select, run_parallel, run_select, run_update
 from datetime import datetime
+import asyncio
 import json
 import uuid
 from django.views.decorators.csrf import csrf_exempt
@@ -24,27 +25,60 @@ client = OpenAI(
 )
 EX = "http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#"
 
+GOALS_QUERY = f"""
+PREFIX ex: <{EX}>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+SELECT ?goal ?id ?title ?description ?date ?color ?completed
+WHERE {{
+  ?goal a ex:Goal .
+  OPTIONAL {{ ?goal ex:goalId ?id . }}
+  OPTIONAL {{ ?goal ex:goalTitle ?title . }}
+  OPTIONAL {{ ?goal ex:goalDescription ?description . }}
+  OPTIONAL {{ ?goal ex:goalDate ?date . }}
+  OPTIONAL {{ ?goal ex:goalColor ?color . }}
+  OPTIONAL {{ ?goal ex:goalCompleted ?completed . }}
+}}
+ORDER BY ?date
+"""
+
+EVENTS_QUERY = f"""
+PREFIX ex: <{EX}>
+SELECT ?event ?title ?type ?date ?description ?url
+WHERE {{
+  ?event a ex:Event .
+  OPTIONAL {{ ?event ex:eventTitle ?title . }}
+  OPTIONAL {{ ?event ex:eventType ?type . }}
+  OPTIONAL {{ ?event ex:eventDate ?date . }}
+  OPTIONAL {{ ?event ex:eventDescription ?description . }}
+  OPTIONAL {{ ?event ex:eventUrl ?url . }}
+}}
+ORDER BY ?date
+"""
+
+
 def goal_list(request):
-    try:
-        goals_query = f"""
-        PREFIX ex: <{EX}>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        SELECT ?goal ?id ?title ?description ?date ?color ?completed
-        WHERE {{
-          ?goal a ex:Goal .
-          OPTIONAL {{ ?goal ex:goalId ?id . }}
-          OPTIONAL {{ ?goal ex:goalTitle ?title . }}
-          OPTIONAL {{ ?goal ex:goalDescription ?description . }}
-          OPTIONAL {{ ?goal ex:goalDate ?date . }}
-          OPTIONAL {{ ?goal ex:goalColor ?color . }}
-          OPTIONAL {{ ?goal ex:goalCompleted ?completed . }}
-        }}
-        ORDER BY ?date
-        """
-        goals_results = run_select(goals_query)
-    except Exception as e:
-        print(f"[v0] SPARQL goals query error: {e}")
+    # Goals and events are independent: fetch them concurrently
+    goals_results, events_results = run_parallel(
+        lambda: run_select(GOALS_QUERY), lambda: run_select(EVENTS_QUERY), return_exceptions=True
+    )
+    return _render_goal_list(request, goals_results, events_results)
+
+
+async def agoal_list(request):
+    """goal_list() for ASGI (see trelix_app/urls_asgi.py)."""
+    goals_results, events_results = await asyncio.gather(
+        arun_select(GOALS_QUERY), arun_select(EVENTS_QUERY), return_exceptions=True
+    )
+    return _render_goal_list(request, goals_results, events_results)
+
+
+def _render_goal_list(request, goals_results, events_results):
+    if isinstance(goals_results, Exception):
+        print(f"[v0] SPARQL goals query error: {goals_results}")
         goals_results = []
+    if isinstance(events_results, Exception):
+        print(f"[v0] SPARQL events query error: {events_results}")
+        events_results = []
     
     goals = []
     for r in goals_results:
@@ -63,26 +97,6 @@ def goal_list(request):
             print(f"[v0] Error processing goal: {e}")
             continue
     
-    # Fetch events
-    try:
-        events_query = f"""
-        PREFIX ex: <{EX}>
-        SELECT ?event ?title ?type ?date ?description ?url
-        WHERE {{
-          ?event a ex:Event .
-          OPTIONAL {{ ?event ex:eventTitle ?title . }}
-          OPTIONAL {{ ?event ex:eventType ?type . }}
-          OPTIONAL {{ ?event ex:eventDate ?date . }}
-          OPTIONAL {{ ?event ex:eventDescription ?description . }}
-          OPTIONAL {{ ?event ex:eventUrl ?url . }}
-        }}
-        ORDER BY ?date
-        """
-        events_results = run_select(events_query)
-    except Exception as e:
-        print(f"[v0] SPARQL events query error: {e}")
-        events_results = []
-    
     events = []
     for r in events_results:
         try:
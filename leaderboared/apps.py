@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class LeaderboaredConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'leaderboared'
+
+    def ready(self):
+        # Flush submissions left queued by a previous run without waiting for a new one;
+        # on the first request rather than here, so management commands start no thread
+        from django.core.signals import request_started
+
+        from .submission_queue import start_on_first_request
+        request_started.connect(start_on_first_request, dispatch_uid='leaderboared.submission_queue')
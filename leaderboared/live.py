@@ -0,0 +1,339 @@
+# leaderboared/live.py
+"""
+In-memory hub behind the live quiz leaderboard (Server-Sent Events).
+
+Every quiz being watched has one Ranking per process: its top
+LIVE_LEADERBOARD_SIZE entries, loaded once from the leaderboard store when
+the first viewer connects. A new score is placed with a binary search and,
+if it makes the top, every viewer of that quiz gets one "insert" event
+carrying its rank; viewers shift the rows below it themselves. Viewers never
+cause a Fuseki or database query of their own.
+
+Scores reach the rankings two ways. quiz_submit calls publish(), which
+pushes at once to the viewers of the same process. A poller thread per
+process also reads, every LIVE_POLL_SECONDS, the LeaderboardEntry rows
+added since its last read (one indexed query for all watched quizzes), so
+the viewers of every other worker see the score too; an entry already
+placed is not inserted twice. Every LIVE_RESYNC_SECONDS the watched rankings
+are reloaded from the store and viewers get a fresh "snapshot" event, which
+also carries deletions and rebuilds.
+
+Under ASGI (trelix_app/urls_asgi.py) a viewer is an AsyncSubscriber waiting
+on the event loop, so there is no limit on open streams. Under WSGI each
+stream holds a worker thread: it ends after LIVE_STREAM_MAX_SECONDS
+(EventSource reconnects and gets a fresh snapshot), and a process serves at
+most LIVE_MAX_STREAMS at once; beyond that the viewer gets a 503 and the
+page falls back to reloading itself.
+"""
+import asyncio
+import bisect
+import queue
+import itertools
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import store
+
+_rankings = {}
+_lock = threading.Lock()
+_seq = itertools.count()
+_streams = threading.BoundedSemaphore(getattr(settings, "LIVE_MAX_STREAMS", 8))
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def live_size():
+    return getattr(settings, "LIVE_LEADERBOARD_SIZE", 50)
+
+
+def _row(player, score, total):
+    return {
+        'player': player,
+        'score': score,
+        'total': total,
+        'percent': round((score / total) * 100) if total > 0 else 0,
+    }
+
+
+class Ranking:
+    """Top entries of one quiz, best first, plus the viewers subscribed to it."""
+
+    def __init__(self, entries, cursor=0):
+        # Sort keys are (-score, arrival order): equal scores keep arrival order
+        self.keys = []
+        self.rows = []
+        # Entries already placed, so a submission seen both by the load and
+        # by publish() or the poller is not inserted a second time
+        self.seen = set()
+        for e in entries:
+            self.keys.append((-e.score, next(_seq)))
+            self.rows.append(_row(e.player_name, e.score, e.total))
+            self.seen.add(e.entry_id)
+        # Last LeaderboardEntry id read before the load: the poller applies those after it
+        self.cursor = cursor
+        self.subscribers = set()
+
+    def insert(self, entry_id, row):
+        """Place ``row``; return its 1-based rank, or None if it misses the top."""
+        if entry_id in self.seen:
+            return None
+        self.seen.add(entry_id)
+        key = (-row['score'], next(_seq))
+        position = bisect.bisect_right(self.keys, key)
+        if position >= live_size():
+            return None
+        self.keys.insert(position, key)
+        self.rows.insert(position, row)
+        del self.keys[live_size():]
+        del self.rows[live_size():]
+        return position + 1
+
+    def snapshot(self):
+        return json.dumps({
+            'type': 'snapshot',
+            'entries': [dict(row, rank=rank) for rank, row in enumerate(self.rows, start=1)],
+        })
+
+
+class Subscriber:
+    """Events of one viewer served by a thread (WSGI): ``(event, data)`` pairs."""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=getattr(settings, "LIVE_SUBSCRIBER_BUFFER", 100))
+        self.closed = False
+
+    def push(self, message):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            # Too slow to keep up: end the stream, EventSource reconnects and
+            # starts again from a fresh snapshot
+            self.end()
+
+    def end(self):
+        self.closed = True
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.queue.put_nowait(None)
+
+    def get(self, timeout):
+        """Next message; None once the stream must end, "" after ``timeout`` seconds without one."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return ""
+
+
+class AsyncSubscriber(Subscriber):
+    """Viewer waiting on an event loop (ASGI); fed from any thread.
+
+    Create it on the loop that serves the stream. publish(), the poller and
+    forget() run in threads, so they hand each message to the loop.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=getattr(settings, "LIVE_SUBSCRIBER_BUFFER", 100))
+        self.closed = False
+
+    def _call(self, callback, *args):
+        try:
+            self.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # Loop already closed: the stream is gone
+            self.closed = True
+
+    def push(self, message):
+        if not self.closed:
+            self._call(self._push, message)
+
+    def _push(self, message):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.closed = True
+            self._finish()
+
+    def end(self):
+        self.closed = True
+        self._call(self._finish)
+
+    def _finish(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return ""
+
+
+def acquire_stream():
+    """Reserve one of the process's LIVE_MAX_STREAMS stream slots (WSGI); False when all are taken."""
+    return _streams.acquire(blocking=False)
+
+
+def release_stream():
+    _streams.release()
+
+
+def _read(quiz_id):
+    # Cursor first: an entry recorded during the load is applied by the
+    # poller, or skipped there if the load already has it
+    cursor = store.last_entry_id()
+    return Ranking(store.top(quiz_id, limit=live_size()), cursor)
+
+
+def _load(quiz_id):
+    with _lock:
+        ranking = _rankings.get(quiz_id)
+    if ranking is None:
+        loaded = _read(quiz_id)
+        with _lock:
+            ranking = _rankings.setdefault(quiz_id, loaded)
+    return ranking
+
+
+def subscribe(quiz_id, subscriber=None):
+    """Register a viewer (a new Subscriber unless given); return (subscriber, snapshot data)."""
+    _ensure_poller()
+    ranking = _load(quiz_id)
+    subscriber = subscriber or Subscriber()
+    with _lock:
+        # The last viewer may have left (and dropped the ranking) meanwhile
+        ranking = _rankings.setdefault(quiz_id, ranking)
+        ranking.subscribers.add(subscriber)
+        snapshot = ranking.snapshot()
+    return subscriber, snapshot
+
+
+def unsubscribe(quiz_id, subscriber):
+    subscriber.closed = True
+    with _lock:
+        ranking = _rankings.get(quiz_id)
+        if ranking is None:
+            return
+        ranking.subscribers.discard(subscriber)
+        if not ranking.subscribers:
+            # Nobody watching: drop the ranking, the next viewer reloads it
+            del _rankings[quiz_id]
+
+
+def _place(quiz_id, entry_id, player, score, total):
+    """Insert a score in the ranking of ``quiz_id``; return (subscribers, message) to push, or None."""
+    ranking = _rankings.get(quiz_id)
+    if ranking is None:
+        return None
+    row = _row(player, score, total)
+    rank = ranking.insert(entry_id, row)
+    if rank is None:
+        return None
+    return list(ranking.subscribers), ('insert', json.dumps({'type': 'insert', 'rank': rank, 'entry': row}))
+
+
+def _push(pushes):
+    for subscribers, message in pushes:
+        for subscriber in subscribers:
+            subscriber.push(message)
+
+
+def publish(quiz_id, entry_id, player, score, total):
+    """Push a new score to the viewers of ``quiz_id`` in this process; no-op when nobody watches."""
+    with _lock:
+        placed = _place(quiz_id, entry_id, player, score, total)
+    if placed:
+        _push([placed])
+
+
+def poll(batch_size=500):
+    """Apply the entries any process recorded since the last poll; return how many were read."""
+    with _lock:
+        cursors = {quiz_id: ranking.cursor for quiz_id, ranking in _rankings.items()}
+    if not cursors:
+        return 0
+    entries = store.entries_since(min(cursors.values()), list(cursors), batch_size)
+    if not entries:
+        return 0
+    pushes = []
+    with _lock:
+        for e in entries:
+            ranking = _rankings.get(e.quiz_id)
+            if ranking is not None and e.id > ranking.cursor:
+                placed = _place(e.quiz_id, e.entry_id, e.player_name, e.score, e.total)
+                if placed:
+                    pushes.append(placed)
+        # Every entry of these quizzes up to the last id read has been seen
+        for quiz_id in cursors:
+            ranking = _rankings.get(quiz_id)
+            if ranking is not None:
+                ranking.cursor = max(ranking.cursor, entries[-1].id)
+    _push(pushes)
+    return len(entries)
+
+
+def resync():
+    """Reload every watched ranking from the store and send its viewers a fresh snapshot."""
+    with _lock:
+        quiz_ids = list(_rankings)
+    for quiz_id in quiz_ids:
+        fresh = _read(quiz_id)
+        with _lock:
+            ranking = _rankings.get(quiz_id)
+            if ranking is None:
+                continue
+            fresh.subscribers = ranking.subscribers
+            _rankings[quiz_id] = fresh
+            subscribers = list(fresh.subscribers)
+            snapshot = fresh.snapshot()
+        _push([(subscribers, ('snapshot', snapshot))])
+
+
+def _run():
+    interval = getattr(settings, "LIVE_POLL_SECONDS", 1.0)
+    resync_every = getattr(settings, "LIVE_RESYNC_SECONDS", 60)
+    last_resync = time.monotonic()
+    while True:
+        time.sleep(interval)
+        try:
+            if time.monotonic() - last_resync >= resync_every:
+                last_resync = time.monotonic()
+                resync()
+            else:
+                poll()
+        except Exception as e:
+            print(f"Live leaderboard poll failed, will retry: {e}")
+        finally:
+            close_old_connections()
+
+
+def _ensure_poller():
+    global _poller
+    if _poller is not None and _poller.is_alive():
+        return
+    with _poller_lock:
+        if _poller is None or not _poller.is_alive():
+            _poller = threading.Thread(target=_run, name="live-leaderboard", daemon=True)
+            _poller.start()
+
+
+def forget(quiz_id):
+    """Drop the ranking of a deleted quiz and end its streams."""
+    with _lock:
+        ranking = _rankings.pop(quiz_id, None)
+    if ranking is None:
+        return
+    for subscriber in list(ranking.subscribers):
+        subscriber.end()
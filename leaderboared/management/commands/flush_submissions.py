@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from leaderboared import submission_queue
+
+
+class Command(BaseCommand):
+    help = "Send every queued quiz submission to Fuseki"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Submissions per INSERT DATA (default: SUBMISSION_FLUSH_BATCH_SIZE)")
+
+    def handle(self, *args, **options):
+        try:
+            written = submission_queue.flush_all(options['batch_size'])
+        except Exception as e:
+            raise CommandError(f"Flush failed, {submission_queue.pending_count()} submissions still queued: {e}")
+        self.stdout.write(self.style.SUCCESS(f"{written} submissions written to Fuseki"))
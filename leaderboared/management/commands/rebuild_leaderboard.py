@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from leaderboared import store
+
+
+class Command(BaseCommand):
+    help = "Rebuild the local leaderboard store from the QCM_Leaderboard entries in Fuseki"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Entries fetched per SPARQL request")
+
+    def handle(self, *args, **options):
+        count = store.rebuild_from_fuseki(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Leaderboard rebuilt: {count} entries"))
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_id', models.CharField(max_length=64, unique=True)),
+                ('quiz_id', models.CharField(max_length=64)),
+                ('quiz_title', models.CharField(blank=True, max_length=255)),
+                ('player_name', models.CharField(max_length=255)),
+                ('score', models.IntegerField()),
+                ('total', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['quiz_id', '-score'], name='lb_entry_quiz_score'), models.Index(fields=['-score'], name='lb_entry_score')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScoreCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quiz_id', models.CharField(blank=True, max_length=64)),
+                ('score', models.IntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('quiz_id', 'score'), name='lb_score_count_unique')],
+            },
+        ),
+    ]
@@ -1,3 +1,68 @@
 from django.db import models
 
-# Create your models here.
+
+class LeaderboardEntry(models.Model):
+    """Local copy of one ex:QCM_Leaderboard entry, kept sorted by the indexes.
+
+    Fuseki stays the source of truth; leaderboared.store keeps this table in
+    step with quiz_submit, loads it on first use and `manage.py
+    rebuild_leaderboard` rebuilds it.
+    """
+    entry_id = models.CharField(max_length=64, unique=True)
+    quiz_id = models.CharField(max_length=64)
+    quiz_title = models.CharField(max_length=255, blank=True)
+    player_name = models.CharField(max_length=255)
+    score = models.IntegerField()
+    total = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['quiz_id', '-score'], name='lb_entry_quiz_score'),
+            models.Index(fields=['-score'], name='lb_entry_score'),
+        ]
+
+    def __str__(self):
+        return f"{self.player_name} - {self.score}"
+
+
+class ScoreCount(models.Model):
+    """Number of entries per (quiz, score); quiz_id "" holds the global counts.
+
+    Ranks and percentiles are sums over this table, so they cost one row per
+    distinct score rather than one per entry.
+    """
+    quiz_id = models.CharField(max_length=64, blank=True)
+    score = models.IntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['quiz_id', 'score'], name='lb_score_count_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.quiz_id or 'global'}: {self.score} x{self.count}"
+
+
+class PendingSubmission(models.Model):
+    """A quiz result accepted by quiz_submit but not yet written to Fuseki.
+
+    leaderboared.submission_queue flushes these in batches and deletes them
+    once Fuseki has them; until then the leaderboards already show them
+    through LeaderboardEntry.
+    """
+    entry_id = models.CharField(max_length=64, unique=True)
+    quiz_id = models.CharField(max_length=64)
+    player_name = models.CharField(max_length=255)
+    score = models.IntegerField()
+    total = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.player_name} - {self.quiz_id} ({self.attempts} attempts)"
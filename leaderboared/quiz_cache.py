@@ -0,0 +1,154 @@
+# leaderboared/quiz_cache.py
+"""
+Compiled, read-only quizzes for quiz_take and quiz_submit.
+
+A quiz is fetched from Fuseki once, compiled into a CompiledQuiz (title,
+questions, choices and answer key) and kept in a per-process LRU, so a class
+taking the same quiz at once costs one join instead of one per page load and
+submission.
+
+Each quiz has a version number in the Django cache (SPARQL_CACHE_ALIAS);
+invalidate() bumps it, and update_quiz and delete_quiz call it. With a
+shared cache backend (Redis, Memcached) every process recompiles on its next
+read; with the default per-process LocMemCache only the process that made
+the change does, and the others notice when their copy is QUIZ_CACHE_TTL
+seconds old. Quiz submissions do not bump the version, unlike the
+dataset-wide one used by sparql_cache, so grading stays cached while results
+are being written.
+
+An unknown quiz id (no title, no questions) is never cached: the quiz may be
+created a moment later.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from trelix_app.utils import sparql_client
+
+EX = "http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#"
+
+_compiled = OrderedDict()
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Choice:
+    text: str
+    is_correct: bool
+
+
+@dataclass(frozen=True)
+class Question:
+    id: str
+    text: str
+    choices: Tuple[Choice, ...]
+
+
+@dataclass(frozen=True)
+class CompiledQuiz:
+    quiz_id: str
+    title: str
+    questions: Tuple[Question, ...]
+    # question id -> text of its correct choice (None when none is marked)
+    answer_key: Mapping[str, Optional[str]]
+
+    @property
+    def total(self):
+        return len(self.questions)
+
+    def grade(self, answers):
+        """Score a submission; ``answers`` maps question id -> chosen text."""
+        return sum(1 for qid, correct in self.answer_key.items() if answers.get(qid) == correct)
+
+
+def _cache():
+    return caches[getattr(settings, "SPARQL_CACHE_ALIAS", "default")]
+
+
+def _version_key(quiz_id):
+    return f"quiz:version:{quiz_id}"
+
+
+def _version(quiz_id):
+    cache = _cache()
+    version = cache.get(_version_key(quiz_id))
+    if version is None:
+        cache.add(_version_key(quiz_id), int(time.time() * 1000), None)
+        version = cache.get(_version_key(quiz_id))
+    return version
+
+
+def invalidate(quiz_id):
+    cache = _cache()
+    try:
+        cache.incr(_version_key(quiz_id))
+    except ValueError:
+        cache.add(_version_key(quiz_id), int(time.time() * 1000), None)
+        cache.incr(_version_key(quiz_id))
+    with _lock:
+        _compiled.pop(quiz_id, None)
+
+
+def compile_quiz(quiz_id):
+    results = sparql_client.run_select(f"""
+    PREFIX ex: <{EX}>
+    SELECT ?title ?question ?text ?choiceText ?isCorrect WHERE {{
+        OPTIONAL {{ <{EX}{quiz_id}> ex:quizTitle ?title }}
+        OPTIONAL {{
+            <{EX}{quiz_id}> ex:hasQuestion ?question .
+            ?question ex:questionText ?text ; ex:hasChoice ?choice .
+            ?choice ex:choiceText ?choiceText ; ex:isCorrect ?isCorrect .
+        }}
+    }}
+    """)
+    title = ''
+    texts = {}
+    choices = {}
+    answer_key = {}
+    for r in results:
+        if 'title' in r:
+            title = r['title']['value']
+        if 'question' not in r:
+            continue
+        qid = r['question']['value'].split('#')[-1]
+        if qid not in texts:
+            texts[qid] = r['text']['value']
+            choices[qid] = []
+            answer_key[qid] = None
+        is_correct = r['isCorrect']['value'] == 'true'
+        choices[qid].append(Choice(r['choiceText']['value'], is_correct))
+        if is_correct:
+            answer_key[qid] = r['choiceText']['value']
+    return CompiledQuiz(
+        quiz_id=quiz_id,
+        title=title,
+        questions=tuple(Question(qid, texts[qid], tuple(choices[qid])) for qid in texts),
+        answer_key=MappingProxyType(answer_key),
+    )
+
+
+def get_quiz(quiz_id):
+    """Compiled quiz, from the local LRU unless its version has moved on or it expired."""
+    version = _version(quiz_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _compiled.get(quiz_id)
+        if entry is not None and entry[0] == version and entry[2] > now:
+            _compiled.move_to_end(quiz_id)
+            return entry[1]
+
+    quiz = compile_quiz(quiz_id)
+    if not quiz.title and not quiz.questions:
+        return quiz
+    with _lock:
+        _compiled[quiz_id] = (version, quiz, now + getattr(settings, "QUIZ_CACHE_TTL", 300))
+        _compiled.move_to_end(quiz_id)
+        while len(_compiled) > getattr(settings, "QUIZ_CACHE_MAX_ENTRIES", 256):
+            _compiled.popitem(last=False)
+    return quiz
@@ -0,0 +1,201 @@
+# leaderboared/quiz_import.py
+"""
+Build whole quiz graphs as INSERT DATA payloads.
+
+A quiz is a dict {"title": str, "questions": [{"text": str, "choices":
+[{"text": str, "isCorrect": bool}]}]}. quiz_create sends one quiz as a single
+update (one request, applied atomically by Fuseki); the bulk import sends many
+quizzes, QUIZ_IMPORT_BATCH_SIZE per update. CSV and JSON Lines uploads are
+read as they go, one quiz at a time; a plain JSON document is parsed whole
+first, so use JSON Lines for large imports.
+"""
+import csv
+import io
+import json
+import re
+import uuid
+
+from django.conf import settings
+
+from trelix_app.utils import sparql_client
+
+EX = "http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#"
+
+_QUESTION_FIELD = re.compile(r"^questions\[(\d+)\]\[text\]$")
+_TRUE_VALUES = {"1", "true", "yes", "on", "vrai", "oui"}
+
+
+def _iri(id_str):
+    return f"<{EX}{id_str}>"
+
+
+def literal(text):
+    """Quote ``text`` as a SPARQL string literal."""
+    escaped = (
+        str(text)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+    return f'"{escaped}"'
+
+
+def _is_true(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in _TRUE_VALUES
+
+
+def quiz_from_form(post):
+    """Read the quiz_create form: any number of questions, any number of choices."""
+    questions = []
+    indexes = sorted(int(m.group(1)) for m in map(_QUESTION_FIELD.match, post.keys()) if m)
+    for q in indexes:
+        text = post.get(f"questions[{q}][text]", "").strip()
+        if not text:
+            continue
+        choice_field = re.compile(rf"^questions\[{q}\]\[choices\]\[(\d+)\]\[text\]$")
+        choices = []
+        for c in sorted(int(m.group(1)) for m in map(choice_field.match, post.keys()) if m):
+            c_text = post.get(f"questions[{q}][choices][{c}][text]", "").strip()
+            if c_text:
+                choices.append({
+                    "text": c_text,
+                    "isCorrect": post.get(f"questions[{q}][choices][{c}][isCorrect]") == "on",
+                })
+        questions.append({"text": text, "choices": choices})
+    return {"title": post.get("quizTitle", "").strip(), "questions": questions}
+
+
+def quiz_triples(quiz, quiz_id=None):
+    """Return (quiz_id, triples) describing the whole quiz graph."""
+    quiz_id = quiz_id or str(uuid.uuid4())
+    quiz_iri = _iri(quiz_id)
+    lines = [f"{quiz_iri} a ex:Quiz ; ex:quizTitle {literal(quiz['title'])} ."]
+    for question in quiz.get("questions", []):
+        q_iri = _iri(uuid.uuid4())
+        lines.append(f"{q_iri} a ex:Question ; ex:questionText {literal(question['text'])} .")
+        lines.append(f"{quiz_iri} ex:hasQuestion {q_iri} .")
+        for choice in question.get("choices", []):
+            c_iri = _iri(uuid.uuid4())
+            correct = "true" if _is_true(choice.get("isCorrect", False)) else "false"
+            lines.append(
+                f"{c_iri} a ex:Choice ; ex:choiceText {literal(choice['text'])} ; ex:isCorrect {correct} ."
+            )
+            lines.append(f"{q_iri} ex:hasChoice {c_iri} .")
+    return quiz_id, "\n".join(lines)
+
+
+def insert_data(triples):
+    return f"PREFIX ex: <{EX}>\nINSERT DATA {{\n{triples}\n}}"
+
+
+def create_quiz(quiz):
+    """Write one quiz in a single update and return its id."""
+    quiz_id, triples = quiz_triples(quiz)
+    sparql_client.run_update(insert_data(triples))
+    return quiz_id
+
+
+def import_quizzes(quizzes, batch_size=None):
+    """Send ``quizzes`` (any iterable) to Fuseki, ``batch_size`` quizzes per update.
+
+    Returns {"imported", "batches", "quiz_ids", "errors"}; a failed batch is
+    reported in "errors" and the import goes on with the next one.
+    """
+    batch_size = batch_size or getattr(settings, "QUIZ_IMPORT_BATCH_SIZE", 50)
+    report = {"imported": 0, "batches": 0, "quiz_ids": [], "errors": []}
+    batch_ids, batch_triples = [], []
+
+    def flush():
+        report["batches"] += 1
+        try:
+            sparql_client.run_update(insert_data("\n".join(batch_triples)))
+            report["imported"] += len(batch_ids)
+            report["quiz_ids"].extend(batch_ids)
+        except Exception as e:
+            report["errors"].append(f"batch {report['batches']}: {e}")
+        batch_ids.clear()
+        batch_triples.clear()
+
+    for quiz in quizzes:
+        if not quiz.get("title"):
+            report["errors"].append("quiz without title skipped")
+            continue
+        quiz_id, triples = quiz_triples(quiz)
+        batch_ids.append(quiz_id)
+        batch_triples.append(triples)
+        if len(batch_ids) >= batch_size:
+            flush()
+    if batch_ids:
+        flush()
+    return report
+
+
+def _quiz_from_dict(quiz):
+    return {
+        "title": str(quiz.get("title", "")).strip(),
+        "questions": [
+            {
+                "text": str(q.get("text", "")).strip(),
+                "choices": [
+                    {"text": str(c.get("text", "")).strip(), "isCorrect": c.get("isCorrect", False)}
+                    for c in q.get("choices", []) if str(c.get("text", "")).strip()
+                ],
+            }
+            for q in quiz.get("questions", []) if str(q.get("text", "")).strip()
+        ],
+    }
+
+
+def quizzes_from_json(stream):
+    """A JSON list of quizzes, or {"quizzes": [...]}; the document is parsed whole."""
+    data = json.load(stream)
+    if isinstance(data, dict):
+        data = data.get("quizzes", [])
+    for quiz in data:
+        yield _quiz_from_dict(quiz)
+
+
+def quizzes_from_jsonl(stream):
+    """JSON Lines: one quiz object per line, read and yielded one line at a time."""
+    for number, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8-sig"), start=1):
+        if not line.strip():
+            continue
+        try:
+            quiz = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {number}: {e}") from None
+        if not isinstance(quiz, dict):
+            raise ValueError(f"line {number}: expected a quiz object")
+        yield _quiz_from_dict(quiz)
+
+
+def quizzes_from_csv(stream):
+    """CSV with header quiz_title,question,choice,is_correct; one row per choice.
+
+    Rows of one quiz (and of one question) must be consecutive: each quiz is
+    yielded as soon as the next one starts, so the file is never held whole.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig"))
+    quiz = None
+    question = None
+    for row in reader:
+        title = (row.get("quiz_title") or "").strip()
+        q_text = (row.get("question") or "").strip()
+        c_text = (row.get("choice") or "").strip()
+        if quiz is None or title != quiz["title"]:
+            if quiz is not None:
+                yield quiz
+            quiz = {"title": title, "questions": []}
+            question = None
+        if not q_text:
+            continue
+        if question is None or q_text != question["text"]:
+            question = {"text": q_text, "choices": []}
+            quiz["questions"].append(question)
+        if c_text:
+            question["choices"].append({"text": c_text, "isCorrect": _is_true(row.get("is_correct", ""))})
+    if quiz is not None:
+        yield quiz
@@ -0,0 +1,214 @@
+# leaderboared/store.py
+"""
+Materialized leaderboard rankings.
+
+quiz_submit records every new entry here as well as in Fuseki, so the
+leaderboard pages read pre-sorted rows through the (quiz_id, -score) and
+(-score) indexes instead of re-sorting every ex:QCM_Leaderboard triple on
+each view. ScoreCount keeps a score histogram per quiz and globally, which
+answers rank and percentile without scanning entries.
+
+The first read of a deployment loads the entries already in Fuseki
+(rebuild_from_fuseki, recorded through trelix_app.utils.index_builds);
+`manage.py rebuild_leaderboard` reloads them by hand.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from trelix_app.utils import index_builds, sparql_client
+
+from .models import LeaderboardEntry, PendingSubmission, ScoreCount
+from .quiz_import import EX, literal
+
+GLOBAL = ""
+BUILD_NAME = "leaderboard"
+
+
+def _bump(quiz_id, score, delta):
+    counter, _ = ScoreCount.objects.get_or_create(quiz_id=quiz_id, score=score)
+    ScoreCount.objects.filter(pk=counter.pk).update(count=F('count') + delta)
+
+
+def record_entry(entry_id, quiz_id, player_name, score, total, quiz_title=""):
+    """Add one submission to the store and to both histograms."""
+    with transaction.atomic():
+        _, created = LeaderboardEntry.objects.get_or_create(
+            entry_id=entry_id,
+            defaults={
+                'quiz_id': quiz_id,
+                'quiz_title': quiz_title,
+                'player_name': player_name,
+                'score': score,
+                'total': total,
+            },
+        )
+        if created:
+            _bump(quiz_id, score, 1)
+            _bump(GLOBAL, score, 1)
+
+
+def rename_quiz(quiz_id, title):
+    LeaderboardEntry.objects.filter(quiz_id=quiz_id).update(quiz_title=title)
+
+
+def _ensure_built():
+    try:
+        index_builds.ensure(BUILD_NAME, rebuild_from_fuseki)
+    except Exception as e:
+        # Fuseki unreachable: serve what is stored, retry on the next read
+        print(f"Leaderboard store not loaded from Fuseki yet: {e}")
+
+
+def top(quiz_id=None, limit=50, offset=0):
+    """Entries ordered by score, best first, for one quiz or globally."""
+    _ensure_built()
+    entries = LeaderboardEntry.objects.all()
+    if quiz_id is not None:
+        entries = entries.filter(quiz_id=quiz_id)
+    return list(entries.order_by('-score', 'id')[offset:offset + limit])
+
+
+def last_entry_id():
+    """Highest LeaderboardEntry id so far (0 when empty), the cursor of entries_since()."""
+    return LeaderboardEntry.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def entries_since(after_id, quiz_ids, limit=500):
+    """Entries of ``quiz_ids`` recorded after ``after_id`` by any process, oldest first."""
+    entries = LeaderboardEntry.objects.filter(id__gt=after_id, quiz_id__in=quiz_ids)
+    return list(entries.order_by('id')[:limit])
+
+
+def _counts(quiz_id):
+    _ensure_built()
+    return ScoreCount.objects.filter(quiz_id=GLOBAL if quiz_id is None else quiz_id)
+
+
+def rank(score, quiz_id=None):
+    """Competition rank of ``score``: 1 + number of entries strictly above it."""
+    above = _counts(quiz_id).filter(score__gt=score).aggregate(n=Sum('count'))['n'] or 0
+    return above + 1
+
+
+def percentile(score, quiz_id=None):
+    """Share of entries (0-100) that scored strictly below ``score``."""
+    counts = _counts(quiz_id)
+    total = counts.aggregate(n=Sum('count'))['n'] or 0
+    if not total:
+        return 0.0
+    below = counts.filter(score__lt=score).aggregate(n=Sum('count'))['n'] or 0
+    return round(below * 100 / total, 1)
+
+
+def delete_quizzes(quiz_ids):
+    """Drop the entries of ``quiz_ids`` and take them out of the histograms."""
+    with transaction.atomic():
+        entries = LeaderboardEntry.objects.filter(quiz_id__in=quiz_ids)
+        for c in entries.values('score').annotate(n=Count('id')):
+            _bump(GLOBAL, c['score'], -c['n'])
+        ScoreCount.objects.filter(quiz_id=GLOBAL, count__lte=0).delete()
+        ScoreCount.objects.filter(quiz_id__in=quiz_ids).delete()
+        return entries.delete()[0]
+
+
+def _pending_rows(titles):
+    return {
+        p.entry_id: {
+            'entry_id': p.entry_id,
+            'quiz_id': p.quiz_id,
+            'quiz_title': titles.get(p.quiz_id, ''),
+            'player_name': p.player_name,
+            'score': p.score,
+            'total': p.total,
+        }
+        for p in PendingSubmission.objects.all()
+    }
+
+
+def rebuild(rows, recorded_since=None):
+    """Replace the whole store with ``rows`` (dicts shaped like record_entry's kwargs).
+
+    ``rows`` is a snapshot read before the transaction: the submissions still
+    queued, and with ``recorded_since`` the entries recorded while it was
+    read, are added to it inside the transaction, so none is dropped.
+    """
+    with transaction.atomic():
+        unique = {row['entry_id']: row for row in rows}
+        titles = {row['quiz_id']: row['quiz_title'] for row in unique.values()}
+        for entry_id, row in _pending_rows(titles).items():
+            unique.setdefault(entry_id, row)
+        if recorded_since is not None:
+            recent = LeaderboardEntry.objects.filter(created_at__gte=recorded_since)
+            for row in recent.values('entry_id', 'quiz_id', 'quiz_title', 'player_name', 'score', 'total'):
+                unique.setdefault(row['entry_id'], row)
+        LeaderboardEntry.objects.all().delete()
+        ScoreCount.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(
+            [LeaderboardEntry(**row) for row in unique.values()], batch_size=500
+        )
+        per_quiz = LeaderboardEntry.objects.values('quiz_id', 'score').annotate(n=Count('id'))
+        overall = LeaderboardEntry.objects.values('score').annotate(n=Count('id'))
+        ScoreCount.objects.bulk_create(
+            [ScoreCount(quiz_id=c['quiz_id'], score=c['score'], count=c['n']) for c in per_quiz]
+            + [ScoreCount(quiz_id=GLOBAL, score=c['score'], count=c['n']) for c in overall],
+            batch_size=500,
+        )
+    return LeaderboardEntry.objects.count()
+
+
+def fetch_fuseki_rows(batch_size=1000):
+    """Every ex:QCM_Leaderboard entry in Fuseki, plus the submissions queued when it started.
+
+    Queued submissions are read first: one flushed (and dequeued) while the
+    pages are read is in one list or the other. Pages follow ?entry (keyset,
+    not OFFSET), so entries inserted meanwhile do not shift the pages.
+    """
+    pending = _pending_rows({})
+    rows = []
+    after = ""
+    while True:
+        results = sparql_client.run_select(f"""
+        PREFIX ex: <{EX}>
+        SELECT ?entry ?player ?score ?total ?quiz ?title WHERE {{
+            ?entry a ex:QCM_Leaderboard ;
+                   ex:playerName ?player ;
+                   ex:score ?score ;
+                   ex:forQuiz ?quiz .
+            OPTIONAL {{ ?entry ex:totalQuestions ?total }}
+            OPTIONAL {{ ?quiz ex:quizTitle ?title }}
+            FILTER (STR(?entry) > {literal(after)})
+        }} ORDER BY ?entry
+        LIMIT {batch_size}
+        """)
+        for r in results:
+            try:
+                rows.append({
+                    'entry_id': r['entry']['value'].split('#')[-1],
+                    'quiz_id': r['quiz']['value'].split('#')[-1],
+                    'quiz_title': r['title']['value'] if 'title' in r else '',
+                    'player_name': r['player']['value'],
+                    'score': int(float(r['score']['value'])),
+                    'total': int(float(r['total']['value'])) if 'total' in r else 0,
+                })
+            except (KeyError, ValueError) as e:
+                print(f"Skipping {r.get('entry', {}).get('value')}: {e}")
+        if len(results) < batch_size:
+            break
+        after = results[-1]['entry']['value']
+
+    # An entry with several titles/totals comes back once per combination
+    unique = {row['entry_id']: row for row in rows}
+    # Submissions still waiting in the write-behind queue are not in Fuseki yet
+    titles = {row['quiz_id']: row['quiz_title'] for row in unique.values()}
+    for entry_id, row in pending.items():
+        unique.setdefault(entry_id, dict(row, quiz_title=titles.get(row['quiz_id'], '')))
+    return list(unique.values())
+
+
+def rebuild_from_fuseki(batch_size=1000):
+    """Reload the whole store from Fuseki; return the number of entries."""
+    started = timezone.now()
+    count = rebuild(fetch_fuseki_rows(batch_size), recorded_since=started)
+    index_builds.mark_built(BUILD_NAME)
+    return count
@@ -0,0 +1,156 @@
+# leaderboared/submission_queue.py
+"""
+Write-behind queue for quiz submissions.
+
+quiz_submit stores each result in the PendingSubmission table (SQLite, so it
+survives a restart) and in the leaderboard store, then renders right away.
+A background thread sends the queued results to Fuseki, up to
+SUBMISSION_FLUSH_BATCH_SIZE per INSERT, every
+SUBMISSION_FLUSH_INTERVAL seconds or as soon as a submission arrives, and
+deletes them once written. A failed batch stays queued for the next round.
+Submissions to a quiz that no longer exists (deleted while they were
+queued) are dropped rather than written back as orphan entries: the insert
+only matches quizzes still in the dataset.
+
+The thread starts with the first request the process serves (hooked up in
+LeaderboaredConfig.ready), or its first submission, and flushes at once
+whatever a previous run left queued; `manage.py flush_submissions` drains
+the queue by hand. The inserts do not bump the SPARQL cache version: no
+cached read covers leaderboard entries (the pages read leaderboared.store),
+and a live quiz would otherwise flush the catalog cache every few seconds.
+Writing a batch twice (e.g. two processes flushing at once) is harmless:
+inserting the same entry IRI again adds nothing new.
+"""
+import atexit
+import threading
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from trelix_app.utils import sparql_client
+
+from . import store
+from .models import PendingSubmission
+from .quiz_import import EX, literal
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _entry_row(p):
+    return f"(<{EX}{p.entry_id}> {literal(p.player_name)} {p.score} {p.total} <{EX}{p.quiz_id}>)"
+
+
+def _existing_quizzes(quiz_ids):
+    values = " ".join(f"<{EX}{quiz_id}>" for quiz_id in quiz_ids)
+    rows = sparql_client.run_select(f"""
+    PREFIX ex: <{EX}>
+    SELECT ?quiz WHERE {{ VALUES ?quiz {{ {values} }} ?quiz a ex:Quiz }}
+    """)
+    return {row['quiz']['value'][len(EX):] for row in rows}
+
+
+def enqueue(entry_id, quiz_id, player_name, score, total, quiz_title=""):
+    """Record a submission locally; Fuseki gets it on the next flush."""
+    with transaction.atomic():
+        PendingSubmission.objects.get_or_create(
+            entry_id=entry_id,
+            defaults={'quiz_id': quiz_id, 'player_name': player_name, 'score': score, 'total': total},
+        )
+        store.record_entry(entry_id, quiz_id, player_name, score, total, quiz_title=quiz_title)
+    _ensure_worker()
+    _wakeup.set()
+
+
+def flush(batch_size=None):
+    """Send one batch of pending submissions; return how many were written."""
+    batch_size = batch_size or getattr(settings, "SUBMISSION_FLUSH_BATCH_SIZE", 200)
+    batch = list(PendingSubmission.objects.order_by('id')[:batch_size])
+    if not batch:
+        return 0
+    ids = [p.pk for p in batch]
+    try:
+        existing = _existing_quizzes({p.quiz_id for p in batch})
+        kept = [p for p in batch if p.quiz_id in existing]
+        if kept:
+            # Conditionnel : un quiz supprimé entre-temps ne reçoit rien
+            sparql_client.run_update(f"""
+            PREFIX ex: <{EX}>
+            INSERT {{
+                ?entry a ex:QCM_Leaderboard ; ex:playerName ?name ; ex:score ?score ;
+                       ex:totalQuestions ?total ; ex:forQuiz ?quiz .
+            }} WHERE {{
+                VALUES (?entry ?name ?score ?total ?quiz) {{ {" ".join(_entry_row(p) for p in kept)} }}
+                ?quiz a ex:Quiz
+            }}
+            """, bump_cache=False)
+    except Exception as e:
+        PendingSubmission.objects.filter(pk__in=ids).update(attempts=F('attempts') + 1, last_error=str(e)[:1000])
+        raise
+    missing = {p.quiz_id for p in batch} - existing
+    if missing:
+        # Quiz supprimés : leurs résultats en attente n'ont plus où aller
+        store.delete_quizzes(missing)
+    PendingSubmission.objects.filter(pk__in=ids).delete()
+    return len(batch)
+
+
+def flush_all(batch_size=None):
+    written = 0
+    while True:
+        count = flush(batch_size)
+        written += count
+        if not count:
+            return written
+
+
+def pending_count():
+    return PendingSubmission.objects.count()
+
+
+def _run():
+    interval = getattr(settings, "SUBMISSION_FLUSH_INTERVAL", 2.0)
+    while True:
+        _wakeup.wait(interval)
+        _wakeup.clear()
+        try:
+            flush_all()
+        except Exception as e:
+            print(f"Submission flush failed, will retry: {e}")
+        finally:
+            close_old_connections()
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="submission-flusher", daemon=True)
+            _worker.start()
+
+
+def start():
+    """Start the flusher and have it send what is already queued."""
+    _ensure_worker()
+    _wakeup.set()
+
+
+def start_on_first_request(**kwargs):
+    request_started.disconnect(start_on_first_request, dispatch_uid=__name__)
+    start()
+
+
+@atexit.register
+def _flush_on_exit():
+    # Best effort: anything left stays in SQLite for the next start
+    if _worker is None:
+        return
+    try:
+        flush_all()
+    except Exception as e:
+        print(f"Submission flush at exit failed: {e}")
@@ -1,3 +1,250 @@
-from django.test import TestCase
+import io
+import json
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from trelix_app.utils import index_builds, rdflib_store, sparql_client
+
+from . import live, quiz_import, store, submission_queue
+from .models import LeaderboardEntry, PendingSubmission
+from .quiz_import import EX
+
+
+@override_settings(SPARQL_BACKEND="rdflib", SPARQL_RDFLIB_SOURCES=[])
+class GraphTestCase(TestCase):
+    """Each test starts from an empty in-memory graph and an empty cache."""
+
+    def setUp(self):
+        rdflib_store.close_all()
+        cache.clear()
+
+    def add_quiz(self, quiz_id, title="Quiz"):
+        sparql_client.run_update(
+            f"PREFIX ex: <{EX}>\nINSERT DATA {{ ex:{quiz_id} a ex:Quiz ; ex:quizTitle {quiz_import.literal(title)} . }}"
+        )
+
+    def entries_in_graph(self):
+        rows = sparql_client.run_select(f"""
+        PREFIX ex: <{EX}>
+        SELECT ?entry ?player WHERE {{ ?entry a ex:QCM_Leaderboard ; ex:playerName ?player }}
+        """)
+        return {r["entry"]["value"][len(EX):]: r["player"]["value"] for r in rows}
+
+
+class StoreTests(GraphTestCase):
+    def setUp(self):
+        super().setUp()
+        index_builds.mark_built(store.BUILD_NAME)
+        for i, (quiz_id, score) in enumerate([("q1", 5), ("q1", 3), ("q1", 3), ("q1", 1), ("q2", 4)]):
+            store.record_entry(f"e{i}", quiz_id, f"player{i}", score, 5)
+
+    def test_rank_counts_only_strictly_better_scores(self):
+        self.assertEqual(store.rank(5, "q1"), 1)
+        self.assertEqual(store.rank(3, "q1"), 2)  # ex aequo
+        self.assertEqual(store.rank(1, "q1"), 4)
+        self.assertEqual(store.rank(3), 3)  # global : 5 et 4 devant
+
+    def test_percentile_is_share_strictly_below(self):
+        self.assertEqual(store.percentile(5, "q1"), 75.0)
+        self.assertEqual(store.percentile(3, "q1"), 25.0)
+        self.assertEqual(store.percentile(1, "q1"), 0.0)
+        self.assertEqual(store.percentile(3, "unknown"), 0.0)
+
+    def test_recording_an_entry_twice_counts_once(self):
+        store.record_entry("e0", "q1", "player0", 5, 5)
+        self.assertEqual(store.rank(4, "q1"), 2)
+
+    def test_delete_quizzes_updates_global_histogram(self):
+        store.delete_quizzes(["q1"])
+        self.assertEqual([e.entry_id for e in store.top()], ["e4"])
+        self.assertEqual(store.rank(3), 2)
+        self.assertEqual(store.percentile(4), 0.0)
+
+    def test_top_orders_best_first(self):
+        self.assertEqual([e.score for e in store.top("q1")], [5, 3, 3, 1])
+
+
+class StoreBootstrapTests(GraphTestCase):
+    def test_first_read_loads_entries_already_in_the_graph(self):
+        index_builds.forget(store.BUILD_NAME)
+        self.add_quiz("q1", "Old quiz")
+        sparql_client.run_update(f"""
+        PREFIX ex: <{EX}>
+        INSERT DATA {{ ex:old a ex:QCM_Leaderboard ; ex:playerName "ann" ; ex:score 4 ;
+                       ex:totalQuestions 5 ; ex:forQuiz ex:q1 . }}
+        """)
+        with mock.patch.object(submission_queue, "_ensure_worker"):
+            submission_queue.enqueue("new", "q1", "bob", 2, 5, "Old quiz")
+
+        self.assertEqual([(e.entry_id, e.quiz_title) for e in store.top("q1")], [("old", "Old quiz"), ("new", "Old quiz")])
+        self.assertTrue(index_builds.is_built(store.BUILD_NAME))
+
+    def test_submissions_recorded_during_the_load_are_kept(self):
+        index_builds.forget(store.BUILD_NAME)
+        self.add_quiz("q1")
+        fetch = store.fetch_fuseki_rows
+
+        def fetch_while_submitting(*args):
+            rows = fetch(*args)
+            # Un joueur soumet après la lecture du graphe, avant la reconstruction
+            with mock.patch.object(submission_queue, "_ensure_worker"):
+                submission_queue.enqueue("during", "q1", "cy", 3, 5)
+            return rows
+
+        with mock.patch.object(store, "fetch_fuseki_rows", side_effect=fetch_while_submitting):
+            store.rebuild_from_fuseki()
+        self.assertEqual([e.entry_id for e in store.top("q1")], ["during"])
+
+
+@mock.patch.object(submission_queue, "_ensure_worker")
+class SubmissionQueueTests(GraphTestCase):
+    def setUp(self):
+        super().setUp()
+        index_builds.mark_built(store.BUILD_NAME)
+
+    def test_flush_writes_pending_entries_then_drops_them(self, _worker):
+        self.add_quiz("q1")
+        submission_queue.enqueue("e1", "q1", 'ann "the best"', 4, 5)
+        submission_queue.enqueue("e2", "q1", "bob", 2, 5)
+
+        self.assertEqual(submission_queue.flush_all(batch_size=1), 2)
+        self.assertEqual(self.entries_in_graph(), {"e1": 'ann "the best"', "e2": "bob"})
+        self.assertEqual(submission_queue.pending_count(), 0)
+
+    def test_flush_skips_quizzes_deleted_meanwhile(self, _worker):
+        self.add_quiz("q1")
+        submission_queue.enqueue("e1", "q1", "ann", 4, 5)
+        submission_queue.enqueue("e2", "gone", "bob", 2, 5)
+
+        self.assertEqual(submission_queue.flush(), 2)
+        self.assertEqual(self.entries_in_graph(), {"e1": "ann"})
+        self.assertFalse(PendingSubmission.objects.exists())
+        self.assertFalse(LeaderboardEntry.objects.filter(quiz_id="gone").exists())
+
+    def test_failed_flush_keeps_the_batch(self, _worker):
+        self.add_quiz("q1")
+        submission_queue.enqueue("e1", "q1", "ann", 4, 5)
+        with mock.patch.object(sparql_client, "run_update", side_effect=RuntimeError("down")):
+            with self.assertRaises(RuntimeError):
+                submission_queue.flush()
+        pending = PendingSubmission.objects.get()
+        self.assertEqual((pending.attempts, pending.last_error), (1, "down"))
+
+
+class QuizImportTests(GraphTestCase):
+    TRICKY = 'Say "hi" \\ or\nleave } ; DROP ALL'
+
+    def test_literal_escapes_quotes_backslashes_and_newlines(self):
+        self.assertEqual(quiz_import.literal('a"b\\c\nd\re'), '"a\\"b\\\\c\\nd\\re"')
+
+    def test_import_round_trips_tricky_text(self):
+        quiz = {"title": self.TRICKY, "questions": [{"text": "Q?", "choices": [{"text": self.TRICKY, "isCorrect": True}]}]}
+        report = quiz_import.import_quizzes([quiz, {"title": ""}])
+
+        self.assertEqual(report["imported"], 1)
+        self.assertEqual(report["errors"], ["quiz without title skipped"])
+        rows = sparql_client.run_select(f"""
+        PREFIX ex: <{EX}>
+        SELECT ?title ?choice WHERE {{
+            ?quiz a ex:Quiz ; ex:quizTitle ?title ; ex:hasQuestion/ex:hasChoice/ex:choiceText ?choice
+        }}
+        """)
+        self.assertEqual([(r["title"]["value"], r["choice"]["value"]) for r in rows], [(self.TRICKY, self.TRICKY)])
+
+    def test_import_batches(self):
+        report = quiz_import.import_quizzes(({"title": f"Quiz {i}"} for i in range(5)), batch_size=2)
+        self.assertEqual((report["imported"], report["batches"]), (5, 3))
+
+    def test_json_lines_reports_the_bad_line(self):
+        stream = io.BytesIO(b'{"title": "A", "questions": []}\n\n{"title": \n')
+        quizzes = quiz_import.quizzes_from_jsonl(stream)
+        self.assertEqual(next(quizzes)["title"], "A")
+        with self.assertRaisesMessage(ValueError, "line 3"):
+            next(quizzes)
+
+    def test_csv_groups_rows_by_quiz_and_question(self):
+        stream = io.BytesIO(
+            "quiz_title,question,choice,is_correct\nA,Q1,x,yes\nA,Q1,y,no\nB,Q2,z,1\n".encode("utf-8")
+        )
+        quizzes = list(quiz_import.quizzes_from_csv(stream))
+        self.assertEqual([q["title"] for q in quizzes], ["A", "B"])
+        self.assertEqual(
+            quizzes[0]["questions"],
+            [{"text": "Q1", "choices": [{"text": "x", "isCorrect": True}, {"text": "y", "isCorrect": False}]}],
+        )
+
+
+class UpdateQuizTests(GraphTestCase):
+    def setUp(self):
+        super().setUp()
+        index_builds.mark_built(store.BUILD_NAME)
+        self.add_quiz("q1", "Old")
+        store.record_entry("e1", "q1", "ann", 4, 5, "Old")
+
+    def rename(self, title):
+        return self.client.post("/quiz/q1/update/", {"quizTitle": title})
+
+    def test_title_is_stored_verbatim(self):
+        self.rename('Say "hi" }')
+        rows = sparql_client.run_select(f"PREFIX ex: <{EX}> SELECT ?t WHERE {{ ex:q1 ex:quizTitle ?t }}")
+        self.assertEqual([r["t"]["value"] for r in rows], ['Say "hi" }'])
+        self.assertEqual(LeaderboardEntry.objects.get().quiz_title, 'Say "hi" }')
+
+    def test_failed_update_leaves_the_local_copy(self):
+        with mock.patch.object(sparql_client, "run_update", side_effect=RuntimeError("down")):
+            self.rename("New")
+        self.assertEqual(LeaderboardEntry.objects.get().quiz_title, "Old")
+
+
+@mock.patch.object(live, "_ensure_poller")
+class LiveLeaderboardTests(GraphTestCase):
+    def setUp(self):
+        super().setUp()
+        index_builds.mark_built(store.BUILD_NAME)
+        self.addCleanup(live._rankings.clear)
+        store.record_entry("e1", "q1", "ann", 4, 5)
+
+    def next_event(self, subscriber):
+        message = subscriber.get(0)
+        return message[0], json.loads(message[1])
+
+    def test_scores_recorded_by_another_process_are_polled(self, _poller):
+        subscriber, snapshot = live.subscribe("q1")
+        self.assertEqual([e["player"] for e in json.loads(snapshot)["entries"]], ["ann"])
+
+        # Pas de publish() : la soumission a été traitée par un autre worker
+        store.record_entry("e2", "q1", "bob", 5, 5)
+        store.record_entry("e3", "other", "cy", 5, 5)
+        self.assertEqual(live.poll(), 1)
+        self.assertEqual(self.next_event(subscriber), ("insert", {
+            "type": "insert", "rank": 1, "entry": {"player": "bob", "score": 5, "total": 5, "percent": 100},
+        }))
+        self.assertEqual(live.poll(), 0)
+
+    def test_published_score_is_not_pushed_twice(self, _poller):
+        subscriber, _ = live.subscribe("q1")
+        store.record_entry("e2", "q1", "bob", 3, 5)
+        live.publish("q1", "e2", "bob", 3, 5)
+        live.poll()
+        self.assertEqual(self.next_event(subscriber)[1]["rank"], 2)
+        self.assertEqual(subscriber.get(0), "")
+
+    def test_resync_sends_a_fresh_snapshot(self, _poller):
+        subscriber, _ = live.subscribe("q1")
+        store.delete_quizzes(["q1"])
+        live.resync()
+        self.assertEqual(self.next_event(subscriber), ("snapshot", {"type": "snapshot", "entries": []}))
+
+    async def test_async_viewer_is_fed_from_other_threads(self, _poller):
+        subscriber = live.AsyncSubscriber()
+        await sync_to_async(live.subscribe)("q1", subscriber)
+        await sync_to_async(store.record_entry)("e2", "q1", "bob", 5, 5)
+        await sync_to_async(live.poll)()
+        event, data = await subscriber.get(1)
+        self.assertEqual((event, json.loads(data)["rank"]), ("insert", 1))
+        live.forget("q1")
+        self.assertIsNone(await subscriber.get(1))
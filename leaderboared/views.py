@@ -1,30 +1,47 @@
 # leaderboard/views.py
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, redirect
-from django.http import HttpResponseNotFound
-from SPARQLWrapper import SPARQLWrapper, JSON, POST
+from django.http import HttpResponse, HttpResponseNotFound, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods
+from trelix_app.utils import sparql_client
+from . import live, quiz_cache, quiz_import, store, submission_queue
+from .models import PendingSubmission
+import io
+import json
+import re
+import time
 import uuid
 
 EX = "http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#"
 
-sparql_update = SPARQLWrapper("http://localhost:3030/trelix/update")
-sparql_select = SPARQLWrapper("http://localhost:3030/trelix/sparql")
+# No shared SPARQLWrapper here: every call hands its query text to the
+# stateless sparql_client, so concurrent requests cannot clobber each other.
 
 def run_update(query):
+    """Run ``query``; return False (and log) if the update failed."""
     try:
-        sparql_update.setMethod(POST)
-        sparql_update.setQuery(query)
-        sparql_update.query()
+        sparql_client.run_update(query)
+        return True
     except Exception as e:
         print(f"Update failed: {e}")  # Log it
+        return False
 
 # leaderboard/views.py
 
-def run_select(query):
-    sparql_select.setQuery(query)
-    sparql_select.setReturnFormat(JSON)
-    response = sparql_select.query().convert()
+def run_select(query, cache_ttl=None):
+    response = sparql_client.query(query, app="leaderboared", cache_ttl=cache_ttl)
+    return _bindings(response)
 
+
+async def arun_select(query, cache_ttl=None):
+    """Async run_select() for the ASGI list views."""
+    response = await sparql_client.aquery(query, app="leaderboared", cache_ttl=cache_ttl)
+    return _bindings(response)
+
+
+def _bindings(response):
     # ASK query → returns {'boolean': True/False}
     if 'boolean' in response:
         return [{'boolean': str(response['boolean']).lower()}]
@@ -41,62 +58,77 @@ def iri(id_str):
 # CREATE QUIZ
 def quiz_create(request):
     if request.method == 'POST':
-        quiz_id = str(uuid.uuid4())
-        title = request.POST['quizTitle'].strip()
-        if not title:
+        quiz = quiz_import.quiz_from_form(request.POST)
+        if not quiz['title']:
             return render(request, 'quiz/quiz_create.html', {'error': 'Title required'})
 
-        quiz_iri = iri(quiz_id)
-
-        # Insert Quiz
-        run_update(f"""
-        PREFIX ex: <{EX}>
-        INSERT DATA {{ {quiz_iri} a ex:Quiz ; ex:quizTitle "{title}" }}
-        """)
-
-        # Parse ONE question
-        q_text = request.POST.get('questions[0][text]', '').strip()
-        if q_text:
-            q_id = str(uuid.uuid4())
-            q_iri = iri(q_id)
-
-            run_update(f"""
-            PREFIX ex: <{EX}>
-            INSERT DATA {{
-                {q_iri} a ex:Question ; ex:questionText "{q_text}" .
-                {quiz_iri} ex:hasQuestion {q_iri} .
-            }}
-            """)
-
-            for i in range(4):
-                c_text = request.POST.get(f'questions[0][choices][{i}][text]', '').strip()
-                if not c_text:
-                    continue
-                c_correct = request.POST.get(f'questions[0][choices][{i}][isCorrect]') == 'on'
-                c_id = str(uuid.uuid4())
-                c_iri = iri(c_id)
-
-                run_update(f"""
-                PREFIX ex: <{EX}>
-                INSERT DATA {{
-                    {c_iri} a ex:Choice ;
-                        ex:choiceText "{c_text}" ;
-                        ex:isCorrect {"true" if c_correct else "false"} .
-                    {q_iri} ex:hasChoice {c_iri} .
-                }}
-                """)
+        # The quiz, all its questions and all their choices go in one update
+        try:
+            quiz_import.create_quiz(quiz)
+        except Exception as e:
+            print(f"Update failed: {e}")  # Log it
 
         return redirect('quiz_list')
 
     return render(request, 'quiz/quiz_create.html')
 
 
+# BULK IMPORT
+JSON_LINES_TYPES = ('application/jsonl', 'application/x-ndjson', 'application/x-jsonlines')
+
+
+@require_http_methods(["POST"])
+def quiz_bulk_import(request):
+    """Import many quizzes from an uploaded JSON, JSON Lines or CSV file (field "file").
+
+    A JSON or JSON Lines body is accepted too. See leaderboared/quiz_import.py
+    for the formats; CSV and JSON Lines are read one quiz at a time.
+    """
+    upload = request.FILES.get('file')
+    if upload is not None:
+        name = upload.name.lower()
+        if name.endswith('.csv') or upload.content_type == 'text/csv':
+            parse = quiz_import.quizzes_from_csv
+        elif name.endswith(('.jsonl', '.ndjson')) or upload.content_type in JSON_LINES_TYPES:
+            parse = quiz_import.quizzes_from_jsonl
+        else:
+            parse = quiz_import.quizzes_from_json
+        stream = upload.file
+    elif request.content_type in JSON_LINES_TYPES:
+        parse = quiz_import.quizzes_from_jsonl
+        stream = io.BytesIO(request.body)
+    elif request.content_type == 'application/json':
+        parse = quiz_import.quizzes_from_json
+        stream = io.BytesIO(request.body)
+    else:
+        return JsonResponse({'success': False, 'error': 'Upload a JSON, JSON Lines or CSV file as "file"'}, status=400)
+
+    try:
+        quizzes = parse(stream)
+        report = quiz_import.import_quizzes(quizzes)
+    except (ValueError, UnicodeDecodeError) as e:
+        return JsonResponse({'success': False, 'error': f'Invalid file: {e}'}, status=400)
+
+    return JsonResponse({'success': not report['errors'], **report})
+
+
 # LIST QUIZZES
+QUIZ_LIST_QUERY = f"""
+PREFIX ex: <{EX}>
+SELECT ?quiz ?title WHERE {{ ?quiz a ex:Quiz ; ex:quizTitle ?title }}
+"""
+
+
 def quiz_list(request):
-    results = run_select(f"""
-    PREFIX ex: <{EX}>
-    SELECT ?quiz ?title WHERE {{ ?quiz a ex:Quiz ; ex:quizTitle ?title }}
-    """)
+    return _render_quiz_list(request, run_select(QUIZ_LIST_QUERY, cache_ttl=300))
+
+
+async def aquiz_list(request):
+    """quiz_list() for ASGI (see trelix_app/urls_asgi.py)."""
+    return _render_quiz_list(request, await arun_select(QUIZ_LIST_QUERY, cache_ttl=300))
+
+
+def _render_quiz_list(request, results):
     quizzes = [
         {'id': r['quiz']['value'].split('#')[-1], 'title': r['title']['value']}
         for r in results
@@ -147,34 +179,14 @@ def quiz_take(request, quiz_id):
     if request.session.get('quiz_id') != quiz_id or not request.session.get('player_name'):
         return redirect('join_quiz', quiz_id=quiz_id)
 
-    quiz_iri = iri(quiz_id)
-    results = run_select(f"""
-    PREFIX ex: <{EX}>
-    SELECT ?question ?text ?choice ?choiceText ?isCorrect WHERE {{
-        {quiz_iri} ex:hasQuestion ?question .
-        ?question ex:questionText ?text ; ex:hasChoice ?choice .
-        ?choice ex:choiceText ?choiceText ; ex:isCorrect ?isCorrect .
-    }}
-    """)
-
-    questions = {}
-    for r in results:
-        q_iri = r['question']['value']
-        qid = q_iri.split('#')[-1]
-        if qid not in questions:
-            questions[qid] = {'id': qid, 'text': r['text']['value'], 'choices': []}
-        questions[qid]['choices'].append({
-            'text': r['choiceText']['value'],
-            'isCorrect': r['isCorrect']['value'] == 'true'
-        })
-
     if request.method == 'POST':
         return redirect('quiz_submit', quiz_id=quiz_id)
 
+    quiz = quiz_cache.get_quiz(quiz_id)
     return render(request, 'quiz/quiz_take.html', {
         'quiz_id': quiz_id,
         'player_name': request.session['player_name'],
-        'questions': list(questions.values())
+        'questions': quiz.questions
     })
 
 
@@ -184,104 +196,197 @@ def quiz_submit(request, quiz_id):
     if not player_name or request.session.get('quiz_id') != quiz_id:
         return redirect('join_quiz', quiz_id=quiz_id)
 
-    quiz_iri = iri(quiz_id)
-    results = run_select(f"""
-    PREFIX ex: <{EX}>
-    SELECT ?question ?text ?choice ?choiceText ?isCorrect WHERE {{
-        {quiz_iri} ex:hasQuestion ?question .
-        ?question ex:questionText ?text ; ex:hasChoice ?choice .
-        ?choice ex:choiceText ?choiceText ; ex:isCorrect ?isCorrect .
-    }}
-    """)
-
-    questions = {}
-    for r in results:
-        q_iri = r['question']['value']
-        qid = q_iri.split('#')[-1]
-        if qid not in questions:
-            questions[qid] = {'text': r['text']['value'], 'correct': None}
-        if r['isCorrect']['value'] == 'true':
-            questions[qid]['correct'] = r['choiceText']['value']
-
-    score = sum(1 for qid, q in questions.items() if request.POST.get(qid) == q['correct'])
-    total = len(questions)
+    # Grading is a lookup in the cached answer key: no Fuseki round-trip
+    quiz = quiz_cache.get_quiz(quiz_id)
+    score = quiz.grade(request.POST)
+    total = quiz.total
 
+    # Write-behind: the result is queued locally and sent to Fuseki in a batch
+    # by the background flusher (leaderboared/submission_queue.py)
     entry_id = str(uuid.uuid4())
-    entry_iri = iri(entry_id)
-
-    run_update(f"""
-    PREFIX ex: <{EX}>
-    INSERT DATA {{
-        {entry_iri} a ex:QCM_Leaderboard ;
-            ex:playerName "{player_name}" ;
-            ex:score {score} ;
-            ex:totalQuestions {total} ;
-            ex:forQuiz {quiz_iri} .
-    }}
-    """)
+    submission_queue.enqueue(entry_id, quiz_id, player_name, score, total, quiz_title=quiz.title)
+    live.publish(quiz_id, entry_id, player_name, score, total)
 
     request.session.pop('player_name', None)
     request.session.pop('quiz_id', None)
 
     return render(request, 'quiz/quiz_result.html', {
-        'score': score, 'total': total, 'quiz_id': quiz_id
+        'score': score, 'total': total, 'quiz_id': quiz_id,
+        'rank': store.rank(score, quiz_id),
+        'percentile': store.percentile(score, quiz_id),
     })
 
 
 # LEADERBOARD PER QUIZ
+LEADERBOARD_PAGE_SIZE = 50
+
+# Both leaderboards read the materialized store (leaderboared/store.py), which
+# quiz_submit keeps up to date; it loads itself from Fuseki on the first read
+# after a deploy, and `manage.py rebuild_leaderboard` reloads it by hand.
 def quiz_leaderboard(request, quiz_id):
-    quiz_iri = iri(quiz_id)
-    results = run_select(f"""
-    PREFIX ex: <{EX}>
-    SELECT ?player ?score ?total WHERE {{
-        ?e a ex:QCM_Leaderboard ;
-           ex:playerName ?player ;
-           ex:score ?score ;
-           ex:totalQuestions ?total ;
-           ex:forQuiz {quiz_iri} .
-    }} ORDER BY DESC(?score)
-    """)
     entries = []
-    for r in results:
-        score = int(r['score']['value'])
-        total = int(r['total']['value'])
-        percent = round((score / total) * 100, 0) if total > 0 else 0
+    for e in store.top(quiz_id, limit=LEADERBOARD_PAGE_SIZE):
+        percent = round((e.score / e.total) * 100, 0) if e.total > 0 else 0
         entries.append({
-            'player': r['player']['value'],
-            'score': score,
-            'total': total,
+            'player': e.player_name,
+            'score': e.score,
+            'total': e.total,
             'percent': percent,
         })
-    return render(request, 'quiz/quiz_leaderboard.html', {'entries': entries, 'quiz_id': quiz_id})
+    return render(request, 'quiz/quiz_leaderboard.html', {
+        'entries': entries, 'quiz_id': quiz_id, 'live_size': live.live_size(),
+    })
+
 
 
+# LIVE LEADERBOARD (Server-Sent Events)
+LIVE_HEARTBEAT_SECONDS = 15
+# Sent with the snapshot: how long EventSource waits before reconnecting
+LIVE_RETRY_MS = 3000
+
+
+def _sse(message):
+    event, data = message
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def _sse_start(snapshot):
+    return f"retry: {LIVE_RETRY_MS}\n" + _sse(('snapshot', snapshot))
+
+
+class _LiveStream:
+    """SSE body of one viewer. Django closes it when the response ends, even unread."""
+
+    def __init__(self, quiz_id, subscriber, snapshot, lifetime):
+        self.quiz_id = quiz_id
+        self.subscriber = subscriber
+        self.snapshot = snapshot
+        self.lifetime = lifetime
+        self.closed = False
+        self.events = self._events()
+
+    def __iter__(self):
+        return self.events
+
+    def _events(self):
+        deadline = time.monotonic() + self.lifetime
+        yield _sse_start(self.snapshot)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Frees the thread; EventSource reconnects with a fresh snapshot
+                return
+            message = self.subscriber.get(min(LIVE_HEARTBEAT_SECONDS, remaining))
+            if message is None:
+                return
+            if not message:
+                # Comment line: keeps proxies from closing an idle stream
+                yield ": ping\n\n"
+                continue
+            yield _sse(message)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.events.close()
+        live.unsubscribe(self.quiz_id, self.subscriber)
+        live.release_stream()
+
+
+def quiz_leaderboard_stream(request, quiz_id):
+    """SSE stream under WSGI: one worker thread per viewer, for a bounded time.
+
+    ASGI serves aquiz_leaderboard_stream instead (trelix_app/urls_asgi.py).
+    """
+    if not live.acquire_stream():
+        response = HttpResponse("Too many live viewers", status=503, content_type='text/plain')
+        response['Retry-After'] = str(LIVE_HEARTBEAT_SECONDS)
+        return response
+    try:
+        subscriber, snapshot = live.subscribe(quiz_id)
+    except Exception:
+        live.release_stream()
+        raise
+    stream = _LiveStream(quiz_id, subscriber, snapshot, getattr(settings, "LIVE_STREAM_MAX_SECONDS", 60))
+    return _event_stream_response(stream)
+
+
+async def _alive_events(quiz_id, subscriber, snapshot):
+    try:
+        yield _sse_start(snapshot)
+        while True:
+            message = await subscriber.get(LIVE_HEARTBEAT_SECONDS)
+            if message is None:
+                return
+            if not message:
+                yield ": ping\n\n"
+                continue
+            yield _sse(message)
+    finally:
+        # Also runs when the viewer disconnects: Django cancels the stream
+        live.unsubscribe(quiz_id, subscriber)
+
+
+async def aquiz_leaderboard_stream(request, quiz_id):
+    """SSE stream under ASGI: viewers wait on the event loop, so neither a thread nor a stream slot is held."""
+    subscriber = live.AsyncSubscriber()
+    # Loading the ranking reads the store: in a thread, off the loop
+    _, snapshot = await sync_to_async(live.subscribe)(quiz_id, subscriber)
+    return _event_stream_response(_alive_events(quiz_id, subscriber, snapshot))
+
+
+def _event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 
 # GLOBAL LEADERBOARD
+
+
+def _page_number(request):
+    try:
+        return max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        return 1
+
+
 def leaderboard_list(request):
-    results = run_select(f"""
-    PREFIX ex: <{EX}>
-    SELECT ?entry ?player ?score ?quiz WHERE {{
-        ?entry a ex:QCM_Leaderboard ;
-               ex:playerName ?player ;
-               ex:score ?score ;
-               ex:forQuiz ?quiz .
-    }} ORDER BY DESC(?score)
-    """)
+    page = _page_number(request)
+    offset = (page - 1) * LEADERBOARD_PAGE_SIZE
+    # One row more than the page tells whether a next page exists.
+    rows = store.top(limit=LEADERBOARD_PAGE_SIZE + 1, offset=offset)
+    return _render_leaderboard(request, page, offset, rows)
+
+
+async def aleaderboard_list(request):
+    """leaderboard_list() for ASGI: the store is read in a thread, off the loop."""
+    page = _page_number(request)
+    offset = (page - 1) * LEADERBOARD_PAGE_SIZE
+    rows = await sync_to_async(store.top)(limit=LEADERBOARD_PAGE_SIZE + 1, offset=offset)
+    return _render_leaderboard(request, page, offset, rows)
+
+
+def _render_leaderboard(request, page, offset, rows):
+    has_next = len(rows) > LEADERBOARD_PAGE_SIZE
     entries = []
-    for r in results:
-        quiz_iri = r['quiz']['value']
-        quiz_id = quiz_iri.split('#')[-1]
-        title_res = run_select(f"""
-        PREFIX ex: <{EX}>
-        SELECT ?title WHERE {{ {iri(quiz_id)} ex:quizTitle ?title }}
-        """)
-        title = title_res[0]['title']['value'] if title_res else quiz_id
+    for rank, e in enumerate(rows[:LEADERBOARD_PAGE_SIZE], start=offset + 1):
         entries.append({
-            'playerName': r['player']['value'],
-            'score': r['score']['value'],
-            'quizTitle': title
+            'rank': rank,
+            'playerName': e.player_name,
+            'score': e.score,
+            'quizTitle': e.quiz_title or e.quiz_id
         })
-    return render(request, 'quiz/leaderboard.html', {'entries': entries})
+    return render(request, 'quiz/leaderboard.html', {
+        'entries': entries,
+        'page': page,
+        'has_previous': page > 1,
+        'has_next': has_next,
+        'previous_page': page - 1,
+        'next_page': page + 1,
+    })
 
 
 # UPDATE QUIZ
@@ -289,11 +394,15 @@ def update_quiz(request, quiz_id):
     quiz_iri = iri(quiz_id)
     if request.method == 'POST':
         new_title = request.POST['quizTitle'].strip()
-        run_update(f"""
+        renamed = run_update(f"""
         PREFIX ex: <{EX}>
         DELETE WHERE {{ {quiz_iri} ex:quizTitle ?o }} ;
-        INSERT DATA {{ {quiz_iri} ex:quizTitle "{new_title}" }}
+        INSERT DATA {{ {quiz_iri} ex:quizTitle {quiz_import.literal(new_title)} }}
         """)
+        if renamed:
+            # Copies locales seulement si Fuseki a bien le nouveau titre
+            store.rename_quiz(quiz_id, new_title)
+            quiz_cache.invalidate(quiz_id)
         return redirect('quiz_detail', quiz_id=quiz_id)
 
     results = run_select(f"""
@@ -309,17 +418,85 @@ def update_quiz(request, quiz_id):
 
 
 # DELETE QUIZ
+QUIZ_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def delete_quizzes(quiz_ids):
+    """Delete quizzes with their questions, choices and leaderboard entries.
+
+    Every pattern starts from the quiz IRIs bound by VALUES, so the cost
+    follows the size of the quizzes' own subgraphs, not of the dataset. The
+    operations go in one request, which Fuseki applies as one transaction.
+    """
+    values = " ".join(iri(quiz_id) for quiz_id in quiz_ids)
+    sparql_client.run_update(f"""
+    PREFIX ex: <{EX}>
+    DELETE {{ ?choice ?p ?o }} WHERE {{
+        VALUES ?quiz {{ {values} }}
+        ?quiz ex:hasQuestion ?question . ?question ex:hasChoice ?choice . ?choice ?p ?o
+    }} ;
+    DELETE {{ ?question ?p ?o }} WHERE {{
+        VALUES ?quiz {{ {values} }}
+        ?quiz ex:hasQuestion ?question . ?question ?p ?o
+    }} ;
+    DELETE {{ ?entry ?p ?o }} WHERE {{
+        VALUES ?quiz {{ {values} }}
+        ?entry ex:forQuiz ?quiz ; a ex:QCM_Leaderboard ; ?p ?o
+    }} ;
+    DELETE {{ ?quiz ?p ?o }} WHERE {{
+        VALUES ?quiz {{ {values} }}
+        ?quiz ?p ?o
+    }} ;
+    DELETE {{ ?s ?p ?quiz }} WHERE {{
+        VALUES ?quiz {{ {values} }}
+        ?s ?p ?quiz
+    }}
+    """)
+    # Copies locales ensuite : si la suppression échoue, elles restent valides.
+    # Le flusher ne réécrit rien pour un quiz absent de Fuseki.
+    PendingSubmission.objects.filter(quiz_id__in=quiz_ids).delete()
+    store.delete_quizzes(quiz_ids)
+    for quiz_id in quiz_ids:
+        quiz_cache.invalidate(quiz_id)
+        live.forget(quiz_id)
+
+
 def delete_quiz(request, quiz_id):
-    quiz_iri = iri(quiz_id)
     if request.method == 'POST':
-        run_update(f"""
-        PREFIX ex: <{EX}>
-        DELETE WHERE {{
-            {{ {quiz_iri} ?p ?o }} UNION
-            {{ ?q ex:hasQuestion {quiz_iri} }} UNION
-            {{ ?question ?p ?o . {quiz_iri} ex:hasQuestion ?question }} UNION
-            {{ ?c ?p2 ?o2 . ?question ex:hasChoice ?c }}
-        }}
-        """)
+        if QUIZ_ID_PATTERN.match(quiz_id):
+            try:
+                delete_quizzes([quiz_id])
+            except Exception as e:
+                print(f"Update failed: {e}")  # Log it
         return redirect('quiz_list')
-    return render(request, 'quiz/delete_quiz.html', {'quiz_id': quiz_id})
\ No newline at end of file
+    return render(request, 'quiz/delete_quiz.html', {'quiz_id': quiz_id})
+
+
+@require_http_methods(["POST"])
+def quiz_bulk_delete(request):
+    """Delete many quizzes: form field "quiz_ids" (repeated) or JSON {"quiz_ids": [...]}.
+
+    Ids are sent QUIZ_DELETE_BATCH_SIZE per update.
+    """
+    if request.content_type == 'application/json':
+        try:
+            quiz_ids = json.loads(request.body).get('quiz_ids', [])
+        except (ValueError, AttributeError):
+            return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+    else:
+        quiz_ids = request.POST.getlist('quiz_ids')
+    quiz_ids = list(dict.fromkeys(str(quiz_id) for quiz_id in quiz_ids))
+    invalid = [quiz_id for quiz_id in quiz_ids if not QUIZ_ID_PATTERN.match(quiz_id)]
+    if invalid or not quiz_ids:
+        return JsonResponse({'success': False, 'error': 'Invalid quiz ids', 'invalid': invalid}, status=400)
+
+    batch_size = getattr(settings, 'QUIZ_DELETE_BATCH_SIZE', 100)
+    deleted, errors = [], []
+    for start in range(0, len(quiz_ids), batch_size):
+        batch = quiz_ids[start:start + batch_size]
+        try:
+            delete_quizzes(batch)
+            deleted.extend(batch)
+        except Exception as e:
+            errors.append(str(e))
+    return JsonResponse({'success': not errors, 'deleted': deleted, 'errors': errors})
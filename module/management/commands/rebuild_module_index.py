@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from module import search_index, vector_index
+from module.sparql_client import get_modules
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les index de recherche des modules (plein texte et vectoriel) depuis Fuseki"
+
+    def handle(self, *args, **options):
+        modules = get_modules()
+        count = search_index.rebuild(modules)
+        vector_index.rebuild(modules)
+        self.stdout.write(self.style.SUCCESS(f"Index reconstruits : {count} modules"))
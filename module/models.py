@@ -1,3 +1,27 @@
 from django.db import models
 
-# Create your models here.
+
+class SearchDocument(models.Model):
+    """One module in the full-text index (see module/search_index.py)."""
+    uri = models.CharField(max_length=255, unique=True)
+    length = models.PositiveIntegerField(default=0)  # weighted token count, for BM25
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.uri
+
+
+class SearchPosting(models.Model):
+    """Occurrences of one term in one module."""
+    term = models.CharField(max_length=64)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name="postings")
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['term'], name='module_posting_term')]
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'document'], name='module_posting_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.document_id} ({self.frequency})"
@@ -0,0 +1,122 @@
+# module/search_index.py
+"""
+Index plein texte des modules (BM25), stocké dans SQLite.
+
+Chaque module est découpé en termes : minuscules, accents retirés (é -> e),
+pluriels en -s/-x ramenés au singulier, mots vides français ignorés. Les
+termes du nom du module et du cours comptent plus que ceux du contenu. insert_module, update_module et delete_module
+tiennent l'index à jour ; `manage.py rebuild_module_index` le reconstruit
+depuis Fuseki. Un index non vide n'est pas forcément complet (une édition
+après déploiement y ajoute un module) : rebuild() enregistre BUILD_NAME dans
+index_builds, et la recherche construit l'index tant que ce marqueur manque.
+
+search() lit uniquement les postings des termes de la requête et renvoie les
+URI classées, sans parcourir le contenu de tous les modules.
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count
+
+from trelix_app.utils import index_builds
+
+from .models import SearchDocument, SearchPosting
+
+BUILD_NAME = "module-bm25"
+
+# Paramètres BM25 usuels
+K1 = 1.2
+B = 0.75
+FIELD_WEIGHTS = {"nomModule": 3, "NomCours": 2, "Contenu": 1}
+
+STOPWORDS = frozenset("""
+a au aux avec ce ces cet cette dans de des du elle en et eux il ils je la le les leur leurs
+lui ma mais me meme mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses
+son sur ta te tes toi ton tu un une vos votre vous c d j l m n s t y est sont ete etre
+the of and to in for on is are with an
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def fold(text):
+    """Minuscules sans accents : "Éléments" -> "elements"."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def _singular(term):
+    # Pluriel français le plus courant : "matrices" et "matrice" donnent le même terme
+    if len(term) > 4 and term[-1] in "sx":
+        return term[:-1]
+    return term
+
+
+def tokenize(text):
+    return [_singular(t) for t in _TOKEN.findall(fold(text)) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _term_frequencies(module):
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(module.get(field, "")):
+            counts[term[:64]] += weight
+    return counts
+
+
+def index_module(uri, nomModule="", NomCours="", Contenu=""):
+    """(Ré)indexe un module ; remplace ses anciens postings."""
+    counts = _term_frequencies({"nomModule": nomModule, "NomCours": NomCours, "Contenu": Contenu})
+    with transaction.atomic():
+        document, _ = SearchDocument.objects.update_or_create(
+            uri=uri, defaults={"length": sum(counts.values())}
+        )
+        document.postings.all().delete()
+        SearchPosting.objects.bulk_create(
+            [SearchPosting(term=term, document=document, frequency=tf) for term, tf in counts.items()],
+            batch_size=500,
+        )
+
+
+def remove_module(uri):
+    SearchDocument.objects.filter(uri=uri).delete()
+
+
+def rebuild(modules):
+    """Remplace tout l'index par ``modules`` (dicts comme ceux de get_modules())."""
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for module in modules:
+            index_module(module["uri"], module.get("nomModule", ""), module.get("NomCours", ""),
+                         module.get("Contenu", ""))
+        index_builds.mark_built(BUILD_NAME)
+    return SearchDocument.objects.count()
+
+
+def search(query, limit=None):
+    """Renvoie [(uri, score)] classés par score BM25 décroissant."""
+    limit = limit or getattr(settings, "MODULE_SEARCH_LIMIT", 20)
+    terms = set(tokenize(query))
+    if not terms:
+        return []
+
+    stats = SearchDocument.objects.aggregate(n=Count("id"), avgdl=Avg("length"))
+    total_docs = stats["n"] or 0
+    avgdl = stats["avgdl"] or 1.0
+    if not total_docs:
+        return []
+
+    postings = list(
+        SearchPosting.objects.filter(term__in=terms)
+        .values_list("term", "document__uri", "document__length", "frequency")
+    )
+    df = Counter(term for term, _, _, _ in postings)
+    scores = Counter()
+    for term, uri, length, tf in postings:
+        idf = math.log(1 + (total_docs - df[term] + 0.5) / (df[term] + 0.5))
+        scores[uri] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avgdl))
+    return [(uri, round(score, 4)) for uri, score in scores.most_common(limit)]
@@ -1,22 +1,18 @@
 from huggingface_hub import InferenceClient
 from django.conf import settings
-from SPARQLWrapper import SPARQLWrapper, JSON
+from trelix_app.utils import hedged_search, index_builds, translation_cache
+from trelix_app.utils.sparql_client import run_select
+from . import search_index, vector_index
+from .sparql_client import get_modules, get_modules_by_uris
 import json
 import re
 
-FUSEKI_URL = "http://localhost:3030/trelix"
 BASE_URI = "http://example.com/module/"
 
-def semantic_search(query):
-    """
-    Utilise un modèle LLM pour convertir une requête en langage naturel
-    en une requête SPARQL, puis exécute cette requête sur Fuseki.
-    """
-    # Initialiser le client HuggingFace
-    client = InferenceClient(token=settings.HF_API_TOKEN)
-    
-    # Prompt pour générer la requête SPARQL
-    prompt = f"""Tu es un expert en SPARQL et en recherche sémantique. 
+LLM_MODEL = "deepseek-ai/DeepSeek-V3-0324"
+
+# Prompt pour générer la requête SPARQL ({query} : requête utilisateur)
+LLM_PROMPT = """Tu es un expert en SPARQL et en recherche sémantique. 
 Convertis la requête suivante en une requête SPARQL pour rechercher des modules d'apprentissage.
 
 Les modules ont ces propriétés:
@@ -52,64 +48,108 @@ WHERE {{
 
 Réponds UNIQUEMENT avec la requête SPARQL, sans markdown ni explication."""
 
+def semantic_search(query):
+    """
+    Recherche en langage naturel. Avec MODULE_SEARCH_BACKEND = "vector",
+    répond depuis l'index vectoriel local (aucun appel réseau) ; avec "llm",
+    fait écrire la requête SPARQL par un modèle LLM puis l'exécute sur Fuseki.
+    """
+    if getattr(settings, "MODULE_SEARCH_BACKEND", "vector") == "vector":
+        return vector_search(query)
+    return llm_search(query)
+
+def vector_search(query):
+    """
+    Plus proches voisins dans l'index vectoriel, puis détails des seuls
+    modules retenus (score de similarité ajouté).
+    """
     try:
+        vector_index.ensure_built(get_modules)
+        ranked = vector_index.search(query)
+        scores = dict(ranked)
+        modules = get_modules_by_uris([uri for uri, _ in ranked])
+        for module in modules:
+            module["score"] = scores[module["uri"]]
+        return modules
+    except Exception as e:
+        print(f"Erreur de l'index vectoriel: {e}")
+        return fallback_search(query)
+
+def llm_search(query):
+    """
+    Utilise un modèle LLM pour convertir une requête en langage naturel
+    en une requête SPARQL, puis exécute cette requête sur Fuseki.
+    fallback_search part en parallèle : hedged_search garde le résultat du
+    LLM s'il arrive dans le budget, sinon celui de la recherche par mot-clé.
+    """
+    return hedged_search.run("module", lambda: llm_modules(query), lambda: fallback_search(query))
+
+def llm_modules(query):
+    """
+    Chemin LLM seul (les traductions déjà faites, et qui ont fonctionné, sont
+    relues depuis translation_cache) ; les erreurs remontent à hedged_search.
+    """
+    def generate():
+        # Initialiser le client HuggingFace
+        client = InferenceClient(token=settings.HF_API_TOKEN, timeout=hedged_search.provider_timeout())
+
         # Appel au modèle DeepSeek
         completion = client.chat.completions.create(
-            model="deepseek-ai/DeepSeek-V3-0324",
-            messages=[{"role": "user", "content": prompt}],
+            model=LLM_MODEL,
+            messages=[{"role": "user", "content": LLM_PROMPT.format(query=query)}],
             max_tokens=500
         )
-        
+
         sparql_query = completion.choices[0].message["content"].strip()
-        
+
         # Nettoyer la réponse (enlever markdown si présent)
-        sparql_query = re.sub(r'```sparql\n|```\n|```', '', sparql_query).strip()
-        
+        return re.sub(r'```sparql\n|```\n|```', '', sparql_query).strip()
+
+    def execute(sparql_query):
         print(f"Generated SPARQL Query:\n{sparql_query}")
-        
         # Exécuter la requête SPARQL sur Fuseki
-        results = execute_sparql_query(sparql_query)
-        
-        return results
-        
-    except Exception as e:
-        print(f"Erreur lors de la recherche sémantique: {e}")
-        # Fallback: recherche simple par mot-clé
-        return fallback_search(query)
+        return execute_sparql_query(sparql_query)
+
+    # Mise en cache seulement si la requête s'est exécutée sans erreur
+    return translation_cache.translate("module", query, generate, execute, LLM_MODEL, LLM_PROMPT)
 
 def execute_sparql_query(sparql_query):
     """
     Exécute une requête SPARQL sur Fuseki et retourne les résultats formatés
+    (une requête générée invalide lève une exception)
+    """
+    results = run_select(sparql_query)
+
+    modules = []
+    for r in results:
+        module_data = {
+            "uri": r.get("module", {}).get("value", "").replace(BASE_URI, ""),
+            "nomModule": r.get("nomModule", {}).get("value", ""),
+            "NomCours": r.get("NomCours", {}).get("value", ""),
+            "Contenu": r.get("Contenu", {}).get("value", ""),
+        }
+        modules.append(module_data)
+
+    return modules
+
+def fallback_search(query):
+    """
+    Recherche par mot-clé en cas d'échec de la recherche sémantique :
+    classement BM25 dans l'index local, puis détails des seuls meilleurs modules.
     """
     try:
-        sparql = SPARQLWrapper(f"{FUSEKI_URL}/query")
-        sparql.setQuery(sparql_query)
-        sparql.setReturnFormat(JSON)
-        
-        results = sparql.query().convert()
-        
-        modules = []
-        for r in results["results"]["bindings"]:
-            module_data = {
-                "uri": r.get("module", {}).get("value", "").replace(BASE_URI, ""),
-                "nomModule": r.get("nomModule", {}).get("value", ""),
-                "NomCours": r.get("NomCours", {}).get("value", ""),
-                "Contenu": r.get("Contenu", {}).get("value", ""),
-            }
-            modules.append(module_data)
-        
-        return modules
-        
+        # Construit une fois depuis Fuseki (marqueur IndexBuild), pas « si vide »
+        index_builds.ensure(search_index.BUILD_NAME, lambda: search_index.rebuild(get_modules()))
+        ranked = search_index.search(query)
+        return get_modules_by_uris([uri for uri, _ in ranked])
     except Exception as e:
-        print(f"Erreur lors de l'exécution de la requête SPARQL: {e}")
-        return []
+        print(f"Erreur de l'index de recherche, repli sur REGEX: {e}")
+        return regex_search(query)
 
-def fallback_search(query):
+def regex_search(query):
     """
-    Recherche simple par mot-clé en cas d'échec de la recherche sémantique
+    Recherche REGEX directement dans Fuseki (parcourt le contenu de tous les modules)
     """
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/query")
-    
     # Échapper les caractères spéciaux pour REGEX
     safe_query = query.replace('\\', '\\\\').replace('"', '\\"')
     
@@ -129,13 +169,10 @@ def fallback_search(query):
     }}
     """
     
-    sparql.setQuery(sparql_query)
-    sparql.setReturnFormat(JSON)
-    
     try:
-        results = sparql.query().convert()
+        results = run_select(sparql_query)
         modules = []
-        for r in results["results"]["bindings"]:
+        for r in results:
             modules.append({
                 "uri": r.get("module", {}).get("value", "").replace(BASE_URI, ""),
                 "nomModule": r.get("nomModule", {}).get("value", ""),
@@ -1,8 +1,12 @@
-from SPARQLWrapper import SPARQLWrapper, JSON, POST
 import re
 
-FUSEKI_URL = "http://localhost:3030/trelix"
+from trelix_app.utils.sparql_client import arun_select, run_select, run_update
+
+from . import search_index, vector_index
+
 BASE_URI = "http://example.com/module/"
+LIST_CACHE_TTL = 300  # secondes, cache partagé des listes (voir sparql_cache)
+LIST_EXCERPT_LENGTH = 300  # caractères de Contenu lus pour l'aperçu de la liste
 
 def clean_literal(value):
     """Nettoie une valeur textuelle basique pour SPARQL (échappe les guillemets)."""
@@ -19,9 +23,6 @@ def clean_alpha(value):
     return ''.join(re.findall(r'[A-Za-z]', value)) 
 
 def insert_module(uri, nomModule, NomCours, Contenu):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
-
     safe_nomModule = clean_literal(nomModule)
     safe_NomCours = clean_literal(NomCours)
 
@@ -38,25 +39,122 @@ def insert_module(uri, nomModule, NomCours, Contenu):
     }}
     """
 
-    sparql.setQuery(query)
-    sparql.query()
+    run_update(query)
+    _reindex(uri, nomModule, NomCours, Contenu)
 
-def get_modules():
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/query")
-    sparql.setQuery(f"""
+MODULES_QUERY = """
     PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
     SELECT ?module ?nomModule ?NomCours ?Contenu
+    WHERE {
+        ?module a ex:Module ;
+                ex:nomModule ?nomModule ;
+                ex:NomCours ?NomCours ;
+                ex:Contenu ?Contenu .
+    }
+    """
+
+def get_modules():
+    """Tous les modules, contenu complet compris (reconstruction des index de recherche)."""
+    results = run_select(MODULES_QUERY, app="module", cache_ttl=LIST_CACHE_TTL)
+    return _modules_from_bindings(results)
+
+# Page de la liste : seulement un aperçu du contenu (le texte complet reste
+# dans Fuseki), triée par URI pour que LIMIT/OFFSET soit stable
+MODULES_PAGE_QUERY = """
+    PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
+    SELECT ?module ?nomModule ?NomCours (SUBSTR(?Contenu, 1, {excerpt}) AS ?apercu)
     WHERE {{
         ?module a ex:Module ;
                 ex:nomModule ?nomModule ;
                 ex:NomCours ?NomCours ;
                 ex:Contenu ?Contenu .
     }}
+    ORDER BY ?module
+    LIMIT {limit} OFFSET {offset}
+    """
+
+MODULES_COUNT_QUERY = """
+    PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
+    SELECT (COUNT(?module) AS ?total)
+    WHERE {
+        ?module a ex:Module ;
+                ex:nomModule ?nomModule ;
+                ex:NomCours ?NomCours ;
+                ex:Contenu ?Contenu .
+    }
+    """
+
+def _page_query(limit, offset):
+    return MODULES_PAGE_QUERY.format(excerpt=LIST_EXCERPT_LENGTH, limit=int(limit), offset=int(offset))
+
+def get_modules_page(limit, offset=0):
+    results = run_select(_page_query(limit, offset), app="module", cache_ttl=LIST_CACHE_TTL)
+    return _module_rows_from_bindings(results)
+
+async def aget_modules_page(limit, offset=0):
+    """Version async de get_modules_page() pour les vues async (ASGI)."""
+    results = await arun_select(_page_query(limit, offset), app="module", cache_ttl=LIST_CACHE_TTL)
+    return _module_rows_from_bindings(results)
+
+def count_modules():
+    results = run_select(MODULES_COUNT_QUERY, app="module", cache_ttl=LIST_CACHE_TTL)
+    return int(results[0]["total"]["value"]) if results else 0
+
+async def acount_modules():
+    results = await arun_select(MODULES_COUNT_QUERY, app="module", cache_ttl=LIST_CACHE_TTL)
+    return int(results[0]["total"]["value"]) if results else 0
+
+def get_module_by_uri(uri):
+    """Un seul module (URI "safe"), lu directement par son IRI ; None s'il n'existe pas."""
+    results = run_select(f"""
+    PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
+    SELECT ?nomModule ?NomCours ?Contenu
+    WHERE {{
+        <{BASE_URI}{uri}> ex:nomModule ?nomModule ;
+                ex:NomCours ?NomCours ;
+                ex:Contenu ?Contenu .
+    }}
+    LIMIT 1
+    """)
+    if not results:
+        return None
+    r = results[0]
+    return {
+        "uri": uri,
+        "nomModule": r["nomModule"]["value"],
+        "NomCours": r["NomCours"]["value"],
+        "Contenu": r["Contenu"]["value"],
+    }
+
+def get_modules_by_uris(uris):
+    """Détails des modules ``uris`` (URI "safe"), dans l'ordre demandé, en une requête."""
+    if not uris:
+        return []
+    values = " ".join(f"<{BASE_URI}{uri}>" for uri in uris)
+    results = run_select(f"""
+    PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
+    SELECT ?module ?nomModule ?NomCours ?Contenu
+    WHERE {{
+        VALUES ?module {{ {values} }}
+        ?module ex:nomModule ?nomModule ;
+                ex:NomCours ?NomCours ;
+                ex:Contenu ?Contenu .
+    }}
     """)
-    sparql.setReturnFormat(JSON)
-    results = sparql.query().convert()
+    by_uri = {m["uri"]: m for m in _modules_from_bindings(results)}
+    return [by_uri[uri] for uri in uris if uri in by_uri]
+
+def _reindex(uri, nomModule, NomCours, Contenu):
+    # Les index de recherche sont des caches locaux : une erreur ne doit pas bloquer l'écriture
+    try:
+        search_index.index_module(uri, nomModule or "", NomCours or "", Contenu or "")
+        vector_index.upsert(uri, nomModule or "", NomCours or "", Contenu or "")
+    except Exception as e:
+        print(f"Erreur d'indexation du module {uri}: {e}")
+
+def _modules_from_bindings(results):
     modules = []
-    for r in results["results"]["bindings"]:
+    for r in results:
         modules.append({
             "uri": r["module"]["value"].replace(BASE_URI, ""),  # URI “safe” pour Django
             "nomModule": r["nomModule"]["value"],
@@ -65,6 +163,14 @@ def get_modules():
         })
     return modules
 
+def _module_rows_from_bindings(results):
+    return [{
+        "uri": r["module"]["value"].replace(BASE_URI, ""),
+        "nomModule": r["nomModule"]["value"],
+        "NomCours": r["NomCours"]["value"],
+        "apercu": r["apercu"]["value"],
+    } for r in results]
+
 def escape_literal(text):
     """
     Prépare un texte pour SPARQL : échappe guillemets et backslashes.
@@ -75,13 +181,10 @@ def escape_literal(text):
     return text
 
 def update_module(uri, nomModule=None, NomCours=None, Contenu=None):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
-
-    # Préparer les valeurs
-    nomModule = escape_literal(nomModule)
-    NomCours = escape_literal(NomCours)
-    Contenu = escape_literal(Contenu)
+    # Préparer les valeurs (les index locaux gardent le texte brut)
+    safe_nomModule = escape_literal(nomModule)
+    safe_NomCours = escape_literal(NomCours)
+    safe_Contenu = escape_literal(Contenu)
 
     query = f"""
     PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
@@ -93,12 +196,12 @@ def update_module(uri, nomModule=None, NomCours=None, Contenu=None):
     }}
     INSERT {{
     """
-    if nomModule:
-        query += f'        <{BASE_URI}{uri}> ex:nomModule "{nomModule}" .\n'
-    if NomCours:
-        query += f'        <{BASE_URI}{uri}> ex:NomCours "{NomCours}" .\n'
-    if Contenu:
-        query += f'        <{BASE_URI}{uri}> ex:Contenu """{Contenu}""" .\n'  # triple quotes pour multiline
+    if safe_nomModule:
+        query += f'        <{BASE_URI}{uri}> ex:nomModule "{safe_nomModule}" .\n'
+    if safe_NomCours:
+        query += f'        <{BASE_URI}{uri}> ex:NomCours "{safe_NomCours}" .\n'
+    if safe_Contenu:
+        query += f'        <{BASE_URI}{uri}> ex:Contenu """{safe_Contenu}""" .\n'  # triple quotes pour multiline
 
     query += f"""
     }}
@@ -109,36 +212,35 @@ def update_module(uri, nomModule=None, NomCours=None, Contenu=None):
     }}
     """
 
-    sparql.setQuery(query)
-    sparql.query()
+    run_update(query)
+    _reindex(uri, nomModule, NomCours, Contenu)
 
 
 
 def delete_module(uri):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
-    sparql.setQuery(f"""
+    run_update(f"""
     PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
     DELETE WHERE {{
         <{BASE_URI}{uri}> ?p ?o
     }}
     """)
-    sparql.query()
+    try:
+        search_index.remove_module(uri)
+        vector_index.remove(uri)
+    except Exception as e:
+        print(f"Erreur d'indexation du module {uri}: {e}")
 
 def get_module_content(uri):
     """
     Récupère le contenu d'un module depuis Fuseki
     """
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/query")
-    sparql.setQuery(f"""
+    results = run_select(f"""
     PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
     SELECT ?Contenu
     WHERE {{
         <{BASE_URI}{uri}> ex:Contenu ?Contenu .
     }}
     """)
-    sparql.setReturnFormat(JSON)
-    results = sparql.query().convert()
-    if results["results"]["bindings"]:
-        return results["results"]["bindings"][0]["Contenu"]["value"]
+    if results:
+        return results[0]["Contenu"]["value"]
     return ""
@@ -1,3 +1,118 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from trelix_app.utils import index_builds, rdflib_store, sparql_client
+
+from . import search_index, semantic_search, vector_index
+from .sparql_client import BASE_URI, update_module
+
+ONTOLOGY = "http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#"
+
+MODULES = [
+    {"uri": "algebre", "nomModule": "Algèbre linéaire", "NomCours": "Mathématiques",
+     "Contenu": "Matrices, vecteurs et espaces vectoriels."},
+    {"uri": "histoire", "nomModule": "Révolution française", "NomCours": "Histoire",
+     "Contenu": "Les causes de la révolution et la chute de la monarchie."},
+    {"uri": "python", "nomModule": "Programmation Python", "NomCours": "Informatique",
+     "Contenu": "Listes, dictionnaires et matrices avec NumPy ; un peu d'histoire."},
+]
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        search_index.rebuild(MODULES)
+
+    def test_tokenize_folds_accents_plurals_and_stopwords(self):
+        self.assertEqual(search_index.tokenize("Les Matrices et l'Algèbre"), ["matrice", "algebre"])
+
+    def test_name_matches_rank_above_content_matches(self):
+        self.assertEqual([uri for uri, _ in search_index.search("histoire")], ["histoire", "python"])
+
+    def test_only_modules_containing_a_term_are_returned(self):
+        self.assertEqual({uri for uri, _ in search_index.search("matrices")}, {"algebre", "python"})
+        self.assertEqual([uri for uri, _ in search_index.search("python")], ["python"])
+
+    def test_reindex_and_remove(self):
+        search_index.index_module("histoire", "Histoire moderne", "Histoire", "matrice de lecture")
+        self.assertIn("histoire", [uri for uri, _ in search_index.search("matrice")])
+        search_index.remove_module("histoire")
+        self.assertNotIn("histoire", [uri for uri, _ in search_index.search("matrice")])
+
+    def test_no_match(self):
+        self.assertEqual(search_index.search("chimie"), [])
+
+
+class VectorIndexTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "vectors.npz")
+        settings_override = override_settings(MODULE_VECTOR_INDEX_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        vector_index.rebuild(MODULES)
+
+    def test_closest_module_first(self):
+        ranked = vector_index.search("révolution monarchie")
+        self.assertEqual(ranked[0][0], "histoire")
+        self.assertGreater(ranked[0][1], 0.1)
+
+    def test_character_ngrams_match_word_variants(self):
+        self.assertEqual(vector_index.search("programmer")[0][0], "python")
+
+    def test_upsert_and_remove_persist_to_the_file(self):
+        vector_index.upsert("chimie", "Chimie organique", "Sciences", "Molécules et réactions")
+        vector_index.remove("algebre")
+        vector_index._state = None  # comme un autre processus : relu depuis le fichier
+        self.assertEqual(vector_index.search("molécules")[0][0], "chimie")
+        self.assertNotIn("algebre", [uri for uri, _ in vector_index.search("vectoriels")])
+
+    def test_rebuild_marks_the_index_built(self):
+        self.assertTrue(index_builds.is_built(vector_index.build_name()))
+
+
+@override_settings(SPARQL_BACKEND="rdflib", SPARQL_RDFLIB_SOURCES=[])
+class BootstrapTestCase(TestCase):
+    """Une édition après déploiement ne doit pas masquer les modules plus anciens."""
+
+    def setUp(self):
+        rdflib_store.close_all()
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(MODULE_VECTOR_INDEX_PATH=os.path.join(directory, "vectors.npz"))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for module in MODULES:
+            sparql_client.run_update(f"""
+            PREFIX ex: <{ONTOLOGY}>
+            INSERT DATA {{ <{BASE_URI}{module['uri']}> a ex:Module ; ex:nomModule "{module['nomModule']}" ;
+                           ex:NomCours "{module['NomCours']}" ; ex:Contenu "{module['Contenu']}" . }}
+            """)
+
+
+class KeywordSearchBootstrapTests(BootstrapTestCase):
+    def test_keyword_search_builds_the_index_once(self):
+        index_builds.forget(search_index.BUILD_NAME)
+        # Module édité après le déploiement : l'index n'est plus vide
+        search_index.index_module("python", "Programmation Python", "Informatique", "")
+        self.assertEqual([m["uri"] for m in semantic_search.fallback_search("révolution")], ["histoire"])
+        self.assertTrue(index_builds.is_built(search_index.BUILD_NAME))
+
+    def test_edit_indexes_the_raw_text(self):
+        with mock.patch.object(search_index, "index_module") as index_module:
+            update_module("python", 'Le "vrai" Python', "Informatique", "C:\\chemin")
+        index_module.assert_called_once_with("python", 'Le "vrai" Python', "Informatique", "C:\\chemin")
+
+
+class VectorSearchBootstrapTests(BootstrapTestCase):
+    def test_vector_search_builds_the_index_once(self):
+        index_builds.forget(vector_index.build_name())
+        vector_index.upsert("python", "Programmation Python", "Informatique", "")
+        self.assertEqual(semantic_search.vector_search("matrices vecteurs")[0]["uri"], "algebre")
+        self.assertTrue(index_builds.is_built(vector_index.build_name()))
@@ -0,0 +1,238 @@
+# module/vector_index.py
+"""
+Index vectoriel local pour la recherche sémantique des modules (sans LLM).
+
+Chaque module devient un vecteur TF-IDF « haché » : les termes de
+search_index.tokenize, leurs bigrammes et les 4-grammes de caractères de
+chaque terme (pour rapprocher les variantes d'un même mot) sont projetés
+dans MODULE_VECTOR_DIM dimensions par crc32, sans vocabulaire à maintenir.
+
+Les vecteurs sont les lignes d'une matrice NumPy float32, enregistrée
+(compressée, les lignes sont creuses) dans MODULE_VECTOR_INDEX_PATH (.npz).
+Une recherche est un produit matrice-vecteur (cosinus, force brute),
+largement suffisant pour quelques milliers de modules.
+insert_module, update_module et delete_module mettent la ligne concernée à
+jour ; les autres processus rechargent le fichier quand il change.
+
+Chaque écriture relit le fichier, le modifie puis le remplace : elle se fait
+sous un verrou de fichier (flock sur ``<index>.lock``), partagé par tous les
+processus (workers gunicorn, commandes manage.py), et pas seulement par les
+threads d'un processus. Le fichier vit par défaut sous BASE_DIR/data, hors
+du code et des médias servis.
+
+Comme pour l'index BM25, « non vide » ne veut pas dire « construit » :
+rebuild() enregistre un marqueur IndexBuild (lié à MODULE_VECTOR_DIM) et
+ensure_built() reconstruit l'index tant qu'il manque ou que le fichier a
+disparu.
+"""
+import os
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+
+from trelix_app.utils import index_builds
+
+from .search_index import FIELD_WEIGHTS, tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows (développement) : verrou du processus seulement
+    fcntl = None
+
+_lock = threading.Lock()
+_state = None  # dict: uris, matrix, df, stamp, weighted (cache de recherche)
+
+
+def _dim():
+    return getattr(settings, "MODULE_VECTOR_DIM", 2048)
+
+
+def _path():
+    return str(getattr(settings, "MODULE_VECTOR_INDEX_PATH",
+                       os.path.join(settings.BASE_DIR, "data", "module_vectors.npz")))
+
+
+def build_name():
+    # Changer MODULE_VECTOR_DIM invalide l'index : nouveau marqueur
+    return f"module-vectors-{_dim()}"
+
+
+@contextmanager
+def _write_lock():
+    """Verrou des écritures : threads de ce processus et autres processus."""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        path = _path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _features(text):
+    terms = tokenize(text)
+    features = list(terms)
+    features += [f"{a}_{b}" for a, b in zip(terms, terms[1:])]
+    for term in terms:
+        padded = f"#{term}#"
+        features += [padded[i:i + 4] for i in range(len(padded) - 3)]
+    return features
+
+
+def vectorize(fields):
+    """Vecteur de fréquences (log) haché pour un dict de champs -> np.float32[dim]."""
+    dim = _dim()
+    vector = np.zeros(dim, dtype=np.float32)
+    for field, weight in FIELD_WEIGHTS.items():
+        for feature in _features(fields.get(field, "")):
+            h = zlib.crc32(feature.encode("utf-8"))
+            # Le bit de poids fort donne le signe : les collisions s'annulent en moyenne
+            vector[h % dim] += weight if h & 0x80000000 else -weight
+    return np.sign(vector) * np.log1p(np.abs(vector))
+
+
+def _empty():
+    return {
+        "uris": [],
+        "matrix": np.zeros((0, _dim()), dtype=np.float32),
+        "df": np.zeros(_dim(), dtype=np.float32),
+        "stamp": None,
+        "weighted": None,
+    }
+
+
+def _stamp(path):
+    # os.replace crée un nouvel inode : une réécriture se voit même à mtime égal
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _load():
+    """État courant, rechargé si un autre processus a réécrit le fichier."""
+    global _state
+    path = _path()
+    stamp = _stamp(path)
+    if _state is not None and _state["stamp"] == stamp:
+        return _state
+    if stamp is None:
+        _state = _empty()
+        return _state
+    with np.load(path, allow_pickle=False) as data:
+        matrix = data["matrix"]
+        if matrix.shape[1] != _dim():
+            # MODULE_VECTOR_DIM a changé : l'index doit être reconstruit
+            _state = _empty()
+            return _state
+        _state = {
+            "uris": [str(u) for u in data["uris"]],
+            "matrix": matrix.astype(np.float32),
+            "df": data["df"].astype(np.float32),
+            "stamp": stamp,
+            "weighted": None,
+        }
+    return _state
+
+
+def _save(state):
+    path = _path()
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npz")
+    with os.fdopen(fd, "wb") as f:
+        np.savez_compressed(f, uris=np.array(state["uris"], dtype=str), matrix=state["matrix"], df=state["df"])
+    os.replace(tmp, path)
+    state["stamp"] = _stamp(path)
+    state["weighted"] = None
+
+
+def upsert(uri, nomModule="", NomCours="", Contenu=""):
+    vector = vectorize({"nomModule": nomModule, "NomCours": NomCours, "Contenu": Contenu})
+    with _write_lock():
+        state = _load()
+        if uri in state["uris"]:
+            row = state["uris"].index(uri)
+            state["df"] -= state["matrix"][row] != 0
+            state["matrix"][row] = vector
+        else:
+            state["uris"].append(uri)
+            state["matrix"] = np.vstack([state["matrix"], vector[np.newaxis, :]])
+        state["df"] += vector != 0
+        _save(state)
+
+
+def remove(uri):
+    with _write_lock():
+        state = _load()
+        if uri not in state["uris"]:
+            return
+        row = state["uris"].index(uri)
+        state["df"] -= state["matrix"][row] != 0
+        state["matrix"] = np.delete(state["matrix"], row, axis=0)
+        del state["uris"][row]
+        _save(state)
+
+
+def rebuild(modules):
+    """Recalcule toute la matrice à partir de ``modules`` (dicts comme get_modules())."""
+    global _state
+    state = _empty()
+    vectors = [vectorize(m) for m in modules]
+    state["uris"] = [m["uri"] for m in modules]
+    if vectors:
+        state["matrix"] = np.vstack(vectors).astype(np.float32)
+        state["df"] = (state["matrix"] != 0).sum(axis=0).astype(np.float32)
+    with _write_lock():
+        _save(state)
+        _state = state
+    index_builds.mark_built(build_name())
+    return len(state["uris"])
+
+
+def ensure_built(load_modules):
+    """Construit l'index depuis ``load_modules()`` s'il ne l'a jamais été (ou si le fichier a disparu)."""
+    if not os.path.exists(_path()):
+        index_builds.forget(build_name())
+    index_builds.ensure(build_name(), lambda: rebuild(load_modules()))
+
+
+def _weighted(state):
+    # Matrice pondérée par l'IDF et normalisée, recalculée seulement après une écriture
+    if state["weighted"] is None:
+        n = len(state["uris"])
+        idf = (np.log((1 + n) / (1 + state["df"])) + 1).astype(np.float32)
+        weighted = state["matrix"] * idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        state["weighted"] = (weighted / norms, idf)
+    return state["weighted"]
+
+
+def search(query, limit=None, min_score=None):
+    """Renvoie [(uri, cosinus)] des modules les plus proches de ``query``."""
+    limit = limit or getattr(settings, "MODULE_SEARCH_LIMIT", 20)
+    min_score = getattr(settings, "MODULE_VECTOR_MIN_SCORE", 0.05) if min_score is None else min_score
+    with _lock:
+        state = _load()
+        if not state["uris"]:
+            return []
+        matrix, idf = _weighted(state)
+        uris = list(state["uris"])
+    q = vectorize({"Contenu": query}) * idf
+    norm = np.linalg.norm(q)
+    if norm == 0:
+        return []
+    scores = matrix @ (q / norm)
+    top = np.argsort(-scores)[:limit]
+    return [(uris[i], round(float(scores[i]), 4)) for i in top if scores[i] > min_score]
@@ -5,7 +5,8 @@ from django.shortcuts import render, redirect
 from django.conf import settings
 from django.http import JsonResponse
 
-from .sparql_client import insert_module, get_modules, update_module, delete_module, get_module_content
+from trelix_app.utils.pagination import apaginate, paginate
+from .sparql_client import insert_module, get_module_by_uri, get_modules_page, aget_modules_page, count_modules, acount_modules, update_module, delete_module, get_module_content
 from .semantic_search import semantic_search
 from huggingface_hub import InferenceClient
 import requests
@@ -17,9 +18,14 @@ def generate_uri(nomModule):
     safe_name = nomModule.replace(" ", "_")
     return f"{safe_name}{uuid.uuid4().hex[:8]}"
 
-# Liste de tous les modules
+# Liste des modules, page par page
 def module_list(request):
-    modules = get_modules()
+    modules = paginate(request, get_modules_page, count_modules)
+    return render(request, "module/list.html", {"modules": modules})
+
+# Même liste sous ASGI (trelix_app/urls_asgi.py) : n'occupe pas de thread pendant l'appel Fuseki
+async def amodule_list(request):
+    modules = await apaginate(request, aget_modules_page, acount_modules)
     return render(request, "module/list.html", {"modules": modules})
 
 # Création d'un module
@@ -42,9 +48,6 @@ def module_update(request):
         return redirect("module_list")
     uri = urllib.parse.unquote(uri)  # décoder l'URI
 
-    modules = get_modules()
-    module = next((m for m in modules if m["uri"] == uri), None)
-
     if request.method == "POST":
         nomModule = request.POST["nomModule"]
         NomCours = request.POST["NomCours"]
@@ -53,6 +56,7 @@ def module_update(request):
         update_module(uri, nomModule, NomCours, Contenu)
         return redirect("module_list")
 
+    module = get_module_by_uri(uri)
     return render(request, "module/form.html", {"module": module})
 
 # Suppression d'un module
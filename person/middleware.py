@@ -1,11 +1,30 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
 from .auth_backend import SPARQLPerson
 
 
 class SPARQLPersonAuthMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
     
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self._attach_user(request)
+        response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        # Loading the session hits the database, which must not run on the event loop
+        await sync_to_async(self._attach_user)(request)
+        return await self.get_response(request)
+
+    def _attach_user(self, request):
         # Check if session has person data
         if 'person_uri' in request.session:
             person_uri = request.session.get('person_uri')
@@ -20,7 +39,3 @@ class SPARQLPersonAuthMiddleware:
             # Use AnonymousUser for unauthenticated users
             from django.contrib.auth.models import AnonymousUser
             request.user = AnonymousUser()
-        
-        response = self.get_response(request)
-        return response
-
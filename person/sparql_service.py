@@ -1,4 +1,4 @@
-from SPARQLWrapper import SPARQLWrapper, JSON, POST
+from trelix_app.utils import sparql_client
 from typing import List, Dict, Optional
 import time
 import hashlib
@@ -16,28 +16,22 @@ class PersonSPARQLService:
     PERSON_ROLE_PROPERTY = f"{ONTOLOGY_NS}personRole"
     ROLE_CLASS = f"{ALT_ONTOLOGY_NS}Role"
     
-    def __init__(self, endpoint: str = "http://localhost:3030/trelix/sparql"):
+    def __init__(self, endpoint: str = None):
+        # Only the dataset URL is kept: queries go through the shared,
+        # thread-safe sparql_client, so one instance can serve many threads.
         self.endpoint = endpoint
-        self.sparql = SPARQLWrapper(endpoint)
-        self.sparql.setReturnFormat(JSON)
-        update_endpoint = endpoint.replace('/sparql', '/update')
-        self.sparql_update = SPARQLWrapper(update_endpoint)
-        self.sparql_update.setMethod(POST)
+        self.dataset_url = endpoint.rsplit('/', 1)[0] if endpoint else None
     
-    def _execute_query(self, query: str, method: str = "GET") -> Dict:
-        self.sparql.setMethod(method)
-        self.sparql.setQuery(query)
+    def _execute_query(self, query: str) -> Dict:
         try:
-            results = self.sparql.query().convert()
-            return results
+            return sparql_client.query(query, self.dataset_url)
         except Exception as e:
             print(f"SPARQL Query Error: {e}")
             return {"results": {"bindings": []}}
     
     def _execute_update(self, update_query: str) -> bool:
         try:
-            self.sparql_update.setQuery(update_query)
-            self.sparql_update.query()
+            sparql_client.run_update(update_query, self.dataset_url)
             return True
         except Exception as e:
             print(f"SPARQL Update Error: {e}")
@@ -1,17 +1,16 @@
-from SPARQLWrapper import SPARQLWrapper, POST
 import uuid
 
-FUSEKI_URL = "http://localhost:3030/trelix"
+from trelix_app.utils.sparql_client import run_select, run_update
+
 BASE_URI = "http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#"
+LIST_CACHE_TTL = 300  # secondes, cache partagé des listes (voir sparql_cache)
 
 def generate_uri(label):
     safe = label.replace(" ", "_")
     return f"{safe}{uuid.uuid4().hex[:8]}"
 
 def insert_preference(uri, langue, formatCours, periode, vacances, modeEtude):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
-    sparql.setQuery(f"""
+    run_update(f"""
     PREFIX ex: <{BASE_URI}>
     INSERT DATA {{
         <{BASE_URI}{uri}> a ex:Preference ;
@@ -22,12 +21,10 @@ def insert_preference(uri, langue, formatCours, periode, vacances, modeEtude):
             ex:modeEtude "{modeEtude}" .
     }}
     """)
-    sparql.query()
 
 
 def get_preferences():
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/query")
-    sparql.setQuery(f"""
+    results = run_select(f"""
     PREFIX ex: <{BASE_URI}>
     SELECT ?uri ?langue ?formatCours ?periode ?vacances ?modeEtude
     WHERE {{
@@ -38,11 +35,75 @@ def get_preferences():
             ex:vacances ?vacances ;
             ex:modeEtude ?modeEtude .
     }}
+    """, app="preference", cache_ttl=LIST_CACHE_TTL)
+    return _preferences_from_bindings(results)
+
+
+def get_preference_by_uri(uri):
+    """Une seule préférence (``uri`` est l'IRI complète), ou None si elle n'existe pas."""
+    results = run_select(f"""
+    PREFIX ex: <{BASE_URI}>
+    SELECT ?langue ?formatCours ?periode ?vacances ?modeEtude
+    WHERE {{
+      <{uri}> ex:langue ?langue ;
+            ex:formatCours ?formatCours ;
+            ex:periode ?periode ;
+            ex:vacances ?vacances ;
+            ex:modeEtude ?modeEtude .
+    }}
+    LIMIT 1
     """)
-    sparql.setReturnFormat("json")
-    results = sparql.query().convert()
+    if not results:
+        return None
+    r = results[0]
+    return {
+        "uri": uri,
+        "langue": r["langue"]["value"],
+        "formatCours": r["formatCours"]["value"],
+        "periode": r["periode"]["value"],
+        "vacances": r["vacances"]["value"],
+        "modeEtude": r["modeEtude"]["value"],
+    }
+
+
+# Page de la liste, triée par URI pour que LIMIT/OFFSET reste stable
+def get_preferences_page(limit, offset=0):
+    results = run_select(f"""
+    PREFIX ex: <{BASE_URI}>
+    SELECT ?uri ?langue ?formatCours ?periode ?vacances ?modeEtude
+    WHERE {{
+      ?uri a ex:Preference ;
+            ex:langue ?langue ;
+            ex:formatCours ?formatCours ;
+            ex:periode ?periode ;
+            ex:vacances ?vacances ;
+            ex:modeEtude ?modeEtude .
+    }}
+    ORDER BY ?uri
+    LIMIT {int(limit)} OFFSET {int(offset)}
+    """, app="preference", cache_ttl=LIST_CACHE_TTL)
+    return _preferences_from_bindings(results)
+
+
+def count_preferences():
+    results = run_select(f"""
+    PREFIX ex: <{BASE_URI}>
+    SELECT (COUNT(?uri) AS ?total)
+    WHERE {{
+      ?uri a ex:Preference ;
+            ex:langue ?langue ;
+            ex:formatCours ?formatCours ;
+            ex:periode ?periode ;
+            ex:vacances ?vacances ;
+            ex:modeEtude ?modeEtude .
+    }}
+    """, app="preference", cache_ttl=LIST_CACHE_TTL)
+    return int(results[0]["total"]["value"]) if results else 0
+
+
+def _preferences_from_bindings(results):
     data = []
-    for r in results["results"]["bindings"]:
+    for r in results:
         data.append({
             "uri": r["uri"]["value"],
             "langue": r["langue"]["value"],
@@ -55,9 +116,7 @@ def get_preferences():
 
 
 def update_preference(uri, langue, formatCours, periode, vacances, modeEtude):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
-    sparql.setQuery(f"""
+    run_update(f"""
     PREFIX ex: <{BASE_URI}>
     DELETE WHERE {{ <{uri}> ?p ?o }};
     INSERT DATA {{
@@ -69,13 +128,9 @@ def update_preference(uri, langue, formatCours, periode, vacances, modeEtude):
             ex:modeEtude "{modeEtude}" .
     }}
     """)
-    sparql.query()
 
 
 def delete_preference(uri):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
-    sparql.setQuery(f"""
+    run_update(f"""
     DELETE WHERE {{ <{uri}> ?p ?o }}
     """)
-    sparql.query()
@@ -1,9 +1,10 @@
 import urllib.parse
 from django.shortcuts import render, redirect
-from .sparql_client import insert_preference, get_preferences, update_preference, delete_preference, generate_uri
+from trelix_app.utils.pagination import paginate
+from .sparql_client import insert_preference, get_preference_by_uri, get_preferences_page, count_preferences, update_preference, delete_preference, generate_uri
 
 def preference_list(request):
-    prefs = get_preferences()
+    prefs = paginate(request, get_preferences_page, count_preferences)
     return render(request, "preference/list.html", {"preferences": prefs})
 
 def preference_create(request):
@@ -25,8 +26,6 @@ def preference_update(request):
         return redirect("preference:preference_list")
 
     uri = urllib.parse.unquote(uri)
-    prefs = get_preferences()
-    pref = next((p for p in prefs if p["uri"] == uri), None)
 
     if request.method == "POST":
         langue = request.POST["langue"]
@@ -37,6 +36,7 @@ def preference_update(request):
         update_preference(uri, langue, formatCours, periode, vacances, modeEtude)
         return redirect("preference:preference_list")
 
+    pref = get_preference_by_uri(uri)
     return render(request, "preference/form.html", {"preference": pref})
 
 def preference_delete(request):
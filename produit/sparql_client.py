@@ -1,12 +1,11 @@
-from SPARQLWrapper import SPARQLWrapper, JSON, POST
+from trelix_app.utils.sparql_client import run_select, run_update
 
-FUSEKI_URL = "http://localhost:3030/trelix"
 BASE_URI = "http://example.com/produit/"
+LIST_CACHE_TTL = 300  # secondes, cache partagé des listes (voir sparql_cache)
+LIST_EXCERPT_LENGTH = 300  # caractères de description lus pour l'aperçu de la liste
 
 def insert_produit(uri, nomPack, description, valeurMonetaire):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
-    sparql.setQuery(f"""
+    run_update(f"""
     PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
     INSERT DATA {{
         <{BASE_URI}{uri}> a ex:Produit ;
@@ -15,11 +14,9 @@ def insert_produit(uri, nomPack, description, valeurMonetaire):
             ex:valeurMonetaire "{valeurMonetaire}" .
     }}
     """)
-    sparql.query()
 
 def get_produits():
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/query")
-    sparql.setQuery(f"""
+    results = run_select(f"""
     PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
     SELECT ?produit ?nomPack ?description ?valeurMonetaire
     WHERE {{
@@ -28,11 +25,9 @@ def get_produits():
                  ex:description ?description ;
                  ex:valeurMonetaire ?valeurMonetaire .
     }}
-    """)
-    sparql.setReturnFormat(JSON)
-    results = sparql.query().convert()
+    """, app="produit", cache_ttl=LIST_CACHE_TTL)
     produits = []
-    for r in results["results"]["bindings"]:
+    for r in results:
         produits.append({
             "uri": r["produit"]["value"].replace(BASE_URI, ""),
             "nomPack": r["nomPack"]["value"],
@@ -41,9 +36,64 @@ def get_produits():
         })
     return produits
 
+def get_produit_by_uri(uri):
+    """Un seul produit, lu directement par son IRI ; None s'il n'existe pas."""
+    results = run_select(f"""
+    PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
+    SELECT ?nomPack ?description ?valeurMonetaire
+    WHERE {{
+        <{BASE_URI}{uri}> ex:nomPack ?nomPack ;
+                 ex:description ?description ;
+                 ex:valeurMonetaire ?valeurMonetaire .
+    }}
+    LIMIT 1
+    """)
+    if not results:
+        return None
+    r = results[0]
+    return {
+        "uri": uri,
+        "nomPack": r["nomPack"]["value"],
+        "description": r["description"]["value"],
+        "valeurMonetaire": r["valeurMonetaire"]["value"],
+    }
+
+# Page de la liste : aperçu de la description seulement, triée par URI
+# pour que LIMIT/OFFSET reste stable
+def get_produits_page(limit, offset=0):
+    results = run_select(f"""
+    PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
+    SELECT ?produit ?nomPack (SUBSTR(?description, 1, {LIST_EXCERPT_LENGTH}) AS ?apercu) ?valeurMonetaire
+    WHERE {{
+        ?produit a ex:Produit ;
+                 ex:nomPack ?nomPack ;
+                 ex:description ?description ;
+                 ex:valeurMonetaire ?valeurMonetaire .
+    }}
+    ORDER BY ?produit
+    LIMIT {int(limit)} OFFSET {int(offset)}
+    """, app="produit", cache_ttl=LIST_CACHE_TTL)
+    return [{
+        "uri": r["produit"]["value"].replace(BASE_URI, ""),
+        "nomPack": r["nomPack"]["value"],
+        "apercu": r["apercu"]["value"],
+        "valeurMonetaire": r["valeurMonetaire"]["value"],
+    } for r in results]
+
+def count_produits():
+    results = run_select("""
+    PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
+    SELECT (COUNT(?produit) AS ?total)
+    WHERE {
+        ?produit a ex:Produit ;
+                 ex:nomPack ?nomPack ;
+                 ex:description ?description ;
+                 ex:valeurMonetaire ?valeurMonetaire .
+    }
+    """, app="produit", cache_ttl=LIST_CACHE_TTL)
+    return int(results[0]["total"]["value"]) if results else 0
+
 def update_produit(uri, nomPack=None, description=None, valeurMonetaire=None):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
     updates = []
 
     if nomPack:
@@ -69,17 +119,13 @@ def update_produit(uri, nomPack=None, description=None, valeurMonetaire=None):
         """)
 
     for q in updates:
-        sparql.setQuery(q)
-        sparql.query()
+        run_update(q)
 
 
 def delete_produit(uri):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
-    sparql.setQuery(f"""
+    run_update(f"""
     PREFIX ex: <http://www.semanticweb.org/bazinfo/ontologies/2025/9/untitled-ontology-15#>
     DELETE WHERE {{
         <{BASE_URI}{uri}> ?p ?o
     }}
     """)
-    sparql.query()
@@ -1,14 +1,15 @@
 import uuid
 import urllib.parse
 from django.shortcuts import render, redirect
-from .sparql_client import insert_produit, get_produits, update_produit, delete_produit
+from trelix_app.utils.pagination import paginate
+from .sparql_client import insert_produit, get_produit_by_uri, get_produits_page, count_produits, update_produit, delete_produit
 
 def generate_uri(nomPack):
     safe_name = nomPack.replace(" ", "_")
     return f"{safe_name}{uuid.uuid4().hex[:8]}"
 
 def produit_list(request):
-    produits = get_produits()
+    produits = paginate(request, get_produits_page, count_produits)
     return render(request, "produit/list.html", {"produits": produits})
 
 def produit_create(request):
@@ -29,9 +30,6 @@ def produit_update(request):
         return redirect("produit_list")
     uri = urllib.parse.unquote(uri)
 
-    produits = get_produits()
-    produit = next((p for p in produits if p["uri"] == uri), None)
-
     if request.method == "POST":
         nomPack = request.POST["nomPack"]
         description = request.POST["description"]
@@ -40,6 +38,7 @@ def produit_update(request):
         update_produit(uri, nomPack, description, valeurMonetaire)
         return redirect("produit_list")
 
+    produit = get_produit_by_uri(uri)
     return render(request, "produit/form.html", {"produit": produit})
 
 def produit_delete(request):
@@ -2,6 +2,8 @@
 ASGI config for trelix_app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests served here resolve against settings.ASGI_ROOT_URLCONF, which routes
+the hot list views to their async variants (see trelix_app/urls_asgi.py).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +11,25 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'trelix_app.settings')
 
-application = get_asgi_application()
+
+class TrelixASGIHandler(ASGIHandler):
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = getattr(settings, 'ASGI_ROOT_URLCONF', settings.ROOT_URLCONF)
+        return request, error_response
+
+
+def get_application():
+    # Même initialisation que django.core.asgi.get_asgi_application()
+    django.setup(set_prefix=False)
+    return TrelixASGIHandler()
+
+
+application = get_application()
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from trelix_app.utils import hedged_search
+
+
+class Command(BaseCommand):
+    help = "Summarize how LLM searches fared against their latency budgets"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--namespace', default=None, help="Only this search (e.g. module, evenement)")
+        parser.add_argument('--last', type=int, default=1000, help="Number of recent searches to look at")
+
+    def handle(self, *args, **options):
+        report = hedged_search.stats(options['namespace'], options['last'])
+        if not report:
+            self.stdout.write("No LLM search recorded yet")
+            return
+        for namespace, s in report.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{namespace} (budget {s['budget_ms']:.0f} ms)"))
+            outcomes = ", ".join(f"{name}: {count}" for name, count in s['outcomes'].items())
+            self.stdout.write(f"  {s['searches']} searches -- {outcomes}")
+            self.stdout.write(f"  LLM p50/p90/p99: {s['llm_p50_ms']} / {s['llm_p90_ms']} / {s['llm_p99_ms']} ms")
+            self.stdout.write(f"  fallback p50/p90: {s['fallback_p50_ms']} / {s['fallback_p90_ms']} ms")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from trelix_app.utils import translation_cache
+
+
+class Command(BaseCommand):
+    help = "Show the NL -> SPARQL translation cache metrics, or clear it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help="Delete the cached translations")
+        parser.add_argument('--namespace', default=None,
+                            help="Only clear this namespace (e.g. module, evenement)")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted = translation_cache.clear(options['namespace'])
+            self.stdout.write(self.style.SUCCESS(f"{deleted} cached translations deleted"))
+            return
+        stats = translation_cache.stats()
+        self.stdout.write(f"Entries: {stats['entries']}")
+        self.stdout.write(f"Hits: {stats['stored_hits']} (hit ratio {stats['stored_hit_ratio']:.1%})")
+        self.stdout.write(f"LLM latency saved: {stats['stored_latency_saved_ms'] / 1000:.1f} s")
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trelix_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HedgedSearchOutcome',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('namespace', models.CharField(max_length=32)),
+                ('outcome', models.CharField(choices=[('llm', 'LLM answered within budget'), ('llm_error', 'LLM failed, keyword results used'), ('timeout', 'LLM over budget, keyword results used')], max_length=16)),
+                ('budget_ms', models.FloatField()),
+                ('llm_ms', models.FloatField(null=True)),
+                ('llm_ok', models.BooleanField(default=False)),
+                ('fallback_ms', models.FloatField(null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['namespace', '-id'], name='hedged_search_namespace')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trelix_app', '0002_hedgedsearchoutcome'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('generator', models.CharField(max_length=64)),
+                ('content_hash', models.CharField(db_index=True, max_length=64)),
+                ('path', models.CharField(db_index=True, max_length=255)),
+                ('size', models.PositiveIntegerField()),
+                ('pinned', models.BooleanField(default=False)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
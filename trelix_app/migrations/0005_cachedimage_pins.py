@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+def pinned_to_pins(apps, schema_editor):
+    CachedImage = apps.get_model('trelix_app', 'CachedImage')
+    CachedImage.objects.filter(pinned=True).update(pins=1)
+
+
+def pins_to_pinned(apps, schema_editor):
+    CachedImage = apps.get_model('trelix_app', 'CachedImage')
+    CachedImage.objects.filter(pins__gt=0).update(pinned=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trelix_app', '0004_indexbuild'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cachedimage',
+            name='pins',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cachedimage',
+            name='held_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(pinned_to_pins, pins_to_pinned),
+        migrations.RemoveField(
+            model_name='cachedimage',
+            name='pinned',
+        ),
+    ]
@@ -0,0 +1,85 @@
+from django.db import models
+from django.utils import timezone
+
+
+class SparqlTranslation(models.Model):
+    """A natural-language query already turned into SPARQL by an LLM.
+
+    Managed by trelix_app/utils/translation_cache.py; ``key`` hashes the
+    normalized query together with the namespace, model and prompt.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    namespace = models.CharField(max_length=32)
+    query = models.TextField()
+    model_name = models.CharField(max_length=128)
+    sparql = models.TextField()
+    latency_ms = models.FloatField(default=0)  # duration of the LLM call that produced it
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['last_used_at'], name='sparql_translation_lru')]
+
+    def __str__(self):
+        return f"[{self.namespace}] {self.query[:50]}"
+
+
+class HedgedSearchOutcome(models.Model):
+    """One LLM search raced against its keyword fallback (trelix_app/utils/hedged_search.py)."""
+    LLM = 'llm'
+    LLM_ERROR = 'llm_error'
+    TIMEOUT = 'timeout'
+    OUTCOMES = [
+        (LLM, 'LLM answered within budget'),
+        (LLM_ERROR, 'LLM failed, keyword results used'),
+        (TIMEOUT, 'LLM over budget, keyword results used'),
+    ]
+
+    namespace = models.CharField(max_length=32)
+    outcome = models.CharField(max_length=16, choices=OUTCOMES)
+    budget_ms = models.FloatField()
+    # Time until each path finished, even when that was after the budget
+    llm_ms = models.FloatField(null=True)
+    llm_ok = models.BooleanField(default=False)
+    fallback_ms = models.FloatField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['namespace', '-id'], name='hedged_search_namespace')]
+
+    def __str__(self):
+        return f"[{self.namespace}] {self.outcome}"
+
+
+class CachedImage(models.Model):
+    """One generated image, by generation key (trelix_app/utils/image_cache.py).
+
+    Entries whose generations produced the same bytes share ``content_hash``
+    and ``path``.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    generator = models.CharField(max_length=64)
+    content_hash = models.CharField(max_length=64, db_index=True)
+    path = models.CharField(max_length=255, db_index=True)  # relative to MEDIA_ROOT
+    size = models.PositiveIntegerField()
+    pins = models.PositiveIntegerField(default=0)  # saved records referring to it; never evicted while > 0
+    held_until = models.DateTimeField(null=True, blank=True)  # shown but not saved yet: not evicted before
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.generator}: {self.path}"
+
+
+class IndexBuild(models.Model):
+    """A local index or store built from the graph (trelix_app/utils/index_builds.py).
+
+    Its presence, not the emptiness of the index, says the initial build ran.
+    """
+    name = models.CharField(max_length=64, unique=True)
+    built_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} ({self.built_at:%Y-%m-%d %H:%M})"
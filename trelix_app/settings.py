@@ -74,6 +74,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'trelix_app.middleware.SPARQLRequestCacheMiddleware',
     'person.middleware.SPARQLPersonAuthMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -97,6 +98,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'trelix_app.wsgi.application'
+ASGI_ROOT_URLCONF = 'trelix_app.urls_asgi'  # sous ASGI : vues de liste async (trelix_app/asgi.py)
 
 
 # Database
@@ -175,3 +177,106 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 # GOOGLE API KEY
 GEMINI_MODEL_NAME = os.getenv('GEMINI_MODEL_NAME')
+
+
+# SPARQL / FUSEKI
+FUSEKI_URL = os.getenv('FUSEKI_URL', 'http://localhost:3030/trelix')
+# Keep-alive connection pool shared by every app (trelix_app/utils/sparql_client.py)
+SPARQL_POOL_NUM_POOLS = int(os.getenv('SPARQL_POOL_NUM_POOLS', 4))   # distinct hosts kept open
+SPARQL_POOL_MAXSIZE = int(os.getenv('SPARQL_POOL_MAXSIZE', 10))      # connections kept per host
+SPARQL_POOL_BLOCK = os.getenv('SPARQL_POOL_BLOCK', 'False') == 'True'
+SPARQL_POOL_HOST_LIMITS = {}  # e.g. {"localhost:3030": 20}
+SPARQL_CONNECT_TIMEOUT = float(os.getenv('SPARQL_CONNECT_TIMEOUT', 5))
+SPARQL_READ_TIMEOUT = float(os.getenv('SPARQL_READ_TIMEOUT', 30))
+SPARQL_RETRIES = 2
+# Threads used by sparql_client.run_parallel to send independent reads at once.
+SPARQL_PARALLEL_WORKERS = int(os.getenv('SPARQL_PARALLEL_WORKERS', 8))
+
+# Cache shared by the SPARQL result cache (trelix_app/utils/sparql_cache.py).
+# LocMemCache is per process: with several workers use Redis so that every
+# process sees the dataset version bumped by updates, e.g.
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   CACHE_LOCATION=redis://127.0.0.1:6379
+# or django.core.cache.backends.filebased.FileBasedCache with a directory.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'trelix'),
+    }
+}
+SPARQL_CACHE_ALIAS = 'default'
+SPARQL_CACHE_ENABLED = os.getenv('SPARQL_CACHE_ENABLED', 'True') == 'True'
+SPARQL_CACHE_DISABLED_APPS = []  # e.g. ['evenement'] to always read that app live
+
+# "fuseki" sends SPARQL over HTTP to FUSEKI_URL; "rdflib" runs the same
+# queries in-process against the ontologies below (trelix_app/utils/rdflib_store.py).
+SPARQL_BACKEND = os.getenv('SPARQL_BACKEND', 'fuseki')
+SPARQL_RDFLIB_SOURCES = [
+    BASE_DIR / 'Ontology' / 'ontology1.rdf',
+    BASE_DIR / 'Ontology' / 'webfinalle2.rdf',
+]
+# rdflib store plugin; "default" is in-memory. A persistent plugin such as
+# "BerkeleyDB" keeps the graphs under SPARQL_RDFLIB_STORE_PATH between runs.
+SPARQL_RDFLIB_STORE = os.getenv('SPARQL_RDFLIB_STORE', 'default')
+SPARQL_RDFLIB_STORE_PATH = os.getenv('SPARQL_RDFLIB_STORE_PATH')
+
+# Quizzes per INSERT DATA request in the bulk quiz import (leaderboared/quiz_import.py)
+QUIZ_IMPORT_BATCH_SIZE = int(os.getenv('QUIZ_IMPORT_BATCH_SIZE', 50))
+# Quizzes per VALUES block in the bulk quiz delete
+QUIZ_DELETE_BATCH_SIZE = int(os.getenv('QUIZ_DELETE_BATCH_SIZE', 100))
+# Compiled quizzes kept per process for quiz_take/quiz_submit (leaderboared/quiz_cache.py)
+QUIZ_CACHE_MAX_ENTRIES = 256
+# Max age (s) of a compiled quiz: bounds staleness in other processes when CACHES is per-process
+QUIZ_CACHE_TTL = int(os.getenv('QUIZ_CACHE_TTL', 300))
+# Write-behind queue for quiz submissions (leaderboared/submission_queue.py)
+SUBMISSION_FLUSH_INTERVAL = float(os.getenv('SUBMISSION_FLUSH_INTERVAL', 2))  # seconds
+SUBMISSION_FLUSH_BATCH_SIZE = int(os.getenv('SUBMISSION_FLUSH_BATCH_SIZE', 200))
+# Live quiz leaderboard over SSE (leaderboared/live.py)
+LIVE_LEADERBOARD_SIZE = 50
+LIVE_SUBSCRIBER_BUFFER = 100  # events queued per viewer before it is dropped
+LIVE_POLL_SECONDS = 1.0  # new scores recorded by other processes reach viewers within this
+LIVE_RESYNC_SECONDS = 60  # watched rankings reloaded from the store, viewers get a fresh snapshot
+LIVE_STREAM_MAX_SECONDS = 60  # WSGI only: each stream holds a thread, it ends and reconnects after this
+LIVE_MAX_STREAMS = 8  # WSGI only: open streams per process; more viewers get a 503 and fall back to reloading
+
+# Index plein texte des modules (module/search_index.py) : nombre max de résultats
+MODULE_SEARCH_LIMIT = 20
+# Recherche sémantique : "vector" = index local TF-IDF haché (module/vector_index.py),
+# "llm" = requête SPARQL générée par DeepSeek
+MODULE_SEARCH_BACKEND = os.getenv('MODULE_SEARCH_BACKEND', 'vector')
+MODULE_VECTOR_DIM = 2048
+MODULE_VECTOR_MIN_SCORE = 0.05
+MODULE_VECTOR_INDEX_PATH = BASE_DIR / 'data' / 'module_vectors.npz'  # données locales, hors de MEDIA_ROOT (non servi)
+
+# Cache persistant des traductions langage naturel -> SPARQL faites par les LLM
+# (trelix_app/utils/translation_cache.py)
+SPARQL_TRANSLATION_CACHE_ENABLED = os.getenv('SPARQL_TRANSLATION_CACHE_ENABLED', 'True') == 'True'
+SPARQL_TRANSLATION_CACHE_TTL = int(os.getenv('SPARQL_TRANSLATION_CACHE_TTL', 7 * 24 * 3600))  # seconds
+SPARQL_TRANSLATION_CACHE_MAX_ENTRIES = 5000
+
+# Budgets des recherches LLM (trelix_app/utils/hedged_search.py) : la recherche par
+# mots-clés part en parallèle et répond si le LLM n'a pas fini à temps
+LLM_SEARCH_BUDGET = float(os.getenv('LLM_SEARCH_BUDGET', 3))  # seconds
+LLM_SEARCH_BUDGETS = {}  # per namespace, e.g. {'module': 2.0, 'evenement': 4.0}
+LLM_SEARCH_WORKERS = 8
+LLM_REQUEST_TIMEOUT = 30  # seconds, hard limit of one provider call
+LLM_SEARCH_OUTCOMES_KEPT = 10000
+ACTIVITY_LLM_WORKERS = 4  # conseils d'activités (activity/utils.py), hors du pool SPARQL
+
+# Listes paginées (trelix_app/utils/pagination.py) : lignes par page
+LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', 12))
+
+# Génération des bannières d'événements en arrière-plan (evenement/image_jobs.py)
+IMAGE_JOB_WORKERS = 2
+IMAGE_JOB_STALE_SECONDS = 300  # job sans mise à jour depuis : abandonné, relancé
+
+# Cache des images générées (trelix_app/utils/image_cache.py), sous MEDIA_ROOT/IMAGE_CACHE_DIR
+IMAGE_CACHE_DIR = 'generated'
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', 100 * 1024 * 1024))  # non épinglées
+IMAGE_CACHE_HOLD_SECONDS = 24 * 3600  # image affichée mais pas encore enregistrée : non évincée
+
+# Dérivés responsives des images (trelix_app/utils/image_variants.py), sous MEDIA_ROOT/IMAGE_VARIANT_DIR
+IMAGE_VARIANT_DIR = 'variants'
+IMAGE_VARIANT_WIDTHS = [320, 640, 1024]
+IMAGE_VARIANT_AVIF = os.getenv('IMAGE_VARIANT_AVIF', 'False') == 'True'  # en plus du WebP
+IMAGE_VARIANT_WORKERS = 2
@@ -1,4 +1,24 @@
 document.addEventListener('DOMContentLoaded', function () {
+    // La génération tourne en arrière-plan : on affiche l'aperçu local renvoyé
+    // tout de suite, puis on interroge status_url jusqu'à la fin du job
+    // (au plus MAX_POLLS fois, ~4 min : l'aperçu local reste alors affiché).
+    const MAX_POLLS = 120;
+    function pollJob(statusUrl, onUpdate, polls = 0) {
+        return fetch(statusUrl)
+            .then(r => r.json())
+            .then(data => {
+                onUpdate(data);
+                if (data.status === 'pending' || data.status === 'running') {
+                    if (polls + 1 >= MAX_POLLS) {
+                        return { ...data, status: 'timeout' };
+                    }
+                    return new Promise(resolve => setTimeout(resolve, 2000))
+                        .then(() => pollJob(statusUrl, onUpdate, polls + 1));
+                }
+                return data;
+            });
+    }
+
     document.querySelectorAll('.generate-image-btn').forEach(btn => {
         btn.addEventListener('click', function () {
 
@@ -10,6 +30,13 @@ document.addEventListener('DOMContentLoaded', function () {
             img.src = '';
             img.alt = '⏳ Génération...';
 
+            const show = data => {
+                if (data.image_url) {
+                    img.src = data.image_url;
+                    pathInput.value = data.image_path;
+                }
+            };
+
             fetch('/evenements/generate-image/', {
                 method: 'POST',
                 headers: {
@@ -20,13 +47,17 @@ document.addEventListener('DOMContentLoaded', function () {
             })
                 .then(r => r.json())
                 .then(data => {
-                    if (data.image_url) {
-                        img.src = data.image_url;
-                        pathInput.value = data.image_path;
-                        img.alt = '✅ Image générée';
-                    } else {
+                    if (!data.status_url) {
                         img.alt = '❌ Erreur';
+                        return;
                     }
+                    show(data);
+                    return pollJob(data.status_url, show).then(final => {
+                        img.alt = final.status === 'done' ? '✅ Image générée' : '❌ Erreur';
+                    });
+                })
+                .catch(() => {
+                    img.alt = '❌ Erreur';
                 });
         });
     });
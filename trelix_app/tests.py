@@ -0,0 +1,213 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+
+from trelix_app.models import CachedImage, HedgedSearchOutcome, SparqlTranslation
+from leaderboared import views as leaderboard_views
+from trelix_app.utils import hedged_search, image_cache, rdflib_store, sparql_client, translation_cache
+from trelix_app.utils.pagination import paginate
+
+
+def _fail(*args):
+    raise ValueError("invalid SPARQL")
+
+
+class TranslationCacheTests(TestCase):
+    def translate(self, query, generate, execute=lambda sparql: [sparql], model="m", prompt="p"):
+        return translation_cache.translate("test", query, generate, execute, model, prompt)
+
+    def test_second_identical_query_skips_the_llm(self):
+        calls = []
+        generate = lambda: calls.append(1) or "SELECT ?x WHERE {}"
+        self.assertEqual(self.translate("Modules  de Python", generate), ["SELECT ?x WHERE {}"])
+        self.assertEqual(self.translate("modules de python", generate), ["SELECT ?x WHERE {}"])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(SparqlTranslation.objects.get().hits, 1)
+
+    def test_model_and_prompt_are_part_of_the_key(self):
+        self.translate("q", lambda: "A")
+        self.assertEqual(self.translate("q", lambda: "B", model="other"), ["B"])
+        self.assertEqual(self.translate("q", lambda: "C", prompt="edited"), ["C"])
+        self.assertEqual(SparqlTranslation.objects.count(), 3)
+
+    def test_query_that_fails_to_run_is_not_stored(self):
+        with self.assertRaises(ValueError):
+            self.translate("q", lambda: "SELECT broken", execute=_fail)
+        self.assertFalse(SparqlTranslation.objects.exists())
+
+    def test_stored_query_that_fails_is_forgotten(self):
+        self.translate("q", lambda: "SELECT ok")
+        with self.assertRaises(ValueError):
+            self.translate("q", _fail, execute=_fail)
+        self.assertFalse(SparqlTranslation.objects.exists())
+        self.assertEqual(self.translate("q", lambda: "SELECT new"), ["SELECT new"])
+
+    @override_settings(SPARQL_TRANSLATION_CACHE_TTL=-1)
+    def test_expired_entries_are_regenerated(self):
+        self.translate("q", lambda: "old")
+        self.assertEqual(self.translate("q", lambda: "new"), ["new"])
+
+    @override_settings(SPARQL_TRANSLATION_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_entries_are_evicted(self):
+        for query in ("a", "b"):
+            self.translate(query, lambda: query.upper())
+        self.translate("a", _fail)  # hit : "a" devient le plus récent
+        self.translate("c", lambda: "C")
+        self.assertEqual(set(SparqlTranslation.objects.values_list("query", flat=True)), {"a", "c"})
+
+
+@override_settings(LLM_SEARCH_BUDGETS={"test": 0.2})
+class HedgedSearchTests(TransactionTestCase):
+    def run_search(self, primary, fallback=lambda: "keywords"):
+        started = time.perf_counter()
+        result = hedged_search.run("test", primary, fallback)
+        return result, time.perf_counter() - started
+
+    def wait_for_outcome(self):
+        for _ in range(100):
+            outcome = HedgedSearchOutcome.objects.first()
+            if outcome:
+                return outcome
+            time.sleep(0.02)
+        self.fail("no outcome recorded")
+
+    def test_llm_result_within_budget_wins(self):
+        result, _ = self.run_search(lambda: "llm")
+        self.assertEqual(result, "llm")
+        self.assertEqual(self.wait_for_outcome().outcome, HedgedSearchOutcome.LLM)
+
+    def test_slow_llm_costs_no_more_than_the_budget(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        result, elapsed = self.run_search(lambda: release.wait(5) and "llm")
+        self.assertEqual(result, "keywords")
+        self.assertLess(elapsed, 1.0)
+        release.set()
+        outcome = self.wait_for_outcome()
+        self.assertEqual(outcome.outcome, HedgedSearchOutcome.TIMEOUT)
+        self.assertEqual(outcome.budget_ms, 200)
+
+    def test_failing_llm_answers_with_keywords_at_once(self):
+        result, elapsed = self.run_search(_fail)
+        self.assertEqual(result, "keywords")
+        self.assertLess(elapsed, 0.2)
+        outcome = self.wait_for_outcome()
+        self.assertEqual((outcome.outcome, outcome.llm_ok), (HedgedSearchOutcome.LLM_ERROR, False))
+
+
+class PaginationTests(TestCase):
+    def setUp(self):
+        self.rows = list(range(30))
+        self.calls = []
+
+    def fetch(self, limit, offset):
+        self.calls.append((limit, offset))
+        return self.rows[offset:offset + limit]
+
+    def page(self, number, total=30):
+        request = RequestFactory().get("/", {"page": number})
+        return paginate(request, self.fetch, lambda: total, per_page=12)
+
+    def test_fetches_only_the_requested_page(self):
+        page = self.page(2)
+        self.assertEqual(page.object_list, list(range(12, 24)))
+        self.assertEqual(self.calls, [(12, 12)])
+        self.assertTrue(page.has_next())
+
+    def test_out_of_range_page_is_clamped_to_the_last(self):
+        page = self.page(99)
+        self.assertEqual((page.number, page.object_list), (3, list(range(24, 30))))
+        self.assertEqual(self.calls, [(6, 24)])
+
+    def test_invalid_page_is_the_first(self):
+        self.assertEqual(self.page("abc").number, 1)
+
+    def test_empty_collection_fetches_nothing(self):
+        page = self.page(1, total=0)
+        self.assertEqual((page.object_list, self.calls), ([], []))
+
+
+class ImageCacheTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings_override = override_settings(MEDIA_ROOT=media, IMAGE_CACHE_MAX_BYTES=250)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def store(self, prompt, content=None):
+        return image_cache.store("test", prompt, content or prompt.encode() * 100, "png")
+
+    def cached(self):
+        return {prompt for prompt in "abcdef" if image_cache.lookup("test", prompt)}
+
+    def test_identical_generations_share_one_file(self):
+        first = self.store("a", b"x" * 100)
+        second = self.store("b", b"x" * 100)
+        self.assertEqual(first, second)
+        self.assertEqual(image_cache.get_or_create("test", "a", _fail, "png"), first)
+
+    def test_least_recently_used_file_is_evicted_beyond_the_limit(self):
+        path = self.store("a")
+        self.store("b")
+        image_cache.lookup("test", "a")
+        self.store("c")
+        self.assertEqual(self.cached(), {"a", "c"})
+        self.assertTrue(os.path.exists(os.path.join(settings.MEDIA_ROOT, path)))
+
+    def test_pinned_files_stay_until_every_pin_is_released(self):
+        path = self.store("a")
+        image_cache.pin(path)
+        image_cache.pin(path)  # deux événements, même bannière
+        for prompt in "bcd":
+            self.store(prompt)
+        self.assertIn("a", self.cached())
+        image_cache.unpin(path)
+        self.store("e")
+        self.assertIn("a", self.cached())
+        image_cache.unpin(path)
+        self.store("f")
+        self.assertNotIn("a", self.cached())
+
+    def test_held_files_stay_until_the_hold_expires(self):
+        held = self.store("a")
+        image_cache.hold(held)
+        for prompt in "bcd":
+            self.store(prompt)
+        self.assertIn("a", self.cached())
+        CachedImage.objects.filter(path=held).update(held_until=None)
+        self.store("e")
+        self.assertNotIn("a", self.cached())
+
+    def test_failed_generation_is_not_cached(self):
+        self.assertIsNone(image_cache.get_or_create("test", "a", lambda: None, "png"))
+        self.assertFalse(CachedImage.objects.exists())
+
+
+@override_settings(SPARQL_BACKEND="rdflib", SPARQL_RDFLIB_SOURCES=[], ROOT_URLCONF="trelix_app.urls_asgi")
+class AsgiListViewTests(TestCase):
+    def setUp(self):
+        rdflib_store.close_all()
+        cache.clear()
+        sparql_client.run_update(
+            f"PREFIX ex: <{leaderboard_views.EX}> INSERT DATA {{ ex:q1 a ex:Quiz ; ex:quizTitle \"Async quiz\" . }}"
+        )
+
+    def test_asgi_requests_use_the_asgi_urlconf(self):
+        from trelix_app.asgi import application
+
+        scope = {"type": "http", "method": "GET", "path": "/quiz/", "query_string": b"", "headers": []}
+        request, _ = application.create_request(scope, io.BytesIO())
+        self.assertEqual(request.urlconf, "trelix_app.urls_asgi")
+
+    async def test_list_is_served_by_the_async_view(self):
+        response = await self.async_client.get("/quiz/")
+        self.assertEqual(response.resolver_match.func, leaderboard_views.aquiz_list)
+        self.assertContains(response, "Async quiz")
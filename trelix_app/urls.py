@@ -34,6 +34,8 @@ urlpatterns = [
  # Quiz
     path('quiz/', leaderboard_views.quiz_list, name='quiz_list'),
     path('quiz/create/', leaderboard_views.quiz_create, name='create_quiz'),
+    path('quiz/import/', leaderboard_views.quiz_bulk_import, name='quiz_bulk_import'),
+    path('quiz/delete/', leaderboard_views.quiz_bulk_delete, name='quiz_bulk_delete'),
 
     path('quiz/<str:quiz_id>/', leaderboard_views.quiz_detail, name='quiz_detail'),
    # trelix_app/urls.py
@@ -46,6 +48,7 @@ path('quiz/<str:quiz_id>/join', leaderboard_views.join_quiz, name='join_quiz'),
     path('quiz/<str:quiz_id>/delete/', leaderboard_views.delete_quiz, name='delete_quiz'),
 
     path('quiz/<str:quiz_id>/leaderboard/', leaderboard_views.quiz_leaderboard, name='quiz_leaderboard'),
+    path('quiz/<str:quiz_id>/leaderboard/stream/', leaderboard_views.quiz_leaderboard_stream, name='quiz_leaderboard_stream'),
     path('leaderboard/', leaderboard_views.leaderboard_list, name='leaderboard_list'),
     path('generate-goal-description/', goal_views.generate_goal_description, name='generate_goal_description'),
 ]
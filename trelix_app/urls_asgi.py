@@ -0,0 +1,30 @@
+"""
+URLconf used when the app is served by trelix_app/asgi.py.
+
+Same routes as trelix_app.urls, except that the heaviest list views are
+their async variants: they await Fuseki through the shared httpx pool of
+sparql_client instead of holding a thread per request. The live quiz
+leaderboard stream is async too, with no cap on open streams
+(see leaderboared/live.py). The overrides come
+first and carry no name, so reverse() keeps using the names of
+trelix_app.urls (same paths). Under WSGI only trelix_app.urls is used.
+"""
+from django.urls import path
+
+from activity import views as activity_views
+from evenement import views as evenement_views
+from goal import views as goal_views
+from leaderboared import views as leaderboard_views
+from module import views as module_views
+
+from . import urls
+
+urlpatterns = [
+    path('modules/', module_views.amodule_list),
+    path('evenements/', evenement_views.aevenement_list),
+    path('activity/', activity_views.aactivity_list),
+    path('goals/', goal_views.agoal_list),
+    path('quiz/', leaderboard_views.aquiz_list),
+    path('leaderboard/', leaderboard_views.aleaderboard_list),
+    path('quiz/<str:quiz_id>/leaderboard/stream/', leaderboard_views.aquiz_leaderboard_stream),
+] + urls.urlpatterns
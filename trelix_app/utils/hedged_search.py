@@ -0,0 +1,159 @@
+# trelix_app/utils/hedged_search.py
+"""
+Latency budgets for the LLM-backed searches.
+
+run(namespace, primary, fallback) starts both paths at once: ``primary`` is
+the LLM path (translate the query, run the generated SPARQL) and
+``fallback`` the keyword search. The LLM result is returned if it arrives
+within the namespace's budget (LLM_SEARCH_BUDGETS, else LLM_SEARCH_BUDGET
+seconds); if it fails or is still running when the budget runs out, the
+keyword result is returned instead, so a slow provider never costs more
+than the budget. The two paths use separate thread pools, so hung provider
+calls cannot hold up the keyword searches. A late LLM call keeps running
+until LLM_REQUEST_TIMEOUT, and translation_cache still stores its answer
+for the next identical query.
+
+Once both paths are done, each search writes one HedgedSearchOutcome row
+(outcome, how long each path really took, whether the LLM succeeded);
+stats() and `manage.py search_budgets` summarize them to tune the budgets.
+"""
+import contextvars
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from trelix_app.models import HedgedSearchOutcome
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(name, workers):
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"search-{name}")
+        return pool
+
+
+def _submit(name, fn):
+    workers = getattr(settings, "LLM_SEARCH_WORKERS", 8)
+    # Same context as the caller, so both paths share its request memo
+    return _pool(name, workers).submit(contextvars.copy_context().run, fn)
+
+
+def budget(namespace):
+    """Seconds the LLM path of ``namespace`` may take before the fallback wins."""
+    budgets = getattr(settings, "LLM_SEARCH_BUDGETS", {})
+    return budgets.get(namespace, getattr(settings, "LLM_SEARCH_BUDGET", 3.0))
+
+
+def provider_timeout():
+    """Hard limit, in seconds, for one call to an LLM provider."""
+    return getattr(settings, "LLM_REQUEST_TIMEOUT", 30)
+
+
+class _Outcome:
+    """Collects one search's measurements; saved once both paths are done."""
+
+    def __init__(self, namespace, budget_s):
+        self.started = time.perf_counter()
+        self.fields = {"namespace": namespace, "budget_ms": budget_s * 1000}
+        self.pending = {"llm", "fallback"}
+        self.lock = threading.Lock()
+
+    def finished(self, path, future):
+        fields = {f"{path}_ms": (time.perf_counter() - self.started) * 1000}
+        if path == "llm":
+            fields["llm_ok"] = future.exception() is None
+        with self.lock:
+            self.fields.update(fields)
+            self.pending.discard(path)
+        self._save_if_complete()
+
+    def decide(self, outcome):
+        with self.lock:
+            self.fields["outcome"] = outcome
+        self._save_if_complete()
+
+    def _save_if_complete(self):
+        with self.lock:
+            if self.pending or "outcome" not in self.fields or "saved" in self.fields:
+                return
+            self.fields["saved"] = True
+            fields = {k: v for k, v in self.fields.items() if k != "saved"}
+        try:
+            row = HedgedSearchOutcome.objects.create(**fields)
+            kept = getattr(settings, "LLM_SEARCH_OUTCOMES_KEPT", 10000)
+            HedgedSearchOutcome.objects.filter(pk__lte=row.pk - kept).delete()
+        except Exception as e:
+            print(f"Could not record search outcome: {e}")
+
+
+def run(namespace, primary, fallback):
+    """
+    Race ``primary`` (LLM) against ``fallback`` (keywords). Return the LLM
+    result if it is ready within budget, the fallback result otherwise.
+    """
+    budget_s = budget(namespace)
+    outcome = _Outcome(namespace, budget_s)
+    llm = _submit("llm", primary)
+    keywords = _submit("keywords", fallback)
+    llm.add_done_callback(lambda f: outcome.finished("llm", f))
+    keywords.add_done_callback(lambda f: outcome.finished("fallback", f))
+
+    try:
+        result = llm.result(timeout=budget_s)
+    except Exception as e:
+        if llm.done():
+            print(f"LLM search failed ({namespace}), using keyword results: {e}")
+            outcome.decide(HedgedSearchOutcome.LLM_ERROR)
+        else:
+            print(f"LLM search over its {budget_s}s budget ({namespace}), using keyword results")
+            outcome.decide(HedgedSearchOutcome.TIMEOUT)
+        return keywords.result()
+    outcome.decide(HedgedSearchOutcome.LLM)
+    return result
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[max(0, math.ceil(len(values) * pct / 100) - 1)], 1)
+
+
+def stats(namespace=None, last=1000):
+    """
+    Per namespace, over its ``last`` searches: outcome counts, LLM latency
+    percentiles (successful calls, including those that missed the budget)
+    and fallback latency.
+    """
+    namespaces = [namespace] if namespace else list(
+        HedgedSearchOutcome.objects.values_list("namespace", flat=True).distinct()
+    )
+    report = {}
+    for ns in namespaces:
+        rows = list(
+            HedgedSearchOutcome.objects.filter(namespace=ns).order_by("-id")
+            .values("outcome", "llm_ms", "llm_ok", "fallback_ms")[:last]
+        )
+        llm_ms = [r["llm_ms"] for r in rows if r["llm_ok"] and r["llm_ms"] is not None]
+        fallback_ms = [r["fallback_ms"] for r in rows if r["fallback_ms"] is not None]
+        outcomes = {name: 0 for name, _ in HedgedSearchOutcome.OUTCOMES}
+        for r in rows:
+            outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+        report[ns] = {
+            "searches": len(rows),
+            "budget_ms": budget(ns) * 1000,
+            "outcomes": outcomes,
+            "llm_p50_ms": _percentile(llm_ms, 50),
+            "llm_p90_ms": _percentile(llm_ms, 90),
+            "llm_p99_ms": _percentile(llm_ms, 99),
+            "fallback_p50_ms": _percentile(fallback_ms, 50),
+            "fallback_p90_ms": _percentile(fallback_ms, 90),
+        }
+    return report
@@ -0,0 +1,148 @@
+# trelix_app/utils/image_cache.py
+"""
+Content-addressed cache for generated images (event banners, badges).
+
+A generation is identified by its generator name, prompt and parameters;
+lookup() answers from the CachedImage table before any external call, so
+asking twice for the same image costs nothing. Bytes are written once under
+MEDIA_ROOT/IMAGE_CACHE_DIR/<sha256 of the content>.<ext>: two generations
+that produce the same file share it.
+
+The files not referenced by any saved record are bounded to
+IMAGE_CACHE_MAX_BYTES, least recently used first. Callers pin() a path
+once a record (an event, a badge) points to it and unpin() it when the
+record is deleted or points elsewhere: pins are counted, since records
+generated from the same prompt share a file, and a file is never evicted
+while it has one. An image shown to the user but not saved yet (a finished
+banner job, the form's preview) is hold()-ed for IMAGE_CACHE_HOLD_SECONDS
+instead, so it is still there when the form is submitted.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from django.conf import settings
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from trelix_app.models import CachedImage
+
+_evict_lock = threading.Lock()
+
+
+def _max_bytes():
+    return getattr(settings, "IMAGE_CACHE_MAX_BYTES", 100 * 1024 * 1024)
+
+
+def _directory():
+    return getattr(settings, "IMAGE_CACHE_DIR", "generated")
+
+
+def cache_key(generator, prompt, params):
+    payload = json.dumps({"generator": generator, "prompt": prompt, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _full_path(path):
+    return os.path.join(settings.MEDIA_ROOT, path)
+
+
+def lookup(generator, prompt, **params):
+    """Path (relative to MEDIA_ROOT) of an identical earlier generation, or None."""
+    entry = CachedImage.objects.filter(key=cache_key(generator, prompt, params)).values("pk", "path").first()
+    if entry is None:
+        return None
+    if not os.path.exists(_full_path(entry["path"])):
+        # File removed by hand: forget the entry
+        CachedImage.objects.filter(pk=entry["pk"]).delete()
+        return None
+    CachedImage.objects.filter(pk=entry["pk"]).update(hits=F("hits") + 1, last_used_at=timezone.now())
+    return entry["path"]
+
+
+def store(generator, prompt, data, ext, **params):
+    """Save ``data`` (bytes) for this generation; return its path relative to MEDIA_ROOT."""
+    content_hash = hashlib.sha256(data).hexdigest()
+    path = f"{_directory()}/{content_hash}.{ext}"
+    full_path = _full_path(path)
+    if not os.path.exists(full_path):
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        tmp = f"{full_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, full_path)
+    now = timezone.now()
+    CachedImage.objects.update_or_create(
+        key=cache_key(generator, prompt, params),
+        defaults={
+            "generator": generator,
+            "content_hash": content_hash,
+            "path": path,
+            "size": len(data),
+            "last_used_at": now,
+        },
+    )
+    evict()
+    return path
+
+
+def get_or_create(generator, prompt, make, ext, **params):
+    """
+    Cached path for this generation, or the path of ``make()``'s bytes once
+    stored; None if ``make()`` returns nothing (nothing is cached then).
+    """
+    path = lookup(generator, prompt, **params)
+    if path:
+        return path
+    data = make()
+    if not data:
+        return None
+    return store(generator, prompt, data, ext, **params)
+
+
+def pin(path):
+    """Count one more saved record referring to ``path``: not evicted until unpinned."""
+    if path:
+        CachedImage.objects.filter(path=path).update(pins=F("pins") + 1)
+
+
+def unpin(path):
+    """A saved record no longer refers to ``path``."""
+    if path:
+        CachedImage.objects.filter(path=path, pins__gt=0).update(pins=F("pins") - 1)
+
+
+def hold(path, seconds=None):
+    """Keep ``path`` at least ``seconds`` (IMAGE_CACHE_HOLD_SECONDS): shown, maybe saved soon."""
+    if not path:
+        return
+    seconds = getattr(settings, "IMAGE_CACHE_HOLD_SECONDS", 24 * 3600) if seconds is None else seconds
+    until = timezone.now() + timedelta(seconds=seconds)
+    CachedImage.objects.filter(Q(held_until__isnull=True) | Q(held_until__lt=until), path=path).update(
+        held_until=until
+    )
+
+
+def evict():
+    """Delete the least recently used unpinned, unheld files beyond IMAGE_CACHE_MAX_BYTES."""
+    with _evict_lock:
+        now = timezone.now()
+        files = {}  # content_hash -> [size, kept, last use, paths]
+        for e in CachedImage.objects.values("content_hash", "size", "pins", "held_until", "last_used_at", "path"):
+            f = files.setdefault(e["content_hash"], [e["size"], False, e["last_used_at"], e["path"]])
+            f[1] = f[1] or e["pins"] > 0 or (e["held_until"] is not None and e["held_until"] > now)
+            f[2] = max(f[2], e["last_used_at"])
+        evictable = sorted((f[2], h, f[0], f[3]) for h, f in files.items() if not f[1])
+        total = sum(size for _, _, size, _ in evictable)
+        for _, content_hash, size, path in evictable:
+            if total <= _max_bytes():
+                break
+            CachedImage.objects.filter(content_hash=content_hash).delete()
+            try:
+                os.remove(_full_path(path))
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,166 @@
+# trelix_app/utils/image_variants.py
+"""
+Responsive derivatives of media images (uploads, generated banners).
+
+submit(path) hands the image to a pool of IMAGE_VARIANT_WORKERS threads,
+which writes one file per width in IMAGE_VARIANT_WIDTHS narrower than the
+image, plus one at the image's own width when it is narrower than the
+largest one (never an enlargement), in WebP (plus AVIF with
+IMAGE_VARIANT_AVIF, when Pillow supports it). Each image gets its own
+directory -- MEDIA_ROOT/IMAGE_VARIANT_DIR/<sha256 of the path>/<width>w.<fmt>
+-- so the file names carry the real widths, and re-submitting an upload that
+replaced the file rewrites them (dropping widths the new image lacks).
+
+annotate(rows) lists that directory (one call per row) and adds
+``<field>_src`` (smallest derivative, or the original until the derivatives
+exist), ``<field>_srcset`` and ``<field>_avif_srcset`` to list rows; images
+without derivatives yet (uploaded before this pipeline) are queued on the
+way. It blocks on the file system, like the list views that call it (sync).
+"""
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from PIL import Image, ImageOps, features
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = set()
+_failed = set()  # not an image PIL can read: not retried on every page view
+_VARIANT_NAME = re.compile(r"^(\d+)w\.(webp|avif)$")
+
+SAVE_OPTIONS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "avif": {"format": "AVIF", "quality": 60},
+}
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "IMAGE_VARIANT_WORKERS", 2), thread_name_prefix="image-variant"
+            )
+        return _executor
+
+
+def widths():
+    return sorted(getattr(settings, "IMAGE_VARIANT_WIDTHS", [320, 640, 1024]))
+
+
+def formats():
+    if getattr(settings, "IMAGE_VARIANT_AVIF", False) and features.check("avif"):
+        return ["webp", "avif"]
+    return ["webp"]
+
+
+def variant_dir(path):
+    """Directory of the derivatives of ``path``, both relative to MEDIA_ROOT."""
+    digest = hashlib.sha256(path.encode("utf-8")).hexdigest()[:32]
+    return f"{getattr(settings, 'IMAGE_VARIANT_DIR', 'variants')}/{digest}"
+
+
+def variant_path(path, width, fmt):
+    """Derivative of ``path`` (relative to MEDIA_ROOT), also relative to MEDIA_ROOT."""
+    return f"{variant_dir(path)}/{width}w.{fmt}"
+
+
+def _full_path(path):
+    return os.path.join(settings.MEDIA_ROOT, path)
+
+
+def target_widths(source_width):
+    """Widths to write for an image ``source_width`` pixels wide, largest first."""
+    targets = [width for width in widths() if width < source_width]
+    if not widths() or source_width <= widths()[-1]:
+        # Jamais d'agrandissement : la plus grande taille est celle de l'image
+        targets.append(source_width)
+    return sorted(targets, reverse=True)
+
+
+def generate(path):
+    """Write every derivative of ``path``, largest first (each resized from the previous one)."""
+    with Image.open(_full_path(path)) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+    directory = _full_path(variant_dir(path))
+    os.makedirs(directory, exist_ok=True)
+    written = set()
+    for width in target_widths(image.width):
+        if width < image.width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        for fmt in formats():
+            target = _full_path(variant_path(path, width, fmt))
+            tmp = f"{target}.{threading.get_ident()}.tmp"
+            image.save(tmp, **SAVE_OPTIONS[fmt])
+            os.replace(tmp, target)
+            written.add(os.path.basename(target))
+    # Image remplacée par une autre taille : ses anciens dérivés ne servent plus
+    for name in os.listdir(directory):
+        if _VARIANT_NAME.match(name) and name not in written:
+            os.remove(os.path.join(directory, name))
+
+
+def _run(path):
+    try:
+        generate(path)
+    except Exception as e:
+        print(f"❌ Dérivés d'image impossibles pour {path}: {e}")
+        _failed.add(path)
+    finally:
+        with _executor_lock:
+            _in_flight.discard(path)
+
+
+def submit(path, force=False):
+    """Queue the derivatives of ``path``; ``force`` rebuilds them (the file was replaced)."""
+    if not path:
+        return None
+    with _executor_lock:
+        if path in _in_flight and not force:
+            return None
+        _in_flight.add(path)
+    if force:
+        _failed.discard(path)
+    return _pool().submit(_run, path)
+
+
+def _variants(path):
+    """{fmt: [(width, url)]} of the derivatives of ``path`` on disk, narrowest first."""
+    found = {}
+    try:
+        names = os.listdir(_full_path(variant_dir(path)))
+    except FileNotFoundError:
+        return found
+    for name in names:
+        match = _VARIANT_NAME.match(name)
+        if match:
+            width, fmt = int(match.group(1)), match.group(2)
+            found.setdefault(fmt, []).append((width, f"{settings.MEDIA_URL}{variant_dir(path)}/{name}"))
+    for entries in found.values():
+        entries.sort()
+    return found
+
+
+def annotate(rows, field="image"):
+    """Add the ``<field>_src``/``_srcset``/``_avif_srcset`` of each row's image; return ``rows``."""
+    for row in rows:
+        path = row.get(field)
+        row[f"{field}_src"] = f"{settings.MEDIA_URL}{path}" if path else ""
+        row[f"{field}_srcset"] = row[f"{field}_avif_srcset"] = ""
+        if not path:
+            continue
+        variants = _variants(path)
+        webp = variants.get("webp")
+        if webp:
+            row[f"{field}_src"] = webp[0][1]
+            row[f"{field}_srcset"] = ", ".join(f"{url} {width}w" for width, url in webp)
+            avif = variants.get("avif", [])
+            row[f"{field}_avif_srcset"] = ", ".join(f"{url} {width}w" for width, url in avif)
+        elif path not in _failed and os.path.exists(_full_path(path)):
+            submit(path)
+    return rows
@@ -0,0 +1,47 @@
+# trelix_app/utils/index_builds.py
+"""
+One-time builds of the local copies of graph data (leaderboard store,
+module search indexes).
+
+Those copies are also written incrementally (a submission, a module edit),
+so "the table is empty" does not mean "never built": after a deploy, the
+first edit would make the index non-empty and hide every older record.
+ensure(name, build) runs ``build()`` the first time ``name`` is needed and
+records an IndexBuild row once it succeeds; rebuild commands call
+mark_built() after a full rebuild, forget() forces the next ensure() to
+rebuild.
+"""
+import threading
+
+from django.utils import timezone
+
+from trelix_app.models import IndexBuild
+
+_built = set()  # names known to be built, to skip the lookup on every read
+_lock = threading.Lock()
+
+
+def is_built(name):
+    return name in _built or IndexBuild.objects.filter(name=name).exists()
+
+
+def mark_built(name):
+    IndexBuild.objects.update_or_create(name=name, defaults={"built_at": timezone.now()})
+    _built.add(name)
+
+
+def forget(name):
+    IndexBuild.objects.filter(name=name).delete()
+    _built.discard(name)
+
+
+def ensure(name, build):
+    """Run ``build()`` unless ``name`` was built already; exceptions propagate (and it is retried)."""
+    if name in _built:
+        return
+    with _lock:
+        if is_built(name):
+            _built.add(name)
+            return
+        build()
+        mark_built(name)
@@ -0,0 +1,41 @@
+# trelix_app/utils/pagination.py
+"""
+Page-at-a-time listings for the SPARQL-backed list views.
+
+paginate() asks the app's count helper for the size of the collection, lets
+django.core.paginator.Paginator pick and clamp the page from ``?page=``,
+then fetches only that page (LIMIT/OFFSET). The result is an ordinary
+Django Page, so templates use page.has_next, page.paginator.page_range,
+etc. (see trelix_app/pagination.html), and a list view's memory and
+render time depend on LIST_PAGE_SIZE rather than the size of the dataset.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+
+
+def page_size():
+    return getattr(settings, "LIST_PAGE_SIZE", 12)
+
+
+def _page(request, total, per_page):
+    return Paginator(range(total), per_page or page_size()).get_page(request.GET.get("page"))
+
+
+def paginate(request, fetch, count, per_page=None):
+    """``fetch(limit, offset)`` returns one page of rows, ``count()`` their total."""
+    page = _page(request, count(), per_page)
+    if page.object_list:
+        page.object_list = fetch(len(page.object_list), page.start_index() - 1)
+    else:
+        page.object_list = []
+    return page
+
+
+async def apaginate(request, fetch, count, per_page=None):
+    """paginate() for async views: ``fetch`` and ``count`` are coroutine functions."""
+    page = _page(request, await count(), per_page)
+    if page.object_list:
+        page.object_list = await fetch(len(page.object_list), page.start_index() - 1)
+    else:
+        page.object_list = []
+    return page
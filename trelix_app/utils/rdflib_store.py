@@ -0,0 +1,75 @@
+# trelix_app/utils/rdflib_store.py
+"""
+In-process stand-in for Fuseki, used when settings.SPARQL_BACKEND == "rdflib".
+
+Each Fuseki dataset (the last path segment of its URL, e.g. "trelix") maps to
+an rdflib Graph. The default dataset is seeded from SPARQL_RDFLIB_SOURCES (the
+ontologies under Ontology/). With SPARQL_RDFLIB_STORE naming a persistent
+rdflib store plugin (e.g. "BerkeleyDB") and SPARQL_RDFLIB_STORE_PATH set, the
+graphs are kept on disk and only seeded when empty; the default in-memory
+store starts fresh on every process start.
+"""
+import json
+import os
+import threading
+
+from django.conf import settings
+from rdflib import Graph
+
+_graphs = {}
+_lock = threading.RLock()
+
+
+def dataset_name(base):
+    return base.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _open_graph(name):
+    store = getattr(settings, "SPARQL_RDFLIB_STORE", "default")
+    path = getattr(settings, "SPARQL_RDFLIB_STORE_PATH", None)
+    graph = Graph(store=store)
+    if store != "default" and path:
+        os.makedirs(path, exist_ok=True)
+        graph.open(os.path.join(str(path), name), create=True)
+
+    default_dataset = dataset_name(getattr(settings, "FUSEKI_URL", "trelix"))
+    if name == default_dataset and len(graph) == 0:
+        for source in getattr(settings, "SPARQL_RDFLIB_SOURCES", []):
+            graph.parse(str(source))
+        _commit(graph)
+    return graph
+
+
+def _commit(graph):
+    if graph.store.transaction_aware:
+        graph.commit()
+
+
+def get_graph(base):
+    name = dataset_name(base)
+    with _lock:
+        if name not in _graphs:
+            _graphs[name] = _open_graph(name)
+        return _graphs[name]
+
+
+def query(base, query_text):
+    """Run a SELECT/ASK query and return it as SPARQL JSON, like Fuseki."""
+    graph = get_graph(base)
+    with _lock:
+        result = graph.query(query_text)
+        return json.loads(result.serialize(format="json"))
+
+
+def update(base, update_text):
+    graph = get_graph(base)
+    with _lock:
+        graph.update(update_text)
+        _commit(graph)
+
+
+def close_all():
+    with _lock:
+        for graph in _graphs.values():
+            graph.close()
+        _graphs.clear()
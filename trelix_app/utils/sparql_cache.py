@@ -0,0 +1,95 @@
+# trelix_app/utils/sparql_cache.py
+"""
+Cross-request cache for SPARQL SELECT/ASK results.
+
+Results live in the Django cache named by SPARQL_CACHE_ALIAS, so the backend
+(locmem, file, Redis...) is whatever settings.CACHES says. Keys embed a
+per-dataset version number; sparql_client.run_update bumps it, which makes
+every result cached before the write unreachable without deleting anything.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, "SPARQL_CACHE_ALIAS", "default")]
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def _version_key(base):
+    return f"sparql:version:{_digest(base)}"
+
+
+def is_enabled(app):
+    if not getattr(settings, "SPARQL_CACHE_ENABLED", True):
+        return False
+    return app not in getattr(settings, "SPARQL_CACHE_DISABLED_APPS", ())
+
+
+def dataset_version(base):
+    cache = _cache()
+    version = cache.get(_version_key(base))
+    if version is None:
+        # Seed from the clock so a version evicted from the cache never comes
+        # back lower than one already used for cached results.
+        cache.add(_version_key(base), int(time.time() * 1000), None)
+        version = cache.get(_version_key(base))
+    return version
+
+
+def bump_version(base):
+    cache = _cache()
+    try:
+        return cache.incr(_version_key(base))
+    except ValueError:
+        cache.add(_version_key(base), int(time.time() * 1000), None)
+        return cache.incr(_version_key(base))
+
+
+def result_key(base, normalized_query):
+    """Key for a result at the current dataset version.
+
+    Compute it before running the query: if an update lands meanwhile, the
+    result is stored under the old version and never served.
+    """
+    return f"sparql:result:{_digest(base)}:{dataset_version(base)}:{_digest(normalized_query)}"
+
+
+def _count(app, outcome):
+    with _counters_lock:
+        counters = _counters.setdefault(app or "-", {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+
+def lookup(key, app):
+    result = _cache().get(key)
+    _count(app, "hits" if result is not None else "misses")
+    return result
+
+
+def store(key, result, ttl):
+    _cache().set(key, result, ttl)
+
+
+def stats():
+    """Hit/miss counts of this process, overall and per app."""
+    with _counters_lock:
+        by_app = {app: dict(c) for app, c in _counters.items()}
+    hits = sum(c["hits"] for c in by_app.values())
+    misses = sum(c["misses"] for c in by_app.values())
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        "by_app": by_app,
+    }
@@ -1,17 +1,435 @@
 # trelix_app/utils/sparql_client.py
-from SPARQLWrapper import SPARQLWrapper, JSON, POST
-
-FUSEKI_URL = "http://localhost:3030/trelix"
-
-def run_select(query):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/sparql")
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
-    results = sparql.query().convert()
-    return results['results']['bindings']
-
-def run_update(update_query):
-    sparql = SPARQLWrapper(f"{FUSEKI_URL}/update")
-    sparql.setMethod(POST)
-    sparql.setQuery(update_query)
-    sparql.query()
+"""
+Shared SPARQL access layer used by every app.
+
+All requests to Fuseki go through one process-wide urllib3 PoolManager, so
+HTTP connections are kept alive and reused instead of being opened for each
+query. Pool sizes and timeouts come from settings (see SPARQL_* in
+trelix_app/settings.py).
+
+The helpers are stateless: each call takes its query text as an argument and
+keeps nothing on a shared object, so they are safe to call from any number of
+worker threads. Size SPARQL_POOL_MAXSIZE to the worker thread count.
+
+Inside a request (see trelix_app.middleware.SPARQLRequestCacheMiddleware) or a
+``request_memo()`` block, identical SELECT/ASK queries are answered from a
+per-request memo; any update issued in the same scope clears it.
+
+Reads that pass ``cache_ttl`` are also shared across requests through the
+Django cache (see sparql_cache); every update bumps the dataset version so
+those entries are never served after a write from this deployment.
+
+With settings.SPARQL_BACKEND = "rdflib" the same query strings run in-process
+against rdflib graphs (see rdflib_store) instead of going over HTTP.
+
+aquery/arun_select/arun_ask/arun_update are the asyncio counterparts, for
+the async list views that trelix_app/asgi.py routes to (see
+trelix_app/urls_asgi.py); they share an httpx.AsyncClient pool per event
+loop and go through the same memo and cache. Under WSGI (WSGI_APPLICATION)
+each async view would get its own event loop and so its own client and
+connection, so trelix_app.urls keeps the sync views there, on the
+keep-alive pool above.
+
+Independent reads can be sent concurrently: run_parallel() for sync code,
+asyncio.gather() over the arun_* coroutines under ASGI.
+"""
+import asyncio
+import contextlib
+import contextvars
+import json
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+import httpx
+import urllib3
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from trelix_app.utils import rdflib_store, sparql_cache
+
+DEFAULT_FUSEKI_URL = "http://localhost:3030/trelix"
+
+_manager = None
+_manager_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+_executor = None
+_executor_lock = threading.Lock()
+_in_worker = threading.local()
+_request_memo = contextvars.ContextVar("sparql_request_memo", default=None)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class SPARQLError(Exception):
+    """Raised when Fuseki answers with a non-2xx status."""
+
+    def __init__(self, status, body, endpoint):
+        self.status = status
+        self.body = body
+        self.endpoint = endpoint
+        super().__init__(f"SPARQL endpoint {endpoint} returned {status}: {body[:200]}")
+
+
+def fuseki_url():
+    return getattr(settings, "FUSEKI_URL", DEFAULT_FUSEKI_URL).rstrip("/")
+
+
+def _get_manager():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = urllib3.PoolManager(
+                    num_pools=getattr(settings, "SPARQL_POOL_NUM_POOLS", 4),
+                    maxsize=getattr(settings, "SPARQL_POOL_MAXSIZE", 10),
+                    block=getattr(settings, "SPARQL_POOL_BLOCK", False),
+                    timeout=urllib3.Timeout(
+                        connect=getattr(settings, "SPARQL_CONNECT_TIMEOUT", 5.0),
+                        read=getattr(settings, "SPARQL_READ_TIMEOUT", 30.0),
+                    ),
+                    retries=urllib3.Retry(
+                        total=getattr(settings, "SPARQL_RETRIES", 2),
+                        connect=getattr(settings, "SPARQL_RETRIES", 2),
+                        read=0,
+                        allowed_methods=None,
+                    ),
+                )
+    return _manager
+
+
+def _connection_pool(endpoint):
+    """Return the keep-alive pool for the host of ``endpoint``.
+
+    SPARQL_POOL_HOST_LIMITS ({"host:port": maxsize}) overrides the default
+    pool size for individual hosts.
+    """
+    netloc = urlsplit(endpoint).netloc
+    limits = getattr(settings, "SPARQL_POOL_HOST_LIMITS", {})
+    pool_kwargs = {"maxsize": limits[netloc]} if netloc in limits else None
+    return _get_manager().connection_from_url(endpoint, pool_kwargs=pool_kwargs)
+
+
+def _pool_key(pool):
+    return f"{pool.host}:{pool.port}"
+
+
+def _record(netloc, elapsed, failed):
+    with _stats_lock:
+        stats = _stats.setdefault(netloc, {"requests": 0, "errors": 0, "total_time": 0.0})
+        stats["requests"] += 1
+        stats["total_time"] += elapsed
+        if failed:
+            stats["errors"] += 1
+
+
+def _post(endpoint, fields, accept):
+    pool = _connection_pool(endpoint)
+    start = time.perf_counter()
+    failed = True
+    try:
+        response = pool.request(
+            "POST",
+            urlsplit(endpoint).path,
+            body=urlencode(fields),
+            headers={
+                "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+                "Accept": accept,
+            },
+        )
+        if not 200 <= response.status < 300:
+            raise SPARQLError(response.status, response.data.decode("utf-8", "replace"), endpoint)
+        failed = False
+        return response.data
+    finally:
+        _record(_pool_key(pool), time.perf_counter() - start, failed)
+
+
+def _use_rdflib():
+    return getattr(settings, "SPARQL_BACKEND", "fuseki") == "rdflib"
+
+
+def _timed_local(base, call, *args):
+    start = time.perf_counter()
+    failed = True
+    try:
+        result = call(base, *args)
+        failed = False
+        return result
+    finally:
+        _record(f"rdflib:{rdflib_store.dataset_name(base)}", time.perf_counter() - start, failed)
+
+
+def _send_query(base, query_text):
+    if _use_rdflib():
+        return _timed_local(base, rdflib_store.query, query_text)
+    data = _post(f"{base}/query", {"query": query_text}, "application/sparql-results+json")
+    return json.loads(data)
+
+
+def _send_update(base, update_query):
+    if _use_rdflib():
+        _timed_local(base, rdflib_store.update, update_query)
+    else:
+        _post(f"{base}/update", {"update": update_query}, "*/*")
+
+
+@contextlib.contextmanager
+def request_memo():
+    """Memoize SELECT/ASK results for the duration of the block.
+
+    Results are shared between callers of the same query, so treat them as
+    read-only.
+    """
+    token = _request_memo.set({})
+    try:
+        yield
+    finally:
+        _request_memo.reset(token)
+
+
+def normalize_query(query_text):
+    return _WHITESPACE.sub(" ", query_text).strip()
+
+
+def query(query_text, dataset_url=None, app=None, cache_ttl=None):
+    """Run a SELECT/ASK query and return the decoded SPARQL JSON result.
+
+    ``cache_ttl`` (seconds) opts the query into the cross-request cache;
+    ``app`` names the calling app for SPARQL_CACHE_DISABLED_APPS and the
+    hit/miss accounting.
+    """
+    base = (dataset_url or fuseki_url()).rstrip("/")
+    normalized = normalize_query(query_text)
+    memo = _request_memo.get()
+    if memo is not None and (base, normalized) in memo:
+        return memo[(base, normalized)]
+
+    shared = cache_ttl is not None and sparql_cache.is_enabled(app)
+    if shared:
+        cache_key = sparql_cache.result_key(base, normalized)
+        result = sparql_cache.lookup(cache_key, app)
+    else:
+        result = None
+    if result is None:
+        result = _send_query(base, query_text)
+        if shared:
+            sparql_cache.store(cache_key, result, cache_ttl)
+    if memo is not None:
+        memo[(base, normalized)] = result
+    return result
+
+
+def run_select(query_text, dataset_url=None, app=None, cache_ttl=None):
+    return query(query_text, dataset_url, app, cache_ttl)["results"]["bindings"]
+
+
+def run_ask(query_text, dataset_url=None, app=None, cache_ttl=None):
+    return bool(query(query_text, dataset_url, app, cache_ttl).get("boolean", False))
+
+
+def run_update(update_query, dataset_url=None, bump_cache=True):
+    """Run a SPARQL update and make the cached reads of its dataset stale.
+
+    Pass ``bump_cache=False`` only for writes that no ``cache_ttl`` read can
+    see (e.g. quiz leaderboard entries, read from leaderboared.store), so
+    frequent writes do not flush the catalog cache.
+    """
+    base = (dataset_url or fuseki_url()).rstrip("/")
+    try:
+        _send_update(base, update_query)
+    finally:
+        # Bump even on failure: the update may have been applied before the
+        # error reached us.
+        if bump_cache:
+            sparql_cache.bump_version(base)
+        memo = _request_memo.get()
+        if memo is not None:
+            memo.clear()
+
+
+def cache_stats():
+    return sparql_cache.stats()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "SPARQL_PARALLEL_WORKERS", 8),
+                    thread_name_prefix="sparql",
+                )
+    return _executor
+
+
+def _run_in_worker(call):
+    _in_worker.active = True
+    try:
+        return call()
+    finally:
+        _in_worker.active = False
+
+
+def run_parallel(*calls, return_exceptions=False):
+    """Run independent zero-argument callables concurrently, results in order.
+
+    Meant for reads that do not depend on each other, e.g.
+    ``run_parallel(lambda: get_evenements_page(12), lambda: count_evenements())``.
+    Each call runs in a copy of the caller's context, so the request memo is
+    shared with the calling request. Like asyncio.gather, the first exception
+    is raised unless ``return_exceptions`` is set, in which case exceptions are
+    returned in place of results.
+
+    Calls made from a worker thread run inline, so nesting cannot exhaust the
+    pool (SPARQL_PARALLEL_WORKERS threads).
+    """
+    if len(calls) < 2 or getattr(_in_worker, "active", False):
+        results = []
+        for call in calls:
+            try:
+                results.append(call())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    executor = _get_executor()
+    futures = [
+        executor.submit(contextvars.copy_context().run, _run_in_worker, call)
+        for call in calls
+    ]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            results.append(e)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Async API
+# ---------------------------------------------------------------------------
+
+def _get_async_client():
+    """Shared httpx.AsyncClient of the running event loop.
+
+    httpx connections are bound to the loop that opened them, so there is one
+    client per loop: a single one under ASGI. Not for async views under WSGI,
+    where every request runs on a new loop (see the module docstring).
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        maxsize = getattr(settings, "SPARQL_POOL_MAXSIZE", 10)
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=maxsize, max_keepalive_connections=maxsize),
+            timeout=httpx.Timeout(
+                getattr(settings, "SPARQL_READ_TIMEOUT", 30.0),
+                connect=getattr(settings, "SPARQL_CONNECT_TIMEOUT", 5.0),
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=getattr(settings, "SPARQL_RETRIES", 2)),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def _apost(endpoint, fields, accept):
+    parts = urlsplit(endpoint)
+    netloc = f"{parts.hostname}:{parts.port or (443 if parts.scheme == 'https' else 80)}"
+    start = time.perf_counter()
+    failed = True
+    try:
+        response = await _get_async_client().post(endpoint, data=fields, headers={"Accept": accept})
+        if not 200 <= response.status_code < 300:
+            raise SPARQLError(response.status_code, response.text, endpoint)
+        failed = False
+        return response.content
+    finally:
+        _record(netloc, time.perf_counter() - start, failed)
+
+
+async def aquery(query_text, dataset_url=None, app=None, cache_ttl=None):
+    """Async counterpart of query()."""
+    base = (dataset_url or fuseki_url()).rstrip("/")
+    normalized = normalize_query(query_text)
+    memo = _request_memo.get()
+    if memo is not None and (base, normalized) in memo:
+        return memo[(base, normalized)]
+
+    shared = cache_ttl is not None and sparql_cache.is_enabled(app)
+    if shared:
+        cache_key = await sync_to_async(sparql_cache.result_key, thread_sensitive=False)(base, normalized)
+        result = await sync_to_async(sparql_cache.lookup, thread_sensitive=False)(cache_key, app)
+    else:
+        result = None
+    if result is None:
+        if _use_rdflib():
+            result = await sync_to_async(_send_query, thread_sensitive=False)(base, query_text)
+        else:
+            data = await _apost(f"{base}/query", {"query": query_text}, "application/sparql-results+json")
+            result = json.loads(data)
+        if shared:
+            await sync_to_async(sparql_cache.store, thread_sensitive=False)(cache_key, result, cache_ttl)
+    if memo is not None:
+        memo[(base, normalized)] = result
+    return result
+
+
+async def arun_select(query_text, dataset_url=None, app=None, cache_ttl=None):
+    return (await aquery(query_text, dataset_url, app, cache_ttl))["results"]["bindings"]
+
+
+async def arun_ask(query_text, dataset_url=None, app=None, cache_ttl=None):
+    return bool((await aquery(query_text, dataset_url, app, cache_ttl)).get("boolean", False))
+
+
+async def arun_update(update_query, dataset_url=None, bump_cache=True):
+    base = (dataset_url or fuseki_url()).rstrip("/")
+    try:
+        if _use_rdflib():
+            await sync_to_async(_send_update, thread_sensitive=False)(base, update_query)
+        else:
+            await _apost(f"{base}/update", {"update": update_query}, "*/*")
+    finally:
+        if bump_cache:
+            await sync_to_async(sparql_cache.bump_version, thread_sensitive=False)(base)
+        memo = _request_memo.get()
+        if memo is not None:
+            memo.clear()
+
+
+def pool_stats():
+    """Snapshot of the connection pools, for sizing SPARQL_POOL_*.
+
+    For every host: requests sent, errors, mean latency, connections opened
+    by the pool since start-up, and the pool's maxsize. Queries answered by
+    the rdflib backend appear under "rdflib:<dataset>", which gives the
+    query cost without the HTTP round-trip.
+    """
+    snapshot = {}
+    with _stats_lock:
+        for netloc, stats in _stats.items():
+            snapshot[netloc] = {
+                "requests": stats["requests"],
+                "errors": stats["errors"],
+                "avg_latency_ms": round(stats["total_time"] / stats["requests"] * 1000, 2) if stats["requests"] else 0.0,
+            }
+    if _manager is not None:
+        for key in list(_manager.pools.keys()):
+            pool = _manager.pools.get(key)
+            if pool is None:
+                continue
+            entry = snapshot.setdefault(_pool_key(pool), {"requests": 0, "errors": 0, "avg_latency_ms": 0.0})
+            entry["connections_opened"] = pool.num_connections
+            entry["maxsize"] = pool.pool.maxsize if pool.pool is not None else 0
+    return snapshot
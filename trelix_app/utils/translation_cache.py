@@ -0,0 +1,175 @@
+# trelix_app/utils/translation_cache.py
+"""
+Persistent cache of natural-language -> SPARQL translations.
+
+The semantic searches of module and evenement ask an LLM to write a SPARQL
+query for every search string. translate() runs the query and, once it has
+run without error, stores it in the
+SparqlTranslation table (SQLite, so it survives restarts), keyed on the
+normalized query plus the namespace, the model name and the prompt template:
+changing the model or editing the prompt starts a fresh set of entries.
+
+Entries expire SPARQL_TRANSLATION_CACHE_TTL seconds after they were written;
+beyond SPARQL_TRANSLATION_CACHE_MAX_ENTRIES the least recently used ones are
+evicted. A hit returns the stored SPARQL without calling the LLM, and counts
+the duration of the original LLM call as latency saved (see stats() and
+`manage.py translation_cache`). A stored query that fails when run again
+(dataset or endpoint changed) is deleted, so the next search asks the LLM.
+"""
+import hashlib
+import threading
+import time
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from trelix_app.models import SparqlTranslation
+
+_counters = {"hits": 0, "misses": 0, "saved_ms": 0.0, "llm_ms": 0.0}
+_counters_lock = threading.Lock()
+
+
+def _ttl():
+    return getattr(settings, "SPARQL_TRANSLATION_CACHE_TTL", 7 * 24 * 3600)
+
+
+def _max_entries():
+    return getattr(settings, "SPARQL_TRANSLATION_CACHE_MAX_ENTRIES", 5000)
+
+
+def is_enabled():
+    return getattr(settings, "SPARQL_TRANSLATION_CACHE_ENABLED", True)
+
+
+def normalize(query):
+    """Case, Unicode form and whitespace do not change the translation."""
+    return " ".join(unicodedata.normalize("NFKC", query or "").casefold().split())
+
+
+def cache_key(namespace, query, model, prompt_version):
+    parts = (namespace, model, hashlib.sha256(prompt_version.encode("utf-8")).hexdigest(), normalize(query))
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _count(**deltas):
+    with _counters_lock:
+        for name, delta in deltas.items():
+            _counters[name] += delta
+
+
+def lookup(key):
+    """Stored SPARQL for ``key``, or None if missing or expired."""
+    entry = SparqlTranslation.objects.filter(key=key).values("pk", "sparql", "latency_ms", "created_at").first()
+    if entry is None:
+        return None
+    if entry["created_at"] < timezone.now() - timedelta(seconds=_ttl()):
+        SparqlTranslation.objects.filter(pk=entry["pk"]).delete()
+        return None
+    SparqlTranslation.objects.filter(pk=entry["pk"]).update(hits=F("hits") + 1, last_used_at=timezone.now())
+    _count(hits=1, saved_ms=entry["latency_ms"])
+    return entry["sparql"]
+
+
+def store(key, namespace, query, model, sparql, latency_ms):
+    now = timezone.now()
+    SparqlTranslation.objects.update_or_create(
+        key=key,
+        defaults={
+            "namespace": namespace,
+            "query": query,
+            "model_name": model,
+            "sparql": sparql,
+            "latency_ms": latency_ms,
+            "hits": 0,
+            "created_at": now,
+            "last_used_at": now,
+        },
+    )
+    evict()
+
+
+def evict():
+    """Drop expired entries, then the least recently used beyond the size limit."""
+    SparqlTranslation.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=_ttl())).delete()
+    overflow = SparqlTranslation.objects.count() - _max_entries()
+    if overflow > 0:
+        oldest = SparqlTranslation.objects.order_by("last_used_at", "id").values_list("pk", flat=True)[:overflow]
+        SparqlTranslation.objects.filter(pk__in=list(oldest)).delete()
+
+
+def forget(key):
+    SparqlTranslation.objects.filter(key=key).delete()
+
+
+def translate(namespace, query, generate, execute, model, prompt_version):
+    """
+    Return ``execute(sparql)`` for the SPARQL of ``query``: from the cache,
+    or from ``generate()`` (the LLM call). A generated query is stored only
+    after ``execute`` ran it without error; a cached one that fails is
+    deleted. Exceptions from ``generate`` and ``execute`` propagate, so
+    callers keep their own fallback.
+    """
+    if not is_enabled():
+        return execute(generate())
+    key = cache_key(namespace, query, model, prompt_version)
+    try:
+        cached = lookup(key)
+    except Exception as e:
+        print(f"Translation cache unavailable: {e}")
+        return execute(generate())
+    if cached is not None:
+        try:
+            return execute(cached)
+        except Exception:
+            try:
+                forget(key)
+            except Exception as e:
+                print(f"Translation cache delete failed: {e}")
+            raise
+
+    started = time.perf_counter()
+    sparql = generate()
+    latency_ms = (time.perf_counter() - started) * 1000
+    _count(misses=1, llm_ms=latency_ms)
+    result = execute(sparql)
+    if sparql:
+        try:
+            store(key, namespace, normalize(query), model, sparql, latency_ms)
+        except Exception as e:
+            print(f"Translation cache write failed: {e}")
+    return result
+
+
+def stats():
+    """
+    Counters of this process (hits, misses, hit_ratio, latency saved by hits
+    and spent on LLM calls) and totals kept in the table across restarts.
+    """
+    with _counters_lock:
+        current = dict(_counters)
+    lookups = current["hits"] + current["misses"]
+    stored = SparqlTranslation.objects.aggregate(total_hits=Sum("hits"), saved_ms=Sum(F("hits") * F("latency_ms")))
+    entries = SparqlTranslation.objects.count()
+    total_hits = stored["total_hits"] or 0
+    return {
+        "hits": current["hits"],
+        "misses": current["misses"],
+        "hit_ratio": round(current["hits"] / lookups, 3) if lookups else 0.0,
+        "latency_saved_ms": round(current["saved_ms"], 1),
+        "llm_latency_ms": round(current["llm_ms"], 1),
+        "entries": entries,
+        "stored_hits": total_hits,
+        # Each stored entry cost one miss
+        "stored_hit_ratio": round(total_hits / (total_hits + entries), 3) if entries else 0.0,
+        "stored_latency_saved_ms": round(stored["saved_ms"] or 0.0, 1),
+    }
+
+
+def clear(namespace=None):
+    entries = SparqlTranslation.objects.all()
+    if namespace:
+        entries = entries.filter(namespace=namespace)
+    return entries.delete()[0]
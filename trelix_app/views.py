@@ -1,20 +1,17 @@
 from django.shortcuts import render
-from SPARQLWrapper import SPARQLWrapper, JSON
+from trelix_app.utils.sparql_client import run_select
 from django.shortcuts import render, redirect
 
 def home(request):
     return render(request, 'trelix_app/index.html')
     
 def classes_html_view(request):
-    sparql = SPARQLWrapper("http://localhost:3030/trelix/sparql")
-    sparql.setQuery("""
+    results = run_select("""
         SELECT ?class
         WHERE {
           ?class a <http://www.w3.org/2002/07/owl#Class> .
         }
-    """)
-    sparql.setReturnFormat(JSON)
-    results = sparql.query().convert()
+    """, app="trelix_app", cache_ttl=3600)  # the ontology's classes rarely change
     # Extract class URIs
-    class_uris = [binding['class']['value'] for binding in results['results']['bindings']]
+    class_uris = [binding['class']['value'] for binding in results]
     return render(request, 'trelix_app/classes.html', {'class_uris': class_uris})
\ No newline at end of file